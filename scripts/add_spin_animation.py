@@ -6,7 +6,8 @@
 import re
 from pathlib import Path
 
-PROJECT_ROOT = Path(__file__).parent.parent
+from html_transforms import discover_pages, register
+from snapshot_store import SnapshotStore
 
 # CSS动画定义
 SPIN_ANIMATION_CSS = '''<style>
@@ -15,7 +16,14 @@ SPIN_ANIMATION_CSS = '''<style>
 }
 </style>'''
 
-def add_spin_animation(file_path):
+@register('spin_animation')
+def insert_spin_animation(content):
+    """在 </head> 前插入 spin 动画 CSS（已存在或没有 </head> 时不变）"""
+    if '@keyframes spin' in content or '</head>' not in content:
+        return content
+    return content.replace('</head>', f'{SPIN_ANIMATION_CSS}\n</head>')
+
+def add_spin_animation(file_path, snapshot=None):
     """在HTML的head中添加spin动画"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -28,14 +36,12 @@ def add_spin_animation(file_path):
         
         # 在</head>前插入CSS
         if '</head>' in content:
-            content = content.replace('</head>', f'{SPIN_ANIMATION_CSS}\n</head>')
+            original = content
+            content = insert_spin_animation(content)
             
-            # 创建备份
-            backup_path = str(file_path) + '.anim_bak'
-            with open(file_path, 'r', encoding='utf-8') as f:
-                original = f.read()
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(original)
+            # 记录快照（可用 snapshot_store.py 回滚）
+            if snapshot is not None:
+                snapshot.record(file_path, original, content)
             
             # 写入更新
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -52,23 +58,17 @@ def add_spin_animation(file_path):
         return False
 
 def main():
-    mirrors_dir = PROJECT_ROOT / 'mirrors'
-    
-    files_to_update = [
-        mirrors_dir / '01' / 'index.html',
-        mirrors_dir / '02' / 'index.html',
-        mirrors_dir / '04' / 'index.html',
-        mirrors_dir / '07' / 'index.html',
-        mirrors_dir / '08' / 'index.html',
-    ]
+    # frontend/mirrors 下含 3D 模型容器的页面
+    files_to_update = [Path(p) for p in discover_pages()]
     
     print('🎨 添加spin动画CSS...\n')
     
-    updated = 0
-    for file_path in files_to_update:
-        if file_path.exists():
-            if add_spin_animation(file_path):
-                updated += 1
+    with SnapshotStore().begin('add_spin_animation') as run:
+        updated = 0
+        for file_path in files_to_update:
+            if file_path.exists():
+                if add_spin_animation(file_path, run):
+                    updated += 1
     
     print(f'\n✨ 完成! 已更新 {updated} 个文件')
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+文章目录（scraper.py / save_original_pages.py / fetch_full_articles.py 共用）
+
+目录由 discover_articles.py 爬取频道列表页生成，保存在 data/articles/catalog.json，
+每篇文章一条记录:
+    id            首页/数据中的编号（已有文章保持不变，新文章顺延）
+    article_id    URL 中的数字编号，也是 data/original_pages 下的目录名
+    url           规范化后的原文地址
+    title         标题
+    channel       频道（tj / zw / rd / zbsz）
+    publish_date  发布日期 YYYY-MM-DD（列表页上没有时为空）
+    mirror        frontend/mirrors 下的目录名（只有做过镜像的文章才有）
+
+目录文件不存在时使用 SEED_ARTICLES（最初手工维护的 12 篇）。
+"""
+
+import json
+import os
+import re
+from urllib.parse import urlparse
+
+from crawl_manifest import PROJECT_ROOT
+from downloader import write_atomic
+
+DEFAULT_CATALOG = os.path.join(PROJECT_ROOT, 'data', 'articles', 'catalog.json')
+
+# 文章页: /ysz/zx/<频道>/<数字编号>.shtml
+ARTICLE_PATH_RE = re.compile(r'^/ysz/zx/(?P<channel>[a-z]+)/(?P<article_id>\d+)\.shtml$')
+
+# 最初手工维护的文章（mirror 为 frontend/mirrors 下的目录，与首页编号不完全一致）
+SEED_ARTICLES = [
+    {'id': 1, 'mirror': '01', 'url': 'https://www.sztv.com.cn/ysz/zx/zbsz/80611955.shtml',
+     'title': '腾讯新闻何毅进："可信度"是AI时代最稀缺的资源'},
+    {'id': 2, 'mirror': '02', 'url': 'https://www.sztv.com.cn/ysz/zx/rd/80611627.shtml',
+     'title': '深度丨中国"三航母时代"渐入佳境，硬核实力震慑"台独"分裂势力'},
+    {'id': 3, 'mirror': '03', 'url': 'https://www.sztv.com.cn/ysz/zx/tj/80611833.shtml',
+     'title': '深圳出台青年人才住房支持新政'},
+    {'id': 4, 'mirror': '04', 'url': 'https://www.sztv.com.cn/ysz/zx/tj/80611814.shtml',
+     'title': '海南自由贸易港正式启动全岛封关'},
+    {'id': 5, 'mirror': '05', 'url': 'https://www.sztv.com.cn/ysz/zx/tj/80611789.shtml',
+     'title': '外交部亚洲事务特使将再次赴柬埔寨、泰国穿梭调停'},
+    {'id': 6, 'mirror': '06', 'url': 'https://www.sztv.com.cn/ysz/zx/tj/80611791.shtml',
+     'title': '元旦火车票今起开售 购票注意事项请收好'},
+    {'id': 7, 'mirror': '07', 'url': 'https://www.sztv.com.cn/ysz/zx/zw/80611586.shtml',
+     'title': '深圳原创舞剧《咏春》开启北美首演，加拿大媒体刊文点赞'},
+    {'id': 8, 'mirror': '08', 'url': 'https://www.sztv.com.cn/ysz/zx/zw/80611296.shtml',
+     'title': '火出圈的深圳"食物银行"，已上线三年惠及近50万人次'},
+    {'id': 9, 'mirror': '12', 'url': 'https://www.sztv.com.cn/ysz/zx/zw/80611248.shtml',
+     'title': '期待！深圳奇迹的打开方式'},
+    {'id': 10, 'mirror': '09', 'url': 'https://www.sztv.com.cn/ysz/zx/tj/80611001.shtml',
+     'title': '中央财办：扩大内需是明年排在首位的重点任务'},
+    {'id': 11, 'mirror': '10', 'url': 'https://www.sztv.com.cn/ysz/zx/tj/80611004.shtml',
+     'title': '山东舰入列6周年！三航母时代已来，期待更多突破'},
+    {'id': 12, 'mirror': '11', 'url': 'https://www.sztv.com.cn/ysz/zx/tj/80611058.shtml',
+     'title': '台当局辩称"封禁"小红书无关两岸政策 国台办回应'},
+]
+
+
+def parse_article_url(url):
+    """文章页 URL 返回 (频道, 数字编号)，其他 URL 返回 None"""
+    match = ARTICLE_PATH_RE.match(urlparse(url).path)
+    if match is None:
+        return None
+    return match.group('channel'), match.group('article_id')
+
+
+def make_entry(url, title='', publish_date='', **extra):
+    """按 URL 补全 article_id / channel 的目录记录（id 由 merge_catalog 分配）"""
+    channel, article_id = parse_article_url(url)
+    entry = {'id': None, 'article_id': article_id, 'url': url, 'title': title,
+             'channel': channel, 'publish_date': publish_date, 'mirror': None}
+    entry.update(extra)
+    return entry
+
+
+def seed_catalog():
+    return [make_entry(**article) for article in SEED_ARTICLES]
+
+
+def load_catalog(path=DEFAULT_CATALOG, limit=None):
+    """读取文章目录（按 id 排序），limit 只取前若干篇"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            articles = json.load(f)['articles']
+    else:
+        articles = seed_catalog()
+    articles.sort(key=lambda a: a['id'])
+    return articles[:limit] if limit else articles
+
+
+def merge_catalog(existing, discovered):
+    """合并新发现的文章: 已有文章保持 id / mirror，补全空字段；新文章按发布日期顺延编号
+
+    以 article_id 去重（同一篇文章可能出现在多个频道）。返回 (合并后的目录, 新增篇数)。
+    """
+    by_article = {a['article_id']: a for a in existing}
+    added = []
+    for entry in discovered:
+        current = by_article.get(entry['article_id'])
+        if current is None:
+            by_article[entry['article_id']] = entry
+            added.append(entry)
+            continue
+        for key in ('title', 'publish_date', 'channel'):
+            if not current.get(key) and entry.get(key):
+                current[key] = entry[key]
+
+    next_id = max((a['id'] for a in existing), default=0) + 1
+    # 先发布的先编号，日期未知的排在最后
+    for entry in sorted(added, key=lambda a: (a['publish_date'] or '9999', a['article_id'])):
+        entry['id'] = next_id
+        next_id += 1
+    return sorted(by_article.values(), key=lambda a: a['id']), len(added)
+
+
+def save_catalog(articles, path=DEFAULT_CATALOG, sources=None):
+    """写入目录文件（原子替换）"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = {'sources': sources or [], 'count': len(articles), 'articles': articles}
+    write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def add_catalog_args(parser):
+    """给脚本的 argparse 加上目录参数"""
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG,
+                        help='文章目录路径（默认 data/articles/catalog.json，不存在时用内置的 12 篇）')
+    parser.add_argument('--limit', type=int, default=None, help='只处理目录中的前 N 篇文章')
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+discover_articles.py 压测
+启动本地 fixture 站点（4 个频道，每个频道若干分页列表页，每页若干文章，日期逐页递减），
+列表页里混有重复文章（跨频道转载）、带 #片段/utm 参数/index.shtml 的同一链接、站外链接，
+对比不同并发下的耗时。正确性（去重、URL 规范化、--since 截止、每个 URL 只抓一次）
+由 tests/test_discover_articles.py 在同一个 fixture 站点上断言。
+
+用法:
+    python3 scripts/bench_discovery.py
+    python3 scripts/bench_discovery.py --pages 100 --per-page 30 --latency-ms 40
+"""
+
+import argparse
+import datetime
+import http.server
+import threading
+import time
+
+from discover_articles import CHANNELS, CHANNEL_ROOT, ArticleDiscovery
+from downloader import Downloader
+from serve_modes import ThreadedHTTPServer
+
+START_DATE = datetime.date(2025, 12, 31)
+
+
+class FixtureSite:
+    """频道 c 的第 p 页（从 1 开始）列出 per_page 篇文章，日期为 START_DATE 往前 p-1 天"""
+
+    def __init__(self, pages, per_page):
+        self.pages = pages
+        self.per_page = per_page
+
+    def article_id(self, channel, page, i):
+        return 80000000 + CHANNELS.index(channel) * 1000000 + page * 1000 + i
+
+    def date(self, page):
+        return START_DATE - datetime.timedelta(days=page - 1)
+
+    def page_path(self, channel, page):
+        root = CHANNEL_ROOT.format(channel)
+        return root if page == 1 else f'{root}index_{page}.shtml'
+
+    def render(self, channel, page):
+        date = self.date(page).isoformat()
+        items = []
+        for i in range(self.per_page):
+            aid = self.article_id(channel, page, i)
+            path = f'{CHANNEL_ROOT.format(channel)}{aid}.shtml'
+            items.append(f'<li><a href="{path}" title="{channel} 文章 {aid}">{channel} 文章 {aid}</a>'
+                         f'<span class="time">{date} 10:00</span></li>')
+        # 同一篇文章的不同写法 + 跨频道转载（首页第一篇出现在其他频道的同一页）
+        first = f'{CHANNEL_ROOT.format(channel)}{self.article_id(channel, page, 0)}.shtml'
+        items.append(f'<li><a href="{first}#comment">评论</a><span>{date}</span></li>')
+        items.append(f'<li><a href="{first}?utm_source=wx">分享</a><span>{date}</span></li>')
+        other = CHANNELS[(CHANNELS.index(channel) + 1) % len(CHANNELS)]
+        repost = f'{CHANNEL_ROOT.format(other)}{self.article_id(other, page, 0)}.shtml'
+        items.append(f'<li><a href="{repost}">转载</a><span>{date}</span></li>')
+        # 分页: 首页、前后 3 页、末页；频道导航（index.shtml 与目录形式混用）
+        nav = [f'<a href="{CHANNEL_ROOT.format(channel)}index.shtml">首页</a>']
+        for p in range(max(1, page - 3), min(self.pages, page + 3) + 1):
+            nav.append(f'<a href="{self.page_path(channel, p)}">{p}</a>')
+        nav.append(f'<a href="{self.page_path(channel, self.pages)}">末页</a>')
+        nav += [f'<a href="{CHANNEL_ROOT.format(c)}">{c}</a>' for c in CHANNELS]
+        nav.append('<a href="https://example.com/ad.shtml">广告</a><a href="javascript:void(0)">更多</a>')
+        return (f'<html><body><ul class="list">{"".join(items)}</ul>'
+                f'<div class="page">{"".join(nav)}</div></body></html>').encode('utf-8')
+
+    def expected(self, since=None):
+        """since 及之后的文章数"""
+        pages = self.pages
+        if since:
+            pages = min(pages, (START_DATE - since).days + 1)
+        return len(CHANNELS) * pages * self.per_page
+
+    def route(self, path):
+        for channel in CHANNELS:
+            root = CHANNEL_ROOT.format(channel)
+            if path == root:
+                return self.render(channel, 1)
+            if path.startswith(root + 'index_'):
+                page = int(path[len(root + 'index_'):-len('.shtml')])
+                if 1 <= page <= self.pages:
+                    return self.render(channel, page)
+        return None
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    site = None
+    latency = 0.0
+    hits = None
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        body = self.site.route(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(base, workers, since=None, max_depth=50):
+    FixtureHandler.hits = {}
+    with Downloader(workers=workers, per_host=workers, rate=0, retry_file=None) as dl:
+        discovery = ArticleDiscovery(dl, base=base, since=since and since.isoformat(),
+                                     max_depth=max_depth, inflight=workers)
+        started = time.perf_counter()
+        articles = discovery.run()
+        elapsed = time.perf_counter() - started
+    return articles, discovery.stats, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='discover_articles.py 压测')
+    parser.add_argument('--pages', type=int, default=40, help='每个频道的列表页数')
+    parser.add_argument('--per-page', type=int, default=20, help='每个列表页的文章数')
+    parser.add_argument('--latency-ms', type=float, default=20, help='模拟的请求往返延迟')
+    args = parser.parse_args()
+
+    site = FixtureSite(args.pages, args.per_page)
+    FixtureHandler.site = site
+    FixtureHandler.latency = args.latency_ms / 1000
+    server = ThreadedHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    since = START_DATE - datetime.timedelta(days=args.pages // 4)
+    print("=" * 60)
+    print(f"{len(CHANNELS)} 个频道 × {args.pages} 页 × {args.per_page} 篇，往返 {args.latency_ms:g}ms")
+    print("=" * 60)
+
+    configs = [
+        ('workers=1', 1, None),
+        ('workers=8', 8, None),
+        ('workers=16', 16, None),
+        (f'workers=16 --since {since}', 16, since),
+    ]
+    print(f"\n{'配置':<30} {'列表页':>6} {'文章':>6} {'重复':>6} {'耗时(s)':>8} {'页/s':>7}")
+    for label, workers, cutoff in configs:
+        articles, stats, elapsed = run(base, workers, cutoff)
+        print(f"{label:<30} {stats['pages']:>6} {len(articles):>6} {stats['duplicates']:>6} "
+              f"{elapsed:>8.2f} {stats['pages'] / elapsed:>7.1f}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
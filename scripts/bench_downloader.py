@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+downloader.py 压测
+启动本地 fixture 服务器（模拟源站：新连接有握手延迟，每个请求有往返延迟），
+对比原脚本的串行裸 requests.get 与 Downloader 在不同并发下的总耗时。
+
+用法:
+    python3 scripts/bench_downloader.py
+    python3 scripts/bench_downloader.py --articles 12 --resources 80 --connect-ms 60 --latency-ms 40
+"""
+
+import argparse
+import http.server
+import random
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from downloader import Downloader
+from serve_modes import ThreadedHTTPServer
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """/asset/<n>?size=N 返回 N 字节；新连接先等待 connect_delay 模拟 TCP+TLS 握手"""
+
+    protocol_version = 'HTTP/1.1'
+    # 头和体分两次写出，不关 Nagle 会在 keep-alive 连接上撞上 40ms 延迟 ACK
+    disable_nagle_algorithm = True
+    connect_delay = 0.0
+    latency = 0.0
+
+    def setup(self):
+        super().setup()
+        time.sleep(self.connect_delay)
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        size = int(query.get('size', ['1024'])[0])
+        time.sleep(self.latency)
+        body = b'x' * size
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture(connect_ms, latency_ms):
+    FixtureHandler.connect_delay = connect_ms / 1000
+    FixtureHandler.latency = latency_ms / 1000
+    server = ThreadedHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_urls(port, articles, resources, seed=0):
+    """每篇文章 1 个页面 + resources 个资源，大小在 2KB~200KB 之间"""
+    rng = random.Random(seed)
+    urls = []
+    for a in range(articles):
+        urls.append(f'http://127.0.0.1:{port}/asset/page{a}?size=60000')
+        for r in range(resources):
+            urls.append(f'http://127.0.0.1:{port}/asset/{a}-{r}?size={rng.randint(2, 200) * 1024}')
+    return urls
+
+
+def expected_size(url):
+    return int(parse_qs(urlparse(url).query)['size'][0])
+
+
+def run_serial(urls):
+    """原脚本的行为：每个请求一个新连接，依次执行"""
+    sizes = []
+    for url in urls:
+        sizes.append(len(requests.get(url, timeout=30).content))
+    return sizes
+
+
+def run_downloader(urls, workers, per_host):
+    # 本地 fixture 不需要礼貌限速，只比较并发与连接复用
+    with Downloader(workers=workers, per_host=per_host, rate=0) as dl:
+        return [r.size for r in dl.fetch_all(urls)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='downloader.py 压测')
+    parser.add_argument('--articles', type=int, default=12, help='文章数')
+    parser.add_argument('--resources', type=int, default=20, help='每篇文章的资源数')
+    parser.add_argument('--connect-ms', type=float, default=30, help='模拟的建连（TCP+TLS）延迟')
+    parser.add_argument('--latency-ms', type=float, default=20, help='模拟的请求往返延迟')
+    args = parser.parse_args()
+
+    server = start_fixture(args.connect_ms, args.latency_ms)
+    port = server.server_address[1]
+    urls = make_urls(port, args.articles, args.resources)
+    expected = [expected_size(url) for url in urls]
+
+    print("=" * 60)
+    print(f"{len(urls)} 个请求，建连 {args.connect_ms:g}ms，往返 {args.latency_ms:g}ms")
+    print("=" * 60)
+
+    configs = [
+        ('串行 requests.get（原脚本）', lambda: run_serial(urls)),
+        ('Downloader workers=1（仅连接复用）', lambda: run_downloader(urls, 1, 1)),
+        ('Downloader workers=16 per-host=6', lambda: run_downloader(urls, 16, 6)),
+        ('Downloader workers=32 per-host=16', lambda: run_downloader(urls, 32, 16)),
+    ]
+    base = None
+    print(f"\n{'配置':<36} {'耗时(s)':>9} {'req/s':>8} {'加速比':>8} {'顺序':>6}")
+    for label, run in configs:
+        started = time.perf_counter()
+        sizes = run()
+        elapsed = time.perf_counter() - started
+        base = base or elapsed
+        # 结果必须与请求顺序一一对应
+        ordered = '✓' if sizes == expected else '✗'
+        print(f"{label:<36} {elapsed:>9.2f} {len(urls) / elapsed:>8.1f} {base / elapsed:>7.1f}x {ordered:>6}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
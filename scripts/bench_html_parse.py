@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+HTML 解析后端压测
+对 frontend/mirrors/*/index.html 和 data/original_pages/*/original.html，
+比较各后端的解析与序列化耗时（每个文件取 --repeat 次中的最小值）:
+    bs4 + html.parser   原脚本的做法
+    bs4 + lxml          html_doc.parse() 在有 lxml 时的做法
+    lxml.html           不经过 BeautifulSoup 的原生 lxml（仅作参考）
+    selectolax          html_doc.iter_links() 在有 selectolax 时的做法
+并对比 fetch_full_articles.update_mirror_html 的旧流程（正文解析→序列化→再解析）与
+解析一次、直接移动节点的新流程。
+
+用法:
+    python3 scripts/bench_html_parse.py
+    python3 scripts/bench_html_parse.py --repeat 10
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from crawl_manifest import PROJECT_ROOT
+from html_doc import (HAS_LXML, HTMLParser, available_builders, default_builder, parse, parse_fragment,
+                      replace_children)
+
+PATTERNS = [
+    'frontend/mirrors/*/index.html',
+    'data/original_pages/*/original.html',
+    'frontend/data/original_pages/*/original.html',
+]
+
+
+def bs4_backend(builder):
+    return (lambda html: BeautifulSoup(html, builder)), str
+
+
+def lxml_backend():
+    import lxml.html
+    return lxml.html.document_fromstring, (lambda doc: lxml.html.tostring(doc, encoding='unicode'))
+
+
+def selectolax_backend():
+    return HTMLParser, (lambda doc: doc.html)
+
+
+def backends():
+    result = [(f'bs4 + {builder}', *bs4_backend(builder)) for builder in reversed(available_builders())]
+    if HAS_LXML:
+        result.append(('lxml.html', *lxml_backend()))
+    if HTMLParser is not None:
+        result.append(('selectolax', *selectolax_backend()))
+    return result
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    value = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = func()
+        best = min(best, time.perf_counter() - started)
+    return best, value
+
+
+def old_update(page_html, content_html):
+    """旧流程: 正文解析后序列化成字符串，更新页面时再解析一次"""
+    processed = str(BeautifulSoup(content_html, 'html.parser'))
+    soup = BeautifulSoup(page_html, 'html.parser')
+    body = soup.find(id='content') or soup.find(class_='article-body')
+    body.clear()
+    for child in list(BeautifulSoup(processed, 'html.parser').children):
+        body.append(child)
+    return str(soup)
+
+
+def new_update(page_html, content_html):
+    """新流程: 正文解析一次，节点直接移入页面"""
+    nodes = parse_fragment(content_html)
+    soup = parse(page_html)
+    body = soup.find(id='content') or soup.find(class_='article-body')
+    replace_children(body, nodes)
+    return str(soup)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML 解析后端压测')
+    parser.add_argument('--repeat', type=int, default=5, help='每个文件重复次数（取最小值）')
+    args = parser.parse_args()
+
+    files = []
+    for pattern in PATTERNS:
+        files += sorted(glob.glob(os.path.join(PROJECT_ROOT, pattern)))
+    pages = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((os.path.relpath(path, PROJECT_ROOT), f.read()))
+    total_kb = sum(len(html.encode('utf-8')) for _, html in pages) / 1024
+
+    print("=" * 72)
+    print(f"{len(pages)} 个页面，共 {total_kb:.0f}KB，每个文件重复 {args.repeat} 次取最小值")
+    print("=" * 72)
+
+    base = None
+    print(f"\n{'后端':<20} {'解析(ms)':>10} {'序列化(ms)':>11} {'合计(ms)':>10} {'MB/s':>8} {'加速比':>8}")
+    for label, parse_func, serialize in backends():
+        parse_total = serialize_total = 0.0
+        for _, html in pages:
+            elapsed, doc = best_time(lambda: parse_func(html), args.repeat)
+            parse_total += elapsed
+            elapsed, _ = best_time(lambda: serialize(doc), args.repeat)
+            serialize_total += elapsed
+        total = parse_total + serialize_total
+        base = base or total
+        print(f"{label:<20} {parse_total * 1000:>10.1f} {serialize_total * 1000:>11.1f} {total * 1000:>10.1f} "
+              f"{total_kb / 1024 / total:>8.1f} {base / total:>7.1f}x")
+
+    # update_mirror_html: 以 mirrors 页面自己的正文作为新内容
+    mirrors = []
+    for path, html in pages:
+        if path.startswith('frontend/mirrors'):
+            body = BeautifulSoup(html, 'html.parser').find(class_='article-body')
+            if body is not None:
+                mirrors.append((html, body.decode_contents()))
+    if mirrors:
+        print(f"\nupdate_mirror_html（{len(mirrors)} 个 mirrors 页面）")
+        old = sum(best_time(lambda: old_update(page, content), args.repeat)[0] for page, content in mirrors)
+        new = sum(best_time(lambda: new_update(page, content), args.repeat)[0] for page, content in mirrors)
+        print(f"  旧流程（html.parser，正文解析两次）: {old * 1000:8.1f}ms")
+        print(f"  新流程（{default_builder()}，正文解析一次）: "
+              f"{new * 1000:8.1f}ms  {old / new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+HTTPS 服务器页面加载压测
+模拟浏览器加载一个 mirrors 页面及其引用的全部本地资源（6 个并发连接），
+对比旧行为（HTTP/1.0 短连接 + 无会话复用）与 keep-alive + TLS 会话复用的
+握手次数和页面加载时间。
+
+用法:
+    python3 scripts/bench_https.py
+    python3 scripts/bench_https.py --page /frontend/mirrors/01/index.html --runs 5 --ecdsa
+"""
+
+import argparse
+import http.client
+import os
+import queue
+import re
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urljoin, urlparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_SCRIPT = os.path.join(PROJECT_ROOT, 'scripts', 'https_server.py')
+
+DEFAULT_PAGE = '/frontend/mirrors/08/index.html'
+# 浏览器对同一主机的并发连接数
+BROWSER_CONNECTIONS = 6
+
+CONFIGS = [
+    ('旧行为 (HTTP/1.0, 无复用)', ['--http10', '--no-tls-resumption']),
+    ('keep-alive + 会话复用', []),
+]
+
+RESOURCE_PATTERN = re.compile(r'(?:src|href)="([^"#]+)"')
+
+
+class BrowserClient:
+    """一个连接槽位：服务器允许时复用连接，重连时带上共享的 TLS 会话"""
+
+    def __init__(self, host, port, context, sessions):
+        self.host = host
+        self.port = port
+        self.context = context
+        self.sessions = sessions
+        self.conn = None
+        self.tls = None
+        self.handshakes = 0
+        self.resumed = 0
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=30)
+        self.tls = self.context.wrap_socket(sock, server_hostname=self.host,
+                                            session=self.sessions.get('session'))
+        self.handshakes += 1
+        if self.tls.session_reused:
+            self.resumed += 1
+        self.conn = http.client.HTTPSConnection(self.host, self.port, context=self.context)
+        self.conn.sock = self.tls
+
+    def get(self, path):
+        if self.conn is None:
+            self._connect()
+        self.conn.request('GET', path)
+        resp = self.conn.getresponse()
+        # TLS 1.3 的 session ticket 在握手后才到达，读到响应头时已可用
+        if self.tls.session is not None:
+            self.sessions['session'] = self.tls.session
+        body = resp.read()
+        if resp.will_close or self.conn.sock is None:
+            self.close()
+        return resp.status, len(body)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+        self.tls = None
+
+
+def page_resources(page_path):
+    """从本地文件解析页面引用的同源资源路径"""
+    local_file = os.path.join(PROJECT_ROOT, page_path.lstrip('/'))
+    with open(local_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+    paths = []
+    for ref in RESOURCE_PATTERN.findall(html):
+        if ref.startswith(('http:', 'https:', '//', 'data:', 'javascript:', 'mailto:')):
+            continue
+        path = urlparse(urljoin(page_path, ref.replace('&amp;', '&'))).path
+        if path not in paths and os.path.isfile(os.path.join(PROJECT_ROOT, path.lstrip('/'))):
+            paths.append(path)
+    return paths
+
+
+def load_page(host, port, page_path, resources):
+    """加载一次页面：先取 HTML，再用 6 个连接并发取资源"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    sessions = {}
+    clients = [BrowserClient(host, port, context, sessions) for _ in range(BROWSER_CONNECTIONS)]
+
+    started = time.perf_counter()
+    clients[0].get(page_path)
+
+    todo = queue.Queue()
+    for path in resources:
+        todo.put(path)
+
+    def worker(client):
+        while True:
+            try:
+                path = todo.get_nowait()
+            except queue.Empty:
+                return
+            client.get(path)
+
+    threads = [threading.Thread(target=worker, args=(c,)) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    for c in clients:
+        c.close()
+    return {
+        'time': elapsed,
+        'handshakes': sum(c.handshakes for c in clients),
+        'resumed': sum(c.resumed for c in clients),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTPS 页面加载压测')
+    parser.add_argument('--page', default=DEFAULT_PAGE, help='要加载的页面路径')
+    parser.add_argument('--runs', type=int, default=3, help='每种配置加载次数（取中位数）')
+    parser.add_argument('--ecdsa', action='store_true', help='服务器使用 ECDSA 证书')
+    args = parser.parse_args()
+
+    resources = page_resources(args.page)
+    print("=" * 60)
+    print(f"页面: {args.page}（{len(resources)} 个本地资源，{BROWSER_CONNECTIONS} 个并发连接）")
+    print("=" * 60)
+
+    rows = []
+    for label, server_args in CONFIGS:
+        port = free_port()
+        cmd = [sys.executable, SERVER_SCRIPT, '--port', str(port)] + server_args
+        if args.ecdsa:
+            cmd.append('--ecdsa')
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_for_port(port):
+                raise RuntimeError(f"服务器启动失败: {' '.join(cmd)}")
+            results = [load_page('127.0.0.1', port, args.page, resources) for _ in range(args.runs)]
+        finally:
+            proc.terminate()
+            proc.wait()
+        rows.append((label, results))
+
+    print(f"\n{'配置':<28} {'握手':>6} {'复用':>6} {'加载中位数(ms)':>16} {'最快(ms)':>10}")
+    for label, results in rows:
+        handshakes = statistics.median(r['handshakes'] for r in results)
+        resumed = statistics.median(r['resumed'] for r in results)
+        times = [r['time'] * 1000 for r in results]
+        print(f"{label:<28} {handshakes:>6.0f} {resumed:>6.0f} {statistics.median(times):>16.1f} {min(times):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+server.py 压测脚本
+在 1/16/64 个并发客户端下测量每秒请求数和 p50/p99 延迟
+
+用法:
+    python3 scripts/bench_server.py                         # 依次压测所有并发模式
+    python3 scripts/bench_server.py --modes threaded asyncio --duration 10
+    python3 scripts/bench_server.py --url http://192.168.5.33:8080   # 压测已运行的服务器
+    python3 scripts/bench_server.py --workers 1 2 4 8 --static     # prefork 扩展性（吞吐 vs worker 数）
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_SCRIPT = os.path.join(PROJECT_ROOT, 'server.py')
+
+# 混合负载：小文件 + 封面 + 大 GIF
+DEFAULT_PATHS = [
+    '/index.html',
+    '/css/style.css',
+    '/js/articles-data.js',
+    '/covers/cover_01.jpg',
+    '/mirrors/10/images/0a572f520ce4.gif',
+]
+# 小静态资源负载，用于测 worker 扩展性（瓶颈在 Python 处理请求而非带宽）
+STATIC_PATHS = [
+    '/index.html',
+    '/css/style.css',
+    '/css/spatial.css',
+    '/js/articles-data.js',
+    '/js/main.js',
+    '/covers/cover_02.jpg',
+]
+
+def percentile(values, p):
+    """简单的最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[k]
+
+def fetch(host, port, path):
+    """发起一次 GET 请求并读完响应体，返回字节数"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        conn.request('GET', path)
+        resp = conn.getresponse()
+        body = resp.read()
+        return resp.status, len(body)
+    finally:
+        conn.close()
+
+def collect(host, port, paths, concurrency, duration):
+    """在给定并发数下持续压测 duration 秒，返回 (延迟列表, 字节数, 错误数, 耗时)"""
+    latencies = []
+    errors = [0]
+    total_bytes = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        local_lat = []
+        local_bytes = 0
+        local_err = 0
+        i = offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                status, size = fetch(host, port, path)
+                if status != 200:
+                    local_err += 1
+                local_bytes += size
+            except (OSError, http.client.HTTPException):
+                local_err += 1
+                continue
+            local_lat.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_lat)
+            total_bytes[0] += local_bytes
+            errors[0] += local_err
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return latencies, total_bytes[0], errors[0], elapsed
+
+def _collect_task(task):
+    return collect(*task)
+
+def run_level(host, port, paths, concurrency, duration, client_procs=1):
+    """压测一个并发级别；client_procs > 1 时把客户端线程分散到多个进程，避免压测端受 GIL 限制"""
+    procs = max(1, min(client_procs, concurrency))
+    if procs == 1:
+        latencies, nbytes, nerrors, elapsed = collect(host, port, paths, concurrency, duration)
+    else:
+        shares = [concurrency // procs + (1 if i < concurrency % procs else 0) for i in range(procs)]
+        tasks = [(host, port, paths, share, duration) for share in shares]
+        with multiprocessing.Pool(procs) as pool:
+            parts = pool.map(_collect_task, tasks)
+        latencies = [lat for part in parts for lat in part[0]]
+        nbytes = sum(part[1] for part in parts)
+        nerrors = sum(part[2] for part in parts)
+        elapsed = max(part[3] for part in parts)
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': nerrors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'mbps': nbytes / elapsed / 1e6 if elapsed else 0.0,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+    }
+
+def wait_for_port(host, port, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(mode, port, extra_args):
+    cmd = [sys.executable, SERVER_SCRIPT, '--mode', mode, '--port', str(port)] + extra_args
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_port('127.0.0.1', port):
+        proc.kill()
+        raise RuntimeError(f"服务器启动失败: {' '.join(cmd)}")
+    return proc
+
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"{'并发':>6} {'请求数':>8} {'错误':>6} {'req/s':>10} {'MB/s':>8} {'p50(ms)':>9} {'p99(ms)':>9}")
+    for r in results:
+        print(f"{r['concurrency']:>6} {r['requests']:>8} {r['errors']:>6} {r['rps']:>10.1f} "
+              f"{r['mbps']:>8.1f} {r['p50']:>9.1f} {r['p99']:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='server.py 压测')
+    parser.add_argument('--modes', nargs='+', default=['single', 'threaded', 'asyncio'],
+                        help='要压测的并发模式')
+    parser.add_argument('--levels', nargs='+', type=int, default=[1, 16, 64],
+                        help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=5.0, help='每个并发级别的持续秒数')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS, help='请求的路径列表')
+    parser.add_argument('--static', action='store_true', help='只请求小静态资源（扩展性测试）')
+    parser.add_argument('--workers', nargs='+', type=int, default=[1],
+                        help='server.py 的 prefork worker 数，给多个值时输出吞吐 vs worker 数')
+    parser.add_argument('--client-procs', type=int, default=os.cpu_count(),
+                        help='压测客户端进程数（默认 CPU 核数）')
+    parser.add_argument('--url', help='压测已运行的服务器（不再自动启动 server.py）')
+    parser.add_argument('--server-args', nargs=argparse.REMAINDER, default=[],
+                        help='透传给 server.py 的额外参数')
+    args = parser.parse_args()
+    if args.static:
+        args.paths = STATIC_PATHS
+
+    print("=" * 60)
+    print("server.py 压测")
+    print(f"路径: {', '.join(args.paths)}")
+    print("=" * 60)
+
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+        results = [run_level(host, port, args.paths, c, args.duration, args.client_procs)
+                   for c in args.levels]
+        print_table(args.url, results)
+        return
+
+    scaling = []
+    for mode in args.modes:
+        for workers in args.workers:
+            port = free_port()
+            proc = start_server(mode, port, ['--workers', str(workers)] + args.server_args)
+            try:
+                results = [run_level('127.0.0.1', port, args.paths, c, args.duration, args.client_procs)
+                           for c in args.levels]
+            finally:
+                proc.send_signal(signal.SIGINT)
+                proc.wait()
+            print_table(f"模式: {mode}, worker: {workers}", results)
+            scaling.append((mode, workers, max(r['rps'] for r in results)))
+
+    if len(args.workers) > 1:
+        print(f"\n吞吐 vs worker 数（各并发级别中的最高 req/s）")
+        print(f"{'模式':<10} {'worker':>7} {'req/s':>10} {'加速比':>8}")
+        base = {}
+        for mode, workers, rps in scaling:
+            base.setdefault(mode, rps)
+            print(f"{mode:<10} {workers:>7} {rps:>10.1f} {rps / base[mode]:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+按内容寻址的资源存储（SHA-256），跨文章去重
+- 每份内容在 .cache/blobs/<前两位>/<sha256> 只存一份，各文章目录下的路径是指向它的硬链接；
+  同一个站点 JS、同一张封面出现在多篇文章里时磁盘上只占一份空间，路径和引用都不变
+- Downloader 下载完成后把文件收入存储（--no-dedupe 关闭）；抓取清单记录过某个 URL 的内容哈希时，
+  新文章目录里的同一 URL 直接从存储链接出来再发条件请求，304 时不再重复下载
+- 只收录不会被原地改写的媒体资源（图片、字体、音视频、3D 模型）；HTML/JSON 会被 update_*.py 等脚本
+  用 open('w') 原地改写，CSS/JS 会被手工或 minify 之类的脚本原地编辑，硬链接会把修改带到所有副本
+  （连同存储里按旧哈希命名的 blob），因此都不收录；早先迁移时链接进存储的 CSS/JS 由 --migrate 改回独立副本
+- adopt/materialise/gc 使用 blob 前校验其 SHA-256，内容与文件名不符（经某个链接被原地改写过）的 blob
+  从存储中删除，不再分发给其他路径
+- 收录的资源只经由临时文件 + os.replace 更新（Downloader 的 write_atomic 与 .part 续传、materialise），
+  替换的是目录项: 该路径与 blob 的链接安全断开，其他副本和 blob 不受影响。blob 不改成只读——
+  权限属于 inode，chmod 会让所有链接到它的文章文件一起变成只读
+- 不支持硬链接的文件系统（或跨设备）时退回普通复制，只是不节省空间
+- url_filename(): 各脚本共用的本地文件名规则（URL 的 md5 前 12 位 + 扩展名），不同 URL 不会撞名
+
+用法:
+    python3 scripts/blob_store.py                    # 报告 frontend/ 中的重复内容与可节省的空间
+    python3 scripts/blob_store.py --migrate          # 一次性迁移: 重复文件改为硬链接（CSS/JS 改回独立副本）
+    python3 scripts/blob_store.py --root data --migrate
+    python3 scripts/blob_store.py --gc               # 删除没有任何文件再引用或校验不符的 blob
+"""
+
+import argparse
+import errno
+import hashlib
+import os
+import shutil
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from crawl_manifest import PROJECT_ROOT
+
+DEFAULT_STORE = os.path.join(PROJECT_ROOT, '.cache', 'blobs')
+FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'frontend')
+CHUNK_SIZE = 1024 * 1024
+
+# 只收录这些类型；HTML/JSON、CSS/JS、*_bak 备份、.gz/.br 旁路文件都会被原地改写或重新生成
+ASSET_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg', '.ico', '.bmp',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.mp4', '.webm', '.mp3', '.m4a', '.ogg', '.wav',
+    '.ply', '.splat', '.ksplat', '.spz', '.glb', '.bin',
+}
+
+
+def url_filename(url, default_ext='.jpg'):
+    """URL 对应的本地文件名: md5 前 12 位 + 原扩展名（没有时用 default_ext）"""
+    ext = os.path.splitext(urlparse(url).path)[1] or default_ext
+    return hashlib.md5(url.encode()).hexdigest()[:12] + ext
+
+
+def is_asset(path):
+    return os.path.splitext(os.fspath(path))[1].lower() in ASSET_EXTENSIONS
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _copy_replace(src, dst):
+    """原子地把 dst 替换为 src 的独立副本（src 与 dst 可以是同一路径: 断开硬链接）"""
+    tmp = f'{dst}.tmp{os.getpid()}.{threading.get_ident()}'
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _link_replace(src, dst):
+    """原子地把 dst 替换为 src 的硬链接"""
+    tmp = f'{dst}.link{os.getpid()}.{threading.get_ident()}'
+    os.link(src, tmp)
+    try:
+        os.replace(tmp, dst)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+class BlobStore:
+    """.cache/blobs 下的内容寻址存储；stats 记录本次运行的收录情况"""
+
+    def __init__(self, root=DEFAULT_STORE):
+        self.root = root
+        self._lock = threading.Lock()
+        self.stats = {'stored': 0, 'linked': 0, 'copied': 0, 'saved_bytes': 0}
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def has(self, digest):
+        return bool(digest) and os.path.exists(self.blob_path(digest))
+
+    def _intact(self, digest):
+        """blob 的内容仍与文件名中的哈希一致；不一致（被原地改写过）时把它移出存储，返回 False"""
+        blob = self.blob_path(digest)
+        try:
+            if sha256_file(blob) == digest:
+                return True
+            os.remove(blob)
+        except FileNotFoundError:
+            pass
+        return False
+
+    def _count(self, key, saved=0):
+        with self._lock:
+            self.stats[key] += 1
+            self.stats['saved_bytes'] += saved
+
+    def adopt(self, path, digest=None):
+        """把 path 收入存储，返回 'stored'（新内容）/'linked'（已有同样内容，path 改为硬链接）/
+        'same'（已是同一个文件）/'copied'（无法硬链接，仅存了一份副本）/'skipped'（不收录的类型）
+        """
+        path = os.fspath(path)
+        if not is_asset(path):
+            return 'skipped'
+        st = os.stat(path)
+        digest = digest or sha256_file(path)
+        blob = self.blob_path(digest)
+        try:
+            blob_st = os.stat(blob)
+        except FileNotFoundError:
+            return self._store(path, blob)
+        if (blob_st.st_dev, blob_st.st_ino) == (st.st_dev, st.st_ino):
+            return 'same'
+        if blob_st.st_size != st.st_size or not self._intact(digest):
+            # 存储里的文件被改动过（本不应发生），以新文件为准
+            if os.path.exists(blob):
+                os.remove(blob)
+            return self._store(path, blob)
+        try:
+            _link_replace(blob, path)
+        except OSError:
+            self._count('copied')
+            return 'copied'
+        self._count('linked', st.st_size)
+        return 'linked'
+
+    def _store(self, path, blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(path, blob)
+            result = 'stored'
+        except FileExistsError:
+            # 另一个线程同时收录了同样的内容
+            return self.adopt(path)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            _copy_replace(path, blob)
+            result = 'copied'
+        self._count(result)
+        return result
+
+    def materialise(self, digest, path):
+        """把 blob 放到 path（硬链接，不行时复制）；存储中没有、校验不符或 path 不是收录的类型时返回 False"""
+        path = os.fspath(path)
+        blob = self.blob_path(digest)
+        if not is_asset(path) or not self._intact(digest):
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        try:
+            st = os.stat(path)
+            blob_st = os.stat(blob)
+            if (st.st_dev, st.st_ino) == (blob_st.st_dev, blob_st.st_ino):
+                return True
+        except FileNotFoundError:
+            pass
+        try:
+            _link_replace(blob, path)
+        except OSError:
+            _copy_replace(blob, path)
+        return True
+
+    def iter_blobs(self):
+        if not os.path.isdir(self.root):
+            return
+        for shard in sorted(os.listdir(self.root)):
+            shard_dir = os.path.join(self.root, shard)
+            if os.path.isdir(shard_dir):
+                for name in sorted(os.listdir(shard_dir)):
+                    yield os.path.join(shard_dir, name)
+
+    def gc(self):
+        """删除链接数为 1（只剩存储自己引用）的 blob 与内容校验不符的 blob，返回 (个数, 字节数, 其中校验不符的个数)
+
+        复制出来的 blob（不支持硬链接时）无法判断是否仍被引用，同样会被删除，下次下载时重新收录。
+        校验不符的 blob 只是移出存储，仍链接着它的文件保留各自的内容。
+        """
+        removed = size = corrupt = 0
+        for blob in self.iter_blobs():
+            st = os.stat(blob)
+            if st.st_nlink <= 1:
+                os.remove(blob)
+            elif not self._intact(os.path.basename(blob)):
+                corrupt += 1
+            else:
+                continue
+            removed += 1
+            size += st.st_size
+        return removed, size, corrupt
+
+
+def scan(root):
+    """按内容分组 root 下的资源文件: {sha256: [路径, ...]}；已是硬链接的同一文件只读一次"""
+    groups = defaultdict(list)
+    by_inode = {}
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            if not is_asset(path) or os.path.islink(path):
+                continue
+            st = os.stat(path)
+            inode = (st.st_dev, st.st_ino)
+            if inode not in by_inode:
+                by_inode[inode] = sha256_file(path)
+            groups[by_inode[inode]].append(path)
+    return groups
+
+
+def dedupe_report(groups, root, top=15):
+    """打印重复内容统计，返回可节省的字节数"""
+    total_files = sum(len(paths) for paths in groups.values())
+    total_bytes = saved = linked = 0
+    duplicates = []
+    for digest, paths in groups.items():
+        inodes = {(os.stat(p).st_dev, os.stat(p).st_ino) for p in paths}
+        size = os.path.getsize(paths[0])
+        total_bytes += size * len(paths)
+        linked += size * (len(paths) - len(inodes))
+        if len(inodes) > 1:
+            saved += size * (len(inodes) - 1)
+            duplicates.append((size * (len(inodes) - 1), size, digest, paths))
+
+    print(f"资源文件 {total_files} 个，{total_bytes / 1024 / 1024:.1f}MB，不同内容 {len(groups)} 份")
+    print(f"已是硬链接共享: {linked / 1024 / 1024:.1f}MB")
+    print(f"重复内容 {len(duplicates)} 组，迁移可节省 {saved / 1024 / 1024:.1f}MB")
+    duplicates.sort(key=lambda d: (-d[0], d[2]))
+    for waste, size, digest, paths in duplicates[:top]:
+        print(f"\n  {digest[:12]}  {size / 1024:.0f}KB × {len(paths)}（浪费 {waste / 1024:.0f}KB）")
+        for path in paths[:5]:
+            print(f"    {os.path.relpath(path, root)}")
+        if len(paths) > 5:
+            print(f"    ... 另外 {len(paths) - 5} 个")
+    if top and len(duplicates) > top:
+        print(f"\n  ... 另外 {len(duplicates) - top} 组")
+    return saved
+
+
+def migrate(groups, store):
+    """一次性迁移: 所有资源收入存储，重复内容改为硬链接"""
+    for digest, paths in groups.items():
+        for path in paths:
+            store.adopt(path, digest)
+    return store.stats
+
+
+def detach(root, store):
+    """不再收录的文件（CSS/JS 等）若仍是存储中某个 blob 的硬链接，改回独立副本，返回处理的个数"""
+    blob_inodes = set()
+    for blob in store.iter_blobs():
+        st = os.stat(blob)
+        blob_inodes.add((st.st_dev, st.st_ino))
+    detached = 0
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            if is_asset(path) or os.path.islink(path):
+                continue
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) in blob_inodes:
+                _copy_replace(path, path)
+                detached += 1
+    return detached
+
+
+def main():
+    parser = argparse.ArgumentParser(description='内容寻址资源存储: 重复报告、迁移与清理')
+    parser.add_argument('--root', default=FRONTEND_DIR, help='扫描的目录（默认 frontend/）')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='存储目录（默认 .cache/blobs）')
+    parser.add_argument('--migrate', action='store_true', help='把重复文件改为指向存储的硬链接')
+    parser.add_argument('--gc', action='store_true', help='删除不再被任何文件引用的 blob')
+    parser.add_argument('--top', type=int, default=15, help='报告中列出的重复组数（默认 15）')
+    args = parser.parse_args()
+
+    store = BlobStore(args.store)
+    if args.gc:
+        removed, size, corrupt = store.gc()
+        print(f"🧹 删除 {removed} 个未引用或校验不符（{corrupt} 个）的 blob，释放 {size / 1024 / 1024:.1f}MB")
+        return
+
+    print("=" * 60)
+    print(f"扫描: {args.root}")
+    print("=" * 60)
+    groups = scan(args.root)
+    dedupe_report(groups, args.root, args.top)
+
+    if args.migrate:
+        detached = detach(args.root, store)
+        if detached:
+            print(f"\n✓ {detached} 个不再收录的文件（CSS/JS 等）已改回独立副本，不再与存储共享")
+        stats = migrate(groups, store)
+        print(f"\n✓ 迁移完成: 新收录 {stats['stored']}，改为硬链接 {stats['linked']}，"
+              f"无法链接（已复制）{stats['copied']}，节省 {stats['saved_bytes'] / 1024 / 1024:.1f}MB")
+        print(f"  存储: {args.store}")
+    else:
+        print("\n（仅报告，加 --migrate 执行迁移）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Playwright 浏览器池
+- 整个批次只启动一个 headless Chromium（首次渲染时启动），每个页面使用独立的 BrowserContext
+- 信号量限制同时渲染的页面数
+- 就绪判定基于事件: 目标选择器出现 + 网络静默 quiet_ms，整体受 budget 限制，不再固定 sleep
+- 每个页面记录各阶段耗时（排队、建上下文、导航、选择器、网络静默、提取）
+- 请求路由: 中止统计/广告（含第一方域名下的埋点脚本）、字体、音视频和第三方脚本（正文 DOM 用不到）；
+  正文渲染依赖的第三方脚本（sk-utils、微信 JS-SDK）放行
+- 页面已加载的图片直接从响应中捕获（RenderResult.images），不必再用 requests 重新下载
+
+用法:
+    async with BrowserPool(concurrency=4, user_agent=UA) as pool:
+        result = await pool.render(url, extract, selector='.article-body')
+        print(result.timings)
+"""
+
+import asyncio
+import time
+from urllib.parse import urldefrag, urlparse
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+DEFAULT_CONCURRENCY = 4
+# 单个页面从导航开始到就绪的总预算（秒）
+DEFAULT_BUDGET = 20.0
+# 没有进行中的请求持续这么久视为网络静默（毫秒）
+DEFAULT_QUIET_MS = 500
+NAVIGATION_TIMEOUT = 30000
+
+TIMING_PHASES = ('queue', 'context', 'goto', 'selector', 'network_idle', 'extract', 'total')
+
+# 渲染正文 DOM 不需要的资源类型
+BLOCKED_RESOURCE_TYPES = {'font', 'media', 'websocket', 'eventsource', 'manifest', 'texttrack'}
+# 统计、广告、埋点（主机名等于或是其子域名）
+TRACKER_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'hm.baidu.com', 'cnzz.com', 'umeng.com', 'growingio.com', 'sensorsdata.cn',
+    'pingjs.qq.com', 'tajs.qq.com', 'zhugeio.com', 'mmstat.com',
+)
+# 第一方域名下的埋点脚本（主机名, 路径前缀）: 与正文脚本同站，按主机名无法区分
+TRACKER_PATHS = (
+    ('gh5tc-cos.mp.sztv.com.cn', '/ysz_web_static/plugins/zmy-data-collection-'),
+    ('gh5tc-cos.mp.sztv.com.cn', '/ysz_web_static/plugins/clklog/'),
+    ('console.mp.sztv.com.cn', '/cmsback/front/web.dataCollect.js'),
+)
+# 正文渲染依赖的第三方脚本（主机名, 路径前缀）: 页面内联脚本调用它们的全局对象，中止后脚本报错、.article-body 不填充
+ALLOWED_SCRIPTS = (
+    ('szmg-sk-fe-1253925857.cos.ap-guangzhou.myqcloud.com', '/sk-utils@'),
+    ('res.wx.qq.com', '/open/js/jweixin-'),
+)
+# 二级域名是这些时，站点按三段计算（www.sztv.com.cn → sztv.com.cn）
+SECOND_LEVEL_DOMAINS = {'com', 'net', 'org', 'gov', 'edu', 'co'}
+
+
+def site_of(host):
+    """粗略的可注册域名，用于判断第一方/第三方"""
+    labels = (host or '').lower().split('.')
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_DOMAINS:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def _host_matches(host, suffix):
+    """host 等于 suffix 或是其子域名"""
+    return host == suffix or host.endswith('.' + suffix)
+
+
+def _path_matches(host, path, rules):
+    return any(_host_matches(host, h) and path.startswith(prefix) for h, prefix in rules)
+
+
+def block_reason(resource_type, url, first_party):
+    """请求应被中止时返回原因（resource_type / tracker / third-party），否则返回 None"""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return resource_type
+    parts = urlparse(url)
+    host = parts.hostname or ''
+    if any(_host_matches(host, t) for t in TRACKER_HOSTS) or _path_matches(host, parts.path, TRACKER_PATHS):
+        return 'tracker'
+    if (resource_type == 'script' and site_of(host) != first_party
+            and not _path_matches(host, parts.path, ALLOWED_SCRIPTS)):
+        return 'third-party'
+    return None
+
+
+class RenderResult:
+    """一次渲染的结果：extract 的返回值、各阶段耗时（秒）、错误信息"""
+
+    def __init__(self, url):
+        self.url = url
+        self.value = None
+        self.error = None
+        self.timings = {}
+        # 就绪判定是否在预算内完成（False 表示超时后按当前 DOM 提取）
+        self.ready = False
+        # 网络统计: 完成的请求数、被中止的请求数（按原因）、传输字节数（头 + 体）
+        self.requests = 0
+        self.blocked = {}
+        self.bytes = 0
+        # 捕获的图片 {绝对 URL（去掉 #片段）: 字节}
+        self.images = {}
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class NetworkTracker:
+    """统计页面上进行中的请求数（供网络静默判定）和传输字节数，可选捕获图片响应"""
+
+    def __init__(self, page, result, capture_images=False):
+        self.result = result
+        self.capture_images = capture_images
+        self.inflight = 0
+        self.last_change = time.monotonic()
+        self._tasks = set()
+        page.on('request', self._started)
+        page.on('requestfinished', self._finished)
+        page.on('requestfailed', self._failed)
+        if capture_images:
+            page.on('response', self._response)
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _started(self, request):
+        self.inflight += 1
+        self.last_change = time.monotonic()
+
+    def _finished(self, request):
+        self.inflight = max(0, self.inflight - 1)
+        self.last_change = time.monotonic()
+        self.result.requests += 1
+        self._spawn(self._count_bytes(request))
+
+    def _failed(self, request):
+        self.inflight = max(0, self.inflight - 1)
+        self.last_change = time.monotonic()
+
+    async def _count_bytes(self, request):
+        sizes = await request.sizes()
+        self.result.bytes += sizes['responseHeadersSize'] + sizes['responseBodySize']
+
+    def _response(self, response):
+        if response.request.resource_type == 'image' and response.status == 200:
+            self._spawn(self._capture(response))
+
+    async def _capture(self, response):
+        self.result.images[urldefrag(response.url)[0]] = await response.body()
+
+    async def wait_quiet(self, quiet_ms, deadline):
+        """等到没有进行中的请求且持续 quiet_ms，超过 deadline 返回 False"""
+        quiet = quiet_ms / 1000
+        while time.monotonic() < deadline:
+            if self.inflight == 0 and time.monotonic() - self.last_change >= quiet:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def drain(self):
+        """等待字节统计与图片捕获完成（关闭上下文前调用）"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+class BrowserPool:
+    """一个浏览器、多个并发页面"""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, user_agent=None, headless=True,
+                 budget=DEFAULT_BUDGET, quiet_ms=DEFAULT_QUIET_MS, block=True, capture_images=False):
+        self.concurrency = max(1, concurrency)
+        self.block = block
+        self.capture_images = capture_images
+        self.user_agent = user_agent
+        self.headless = headless
+        self.budget = budget
+        self.quiet_ms = quiet_ms
+        self._playwright = None
+        self._browser = None
+        self._slots = None
+        self._launch_lock = None
+        self.launch_time = 0.0
+
+    async def __aenter__(self):
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._launch_lock = asyncio.Lock()
+        return self
+
+    async def _ensure_browser(self):
+        """首次渲染时才启动浏览器（增量运行全部跳过时不必启动）"""
+        async with self._launch_lock:
+            if self._browser is None:
+                started = time.perf_counter()
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                self.launch_time = time.perf_counter() - started
+
+    async def __aexit__(self, *exc):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    async def new_context(self, result):
+        """创建页面上下文；block=True 时按 block_reason 中止无关请求并计入 result.blocked"""
+        context = await self._browser.new_context(user_agent=self.user_agent)
+        if self.block:
+            first_party = site_of(urlparse(result.url).hostname)
+
+            async def handle_route(route):
+                request = route.request
+                reason = block_reason(request.resource_type, request.url, first_party)
+                if reason:
+                    result.blocked[reason] = result.blocked.get(reason, 0) + 1
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await context.route('**/*', handle_route)
+        return context
+
+    async def render(self, url, extract, selector=None):
+        """渲染 url，就绪后调用 await extract(page) 提取内容
+
+        selector 为空时只等网络静默。超出预算不视为错误，按当前 DOM 提取并把 ready 置为 False。
+        """
+        result = RenderResult(url)
+        timings = result.timings
+        started = time.perf_counter()
+
+        def mark(phase, since):
+            now = time.perf_counter()
+            timings[phase] = now - since
+            return now
+
+        async with self._slots:
+            t = mark('queue', started)
+            context = tracker = None
+            try:
+                # 启动失败（缺少 Chromium、沙箱受限等）也记入 result.error，和导航失败一样由调用方按页处理
+                await self._ensure_browser()
+                context = await self.new_context(result)
+                page = await context.new_page()
+                tracker = NetworkTracker(page, result, self.capture_images)
+                t = mark('context', t)
+                deadline = time.monotonic() + self.budget
+
+                await page.goto(url, wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT)
+                t = mark('goto', t)
+
+                selector_ok = True
+                if selector:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    try:
+                        await page.wait_for_selector(selector, state='attached', timeout=remaining * 1000)
+                    except PlaywrightTimeoutError:
+                        selector_ok = False
+                t = mark('selector', t)
+
+                idle_ok = await tracker.wait_quiet(self.quiet_ms, deadline)
+                t = mark('network_idle', t)
+                result.ready = selector_ok and idle_ok
+
+                result.value = await extract(page)
+                mark('extract', t)
+            except Exception as e:
+                result.error = str(e)
+            finally:
+                if tracker is not None:
+                    await tracker.drain()
+                if context is not None:
+                    await context.close()
+        timings['total'] = time.perf_counter() - started
+        return result
+
+
+def print_timings(rows, launch_time=None):
+    """打印每个页面的阶段耗时与网络统计，rows 为 [(标签, RenderResult), ...]"""
+    if launch_time is not None:
+        print(f"\n浏览器启动: {launch_time * 1000:.0f}ms（整个批次仅一次）")
+    header = ''.join(f"{phase:>13}" for phase in TIMING_PHASES)
+    print(f"\n{'页面':<8}{header} {'请求':>6} {'中止':>6} {'传输KB':>9} {'捕获图片':>8}  就绪")
+    for label, result in rows:
+        cells = ''.join(f"{result.timings.get(phase, 0) * 1000:>11.0f}ms" for phase in TIMING_PHASES)
+        status = '✓' if result.ready else ('✗' if not result.ok else '超时')
+        print(f"{label:<8}{cells} {result.requests:>6} {sum(result.blocked.values()):>6} "
+              f"{result.bytes / 1024:>9.0f} {len(result.images):>8}  {status}")
+
+    blocked = {}
+    for _, result in rows:
+        for reason, n in result.blocked.items():
+            blocked[reason] = blocked.get(reason, 0) + n
+    total_time = sum(r.timings.get('total', 0) for _, r in rows)
+    total_bytes = sum(r.bytes for _, r in rows)
+    print(f"\n合计: 渲染 {total_time:.1f}s（各页面之和），传输 {total_bytes / 1024 / 1024:.2f}MB，"
+          f"捕获图片 {sum(len(r.images) for _, r in rows)} 张")
+    if blocked:
+        print("中止: " + ', '.join(f"{reason} {n}" for reason, n in sorted(blocked.items())))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+预压缩构建脚本
+为 frontend/ 下可压缩的静态资源生成 .gz 和 .br 旁路文件，
+开发服务器根据 Accept-Encoding 直接发送旁路文件，不再在请求时压缩。
+
+用法:
+    python3 scripts/build_compressed.py            # 增量构建（跳过已是最新的旁路文件）
+    python3 scripts/build_compressed.py --force    # 全部重新压缩
+    python3 scripts/build_compressed.py --clean    # 删除所有旁路文件
+"""
+
+import argparse
+import gzip
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # brotli 是可选依赖，缺失时只生成 .gz
+    brotli = None
+
+PROJECT_ROOT = Path(__file__).parent.parent
+FRONTEND_DIR = PROJECT_ROOT / 'frontend'
+
+# 可压缩的扩展名（图片/视频/PLY 已是压缩格式或体积过大，不处理）
+COMPRESSIBLE_EXTENSIONS = {
+    '.html', '.htm', '.css', '.js', '.mjs', '.json', '.svg', '.txt', '.xml', '.map', '.ico',
+}
+# 太小的文件压缩收益抵不过 Content-Encoding 的开销
+MIN_SIZE = 1024
+
+ENCODINGS = ('br', 'gzip')
+SIDECAR_SUFFIX = {'gzip': '.gz', 'br': '.br'}
+
+
+def is_compressible(path):
+    return os.path.splitext(str(path))[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def sidecar_path(path, encoding):
+    return f"{path}{SIDECAR_SUFFIX[encoding]}"
+
+
+def available_encodings():
+    return [e for e in ENCODINGS if e != 'br' or brotli is not None]
+
+
+def is_up_to_date(source, sidecar):
+    """旁路文件存在且不早于源文件"""
+    try:
+        return os.stat(sidecar).st_mtime_ns >= os.stat(source).st_mtime_ns
+    except OSError:
+        return False
+
+
+def compress_bytes(data, encoding):
+    if encoding == 'gzip':
+        # mtime=0 让输出可复现
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def compress_file(task):
+    """压缩单个文件，返回 (path, 原始大小, {encoding: 压缩后大小或 None})
+
+    None 表示已是最新而跳过；压缩后不比原文件小时删除旁路文件。
+    """
+    path, encodings, force = task
+    size = os.path.getsize(path)
+    results = {}
+    data = None
+    for encoding in encodings:
+        target = sidecar_path(path, encoding)
+        if not force and is_up_to_date(path, target):
+            results[encoding] = None
+            continue
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        compressed = compress_bytes(data, encoding)
+        if len(compressed) >= size:
+            if os.path.exists(target):
+                os.remove(target)
+            results[encoding] = size
+            continue
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, target)
+        results[encoding] = len(compressed)
+    return path, size, results
+
+
+def find_sources(root):
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if is_compressible(path) and os.path.getsize(path) >= MIN_SIZE:
+                yield path
+
+
+def clean(root):
+    removed = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if any(name.endswith(s) for s in SIDECAR_SUFFIX.values()):
+                source = os.path.join(dirpath, name).rsplit('.', 1)[0]
+                if is_compressible(source):
+                    os.remove(os.path.join(dirpath, name))
+                    removed += 1
+    print(f"已删除 {removed} 个旁路文件")
+
+
+def print_report(stats, encodings):
+    """按目录打印节省的字节数"""
+    header = f"{'目录':<40} {'文件':>5} {'原始':>12}"
+    for encoding in encodings:
+        header += f" {encoding:>12} {'节省':>7}"
+    print(header)
+    totals = defaultdict(int)
+    for directory in sorted(stats):
+        row = stats[directory]
+        line = f"{directory:<40} {row['files']:>5} {row['original']:>12,}"
+        for encoding in encodings:
+            saved = 1 - row[encoding] / row['original'] if row['original'] else 0
+            line += f" {row[encoding]:>12,} {saved:>6.1%}"
+        print(line)
+        for key, value in row.items():
+            totals[key] += value
+    print("-" * len(header))
+    line = f"{'总计':<40} {totals['files']:>5} {totals['original']:>12,}"
+    for encoding in encodings:
+        saved = 1 - totals[encoding] / totals['original'] if totals['original'] else 0
+        line += f" {totals[encoding]:>12,} {saved:>6.1%}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='为 frontend/ 生成 .gz/.br 预压缩文件')
+    parser.add_argument('--root', default=str(FRONTEND_DIR), help='静态资源根目录')
+    parser.add_argument('--force', action='store_true', help='忽略 mtime，全部重新压缩')
+    parser.add_argument('--clean', action='store_true', help='删除所有旁路文件')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='并行进程数（默认全部核心）')
+    args = parser.parse_args()
+
+    if args.clean:
+        clean(args.root)
+        return
+
+    encodings = available_encodings()
+    if brotli is None:
+        print("⚠️ 未安装 brotli（pip install brotli），只生成 .gz")
+
+    sources = sorted(find_sources(args.root))
+    print(f"📦 {len(sources)} 个可压缩文件，{args.jobs} 个进程，编码: {', '.join(encodings)}\n")
+
+    stats = defaultdict(lambda: defaultdict(int))
+    compressed = skipped = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        tasks = [(path, encodings, args.force) for path in sources]
+        for path, size, results in pool.map(compress_file, tasks, chunksize=8):
+            directory = os.path.relpath(os.path.dirname(path), args.root)
+            row = stats[directory]
+            row['files'] += 1
+            row['original'] += size
+            for encoding in encodings:
+                new_size = results[encoding]
+                if new_size is None:
+                    skipped += 1
+                    target = sidecar_path(path, encoding)
+                    new_size = os.path.getsize(target) if os.path.exists(target) else size
+                else:
+                    compressed += 1
+                row[encoding] += new_size
+
+    print_report(stats, encodings)
+    print(f"\n✨ 完成! 压缩 {compressed} 个，跳过 {skipped} 个（已是最新）")
+
+
+if __name__ == '__main__':
+    main()
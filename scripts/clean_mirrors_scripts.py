@@ -4,6 +4,10 @@
 import re
 from pathlib import Path
 
+from html_transforms import discover_pages, register
+from snapshot_store import SnapshotStore
+
+@register('clean_scripts')
 def clean_html(html_content):
     """删除外部脚本标签但保留HTML结构"""
     # 删除带src的script标签
@@ -15,31 +19,32 @@ def clean_html(html_content):
     
     return html_content
 
+def clean_file(html_file, snapshot=None):
+    """清理单个文件，snapshot 不为空时记录清理前后的内容"""
+    html_file = Path(html_file)
+    
+    # 读取原始内容
+    content = html_file.read_text(encoding='utf-8')
+    
+    # 清理脚本
+    cleaned = clean_html(content)
+    
+    # 记录快照并保存
+    if snapshot is not None and cleaned != content:
+        snapshot.record(html_file, content, cleaned)
+    html_file.write_text(cleaned, encoding='utf-8')
+    return cleaned != content
+
 def main():
-    mirrors_dir = Path('/Volumes/Prism/sharp2/mirrors')
+    # frontend/mirrors 下含 3D 模型容器的页面
+    with SnapshotStore().begin('clean_mirrors_scripts') as run:
+        for html_file in map(Path, discover_pages()):
+            print(f"📝 处理: {html_file}")
+            clean_file(html_file, run)
+            
+            print(f"✅ 完成: {html_file.parent.name}")
     
-    for folder in ['01', '02', '04', '07', '08']:
-        html_file = mirrors_dir / folder / 'index.html'
-        
-        if not html_file.exists():
-            print(f"⚠️  文件不存在: {html_file}")
-            continue
-        
-        print(f"📝 处理: {html_file}")
-        
-        # 读取原始内容
-        content = html_file.read_text(encoding='utf-8')
-        
-        # 清理脚本
-        cleaned = clean_html(content)
-        
-        # 备份并保存
-        backup = html_file.with_suffix('.html.cleaned_bak')
-        html_file.rename(backup)
-        html_file.write_text(cleaned, encoding='utf-8')
-        
-        print(f"✅ 完成: {folder}")
-        print(f"   备份: {backup.name}")
+    print(f"   快照: {run.id}（python3 scripts/snapshot_store.py rollback {run.id}）")
     
     print("\n🎉 所有文件处理完成！")
 
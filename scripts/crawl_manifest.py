@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+爬虫的增量抓取清单（SQLite）
+- resources: 每个 URL 最近一次成功抓取的 ETag、Last-Modified、SHA-256、大小、本地路径
+  Downloader 据此发送 If-None-Match / If-Modified-Since，304 时直接沿用本地文件
+- outputs: 脚本自己的产出指纹（如某篇文章渲染结果的哈希），用于判断是否需要重写
+
+默认位置 .cache/crawl-manifest.sqlite，删除即可强制全量重新抓取。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MANIFEST = os.path.join(PROJECT_ROOT, '.cache', 'crawl-manifest.sqlite')
+# 需要落盘但不属于任何产出目录的原始页面（供条件请求复用）
+PAGE_CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'pages')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    url TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    sha256 TEXT,
+    size INTEGER,
+    fetched_at REAL,
+    checked_at REAL
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    updated_at REAL
+);
+"""
+
+
+def fingerprint(*parts):
+    """任意字符串/字节的组合哈希"""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        h.update(part)
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def page_cache_path(url):
+    """原始页面在 .cache/pages 下的保存路径"""
+    return os.path.join(PAGE_CACHE_DIR, hashlib.md5(url.encode()).hexdigest() + '.html')
+
+
+class CrawlManifest:
+    """线程安全的抓取清单"""
+
+    def __init__(self, path=DEFAULT_MANIFEST, refresh=False):
+        self.path = path
+        # refresh=True 时不发条件请求（全部重新下载），但仍记录新的抓取结果
+        self.refresh = refresh
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.stats = {'not_modified': 0, 'fetched': 0}
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT path, etag, last_modified, sha256, size FROM resources WHERE url = ?',
+                (url,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('path', 'etag', 'last_modified', 'sha256', 'size'), row))
+
+    def conditional_headers(self, url, path):
+        """本地文件仍与记录一致时返回条件请求头，否则返回 {}"""
+        if self.refresh:
+            return {}
+        entry = self.get(url)
+        if entry is None or entry['path'] != os.path.abspath(path):
+            return {}
+        try:
+            if os.path.getsize(path) != entry['size']:
+                return {}
+        except OSError:
+            return {}
+        return self.validator_headers(entry)
+
+    @staticmethod
+    def validator_headers(entry):
+        """清单条目对应的 If-None-Match / If-Modified-Since"""
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, path, etag, last_modified, sha256, size):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, os.path.abspath(path), etag, last_modified, sha256, size, now, now))
+            self._conn.commit()
+            self.stats['fetched'] += 1
+
+    def touch(self, url):
+        """304: 记录最近一次确认未变化的时间"""
+        with self._lock:
+            self._conn.execute('UPDATE resources SET checked_at = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+            self.stats['not_modified'] += 1
+
+    def output_fingerprint(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT fingerprint FROM outputs WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_output_fingerprint(self, key, value):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO outputs VALUES (?, ?, ?)', (key, value, time.time()))
+            self._conn.commit()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+一条命令完成 scraper.py + save_original_pages.py 的工作，每篇文章只抓取一次
+
+    fetch     获取文章页面到 .cache/pages（条件请求，未变化时 304）
+    extract   解析一次页面，提取元数据（标题、时间、正文摘要、图片）
+    localise  并发下载页面引用的 CSS / JS / 图片到 data/original_pages/<编号>/，改写引用
+    write     写出 original.html 与本地化的 index.html（页面与资源都未变化时跳过）
+
+各阶段通过有界队列流式衔接、同时运行（stage_pipeline.py），运行中打印各阶段吞吐与队列深度。
+每篇文章完成一个阶段就写检查点（.cache/crawl-pipeline.jsonl）；中断后重新运行会从上次完成的
+阶段继续，全部成功后删除检查点。最后写出 data/articles/articles.json，其中 local_images 指向
+快照中的图片（data/original_pages/<编号>/img/...），不再单独下载一份到 data/images。
+
+渲染正文并回填 mirrors 仍由 fetch_full_articles.py 负责（需要浏览器）；
+它与本命令共用页面缓存和抓取清单，原文未变化时不会重新下载。
+
+用法:
+    python3 scripts/crawl_pipeline.py
+    python3 scripts/crawl_pipeline.py --limit 100 --fetchers 8 --localisers 4
+    python3 scripts/crawl_pipeline.py --restart      # 忽略检查点，从头开始
+"""
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+from urllib.parse import urljoin
+
+from article_catalog import add_catalog_args, load_catalog
+from crawl_manifest import PROJECT_ROOT, page_cache_path
+from downloader import add_download_args, from_args, write_atomic
+from html_doc import parse
+from save_original_pages import HEADERS, apply_resources, collect_resources, download_resources
+from scraper import extract_metadata
+from stage_pipeline import DEFAULT_PROGRESS_INTERVAL, Checkpoint, Item, Pipeline, Stage
+
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+DEFAULT_CHECKPOINT = os.path.join(PROJECT_ROOT, '.cache', 'crawl-pipeline.jsonl')
+
+
+class CrawlStages:
+    """各阶段的处理函数；item.data 保存可写入检查点的结果，item.cache['soup'] 为解析后的页面"""
+
+    def __init__(self, dl, data_dir=DATA_DIR):
+        self.dl = dl
+        self.pages_dir = Path(data_dir) / 'original_pages'
+
+    def soup(self, item):
+        """解析后的页面；从检查点恢复时缓存中没有，重新从页面缓存解析"""
+        soup = item.cache.get('soup')
+        if soup is None:
+            with open(item.data['page'], 'r', encoding='utf-8', errors='replace') as f:
+                soup = item.cache['soup'] = parse(f.read())
+        return soup
+
+    def fetch(self, item):
+        url = item.data['article']['url']
+        page = self.dl.fetch(url, page_cache_path(url))
+        if not page.ok:
+            raise IOError(page.error)
+        item.data['page'] = page.path
+        item.data['changed'] = not page.not_modified
+
+    def extract(self, item):
+        item.data['metadata'] = extract_metadata(item.data['article'], self.soup(item))
+
+    def localise(self, item):
+        article = item.data['article']
+        article_dir = self.pages_dir / article['article_id']
+        soup = self.soup(item)
+        # collect_resources 按引用的 URL 命名，恢复时重新解析得到的本地路径与上次相同
+        resources = collect_resources(soup)
+        results = download_resources(self.dl, article['url'], article_dir, resources)
+        counts = apply_resources(resources, results)
+        if any(r.ok and not r.not_modified for r in results):
+            item.data['changed'] = True
+
+        # 元数据中的图片指向快照里的同一份文件
+        local_paths = {}
+        for (kind, _, _, ref, local), result in zip(resources, results):
+            if kind == 'img' and result.ok:
+                local_paths.setdefault(urljoin(article['url'], ref),
+                                       f"original_pages/{article['article_id']}/{local}")
+        metadata = item.data['metadata']
+        metadata['local_images'] = [{"original_url": url, "local_path": local_paths[url]}
+                                    for url in metadata['images'] if url in local_paths]
+        item.data['resources'] = counts
+
+    def write(self, item):
+        article_dir = self.pages_dir / item.data['article']['article_id']
+        index = article_dir / 'index.html'
+        original = article_dir / 'original.html'
+        if not item.data['changed'] and index.exists() and original.exists():
+            item.data['written'] = False
+            return
+        if 'soup' not in item.cache:
+            # 从检查点恢复到 write: 重新解析的页面还是远程引用，先重做本地化（资源均为条件请求）
+            self.localise(item)
+        article_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(item.data['page'], original)
+        write_atomic(index, str(self.soup(item)).encode('utf-8'))
+        item.data['written'] = True
+
+
+def write_articles_json(items, data_dir=DATA_DIR):
+    """按编号写出 articles.json（内容未变化时不重写），返回是否写入"""
+    articles = sorted((item.data['metadata'] for item in items), key=lambda a: a['id'])
+    output_file = os.path.join(data_dir, 'articles', 'articles.json')
+    output = json.dumps(articles, ensure_ascii=False, indent=2)
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            if f.read() == output:
+                return False
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    write_atomic(output_file, output.encode('utf-8'))
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抓取、解析、本地化、写出文章的流式流水线')
+    parser.add_argument('--fetchers', type=int, default=4, help='fetch 阶段线程数（默认 4）')
+    parser.add_argument('--extractors', type=int, default=1, help='extract 阶段线程数（默认 1）')
+    parser.add_argument('--localisers', type=int, default=2, help='localise 阶段线程数（默认 2）')
+    parser.add_argument('--queue-size', type=int, default=8, help='每个阶段的输入队列容量（默认 8）')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                        help='检查点文件（默认 .cache/crawl-pipeline.jsonl）')
+    parser.add_argument('--restart', action='store_true', help='删除检查点，从头开始')
+    parser.add_argument('--progress', type=float, default=DEFAULT_PROGRESS_INTERVAL,
+                        help=f'进度打印间隔秒数（默认 {DEFAULT_PROGRESS_INTERVAL:g}，0 关闭）')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='输出目录（默认 data/）')
+    add_catalog_args(parser)
+    add_download_args(parser)
+    args = parser.parse_args()
+
+    articles = load_catalog(args.catalog, args.limit)
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.remove()
+
+    print("=" * 60)
+    print(f"流水线: {len(articles)} 篇文章 → {args.data_dir}")
+    print("=" * 60)
+
+    with from_args(args, headers=HEADERS) as dl:
+        stages = CrawlStages(dl, args.data_dir)
+        pipeline = Pipeline([
+            Stage('fetch', stages.fetch, args.fetchers, args.queue_size),
+            Stage('extract', stages.extract, args.extractors, args.queue_size),
+            Stage('localise', stages.localise, args.localisers, args.queue_size),
+            Stage('write', stages.write, 1, args.queue_size),
+        ], checkpoint=checkpoint, progress=args.progress)
+        items = (Item(article['article_id'], {'article': article}) for article in articles)
+        try:
+            completed, failed, skipped = pipeline.run(items)
+        except KeyboardInterrupt:
+            print(f"\n⚠️ 已中断，重新运行将从检查点继续: {args.checkpoint}")
+            raise SystemExit(130)
+
+    pipeline.print_summary()
+    for item in failed:
+        print(f"  ✗ {item.key}: {item.error}")
+    written = sum(1 for item in completed if item.data.get('written'))
+    print(f"✓ 快照写出 {written} 篇，未变化 {len(completed) - written} 篇")
+    print(f"✓ 增量: {dl.manifest.stats['not_modified']} 个未变化，{dl.manifest.stats['fetched']} 个已下载")
+
+    if write_articles_json(completed + skipped, args.data_dir):
+        print(f"✓ 数据已保存到: {os.path.join(args.data_dir, 'articles', 'articles.json')}")
+    else:
+        print("✓ articles.json 未变化")
+    if failed:
+        print(f"⚠️ {len(failed)} 篇失败，检查点保留，重新运行只处理未完成的文章")
+    else:
+        checkpoint.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+爬虫调度策略（供 downloader.py 使用）
+- 优先级: 文章 HTML 先于图片/CSS/JS 等次要资源
+- 每个主机一个令牌桶限制请求速率，一个信号量限制并发
+- 429/5xx、连接错误、响应被截断时有限次重试，指数退避 + 全抖动，遵守 Retry-After
+- 每个主机一个熔断器: 连续失败达到阈值后暂停请求该主机，冷却后放行一个试探请求
+"""
+
+import email.utils
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from throttle import TokenBucket
+
+PRIORITY_PAGE = 0
+PRIORITY_ASSET = 10
+
+# 可重试的 HTTP 状态码
+RETRY_STATUSES = {429} | set(range(500, 600))
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# 每个主机的默认速率（请求/秒）与突发量
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 5
+
+# 连续失败 BREAKER_THRESHOLD 次后熔断 BREAKER_COOLDOWN 秒
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+PAGE_EXTENSIONS = {'', '.html', '.htm', '.shtml', '.php', '.asp', '.aspx', '.jsp'}
+
+
+def guess_priority(url):
+    """按扩展名猜测优先级：页面优先，其余为次要资源"""
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return PRIORITY_PAGE if ext in PAGE_EXTENSIONS else PRIORITY_ASSET
+
+
+def parse_retry_after(value):
+    """Retry-After 可以是秒数或 HTTP 日期，返回秒数（无法解析时返回 None）"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt, retry_after=None, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """第 attempt 次重试（从 0 开始）前的等待秒数：全抖动指数退避，不短于 Retry-After"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
+
+
+class CircuitBreaker:
+    """单个主机的熔断器（closed → open → half-open → closed）"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """是否允许发出请求；half-open 时只放行一个试探请求"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def failure(self):
+        """记录一次失败，返回 True 表示本次失败导致熔断"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                tripped = self.opened_at is None
+                self.opened_at = time.monotonic()
+                return tripped
+            return False
+
+
+class HostPolicy:
+    """按主机管理并发名额、速率令牌桶与熔断器"""
+
+    def __init__(self, per_host, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.per_host = per_host
+        self.rate = rate
+        self.burst = burst
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _get(self, host):
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None:
+                entry = self._hosts[host] = (
+                    threading.BoundedSemaphore(self.per_host),
+                    TokenBucket(self.rate, self.burst) if self.rate > 0 else None,
+                    CircuitBreaker(self.threshold, self.cooldown),
+                )
+            return entry
+
+    def slot(self, url):
+        return self._get(urlparse(url).netloc)[0]
+
+    def wait_turn(self, url):
+        """按主机速率等待发出下一个请求"""
+        bucket = self._get(urlparse(url).netloc)[1]
+        if bucket is not None:
+            bucket.consume(1)
+
+    def breaker(self, url):
+        return self._get(urlparse(url).netloc)[2]
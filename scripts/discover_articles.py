@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+文章发现爬虫 - 遍历 sztv.com.cn 频道列表页，生成 article_catalog.py 的文章目录
+
+- 从各频道首页（/ysz/zx/tj/ 等）出发，沿分页链接广度优先遍历列表页
+- 前沿队列 + 规范化 URL 的已见集合去重（O(1) 查重），文章按数字编号去重
+- 列表页通过 Downloader.submit 并发获取，解析与下载重叠进行，不按层等待
+- 截止条件: --max-depth 限制分页深度；--since 之前的文章不收录，
+  整页都早于 --since 时不再跟进该页的分页链接（列表按时间倒序）
+- 与已有目录合并: 已有文章保持编号与 mirrors 映射，新文章顺延编号
+
+用法:
+    python3 scripts/discover_articles.py --since 2025-12-01
+    python3 scripts/discover_articles.py --base http://127.0.0.1:8000 --catalog /tmp/catalog.json
+"""
+
+import argparse
+import collections
+import posixpath
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+from article_catalog import (add_catalog_args, load_catalog, make_entry, merge_catalog,
+                             parse_article_url, save_catalog)
+from crawl_scheduler import PRIORITY_PAGE
+from downloader import add_download_args, from_args
+from html_doc import iter_links
+
+DEFAULT_BASE = 'https://www.sztv.com.cn'
+CHANNELS = ('tj', 'zw', 'rd', 'zbsz')
+CHANNEL_ROOT = '/ysz/zx/{}/'
+DEFAULT_MAX_DEPTH = 50
+
+# 同时在途的列表页请求数（超过下载器并发数没有意义）
+MAX_INFLIGHT = 16
+
+# 与页面内容无关的查询参数
+TRACKING_PARAMS = {'spm', 'from', 'source', 'share', 'isappinstalled', 'timestamp'}
+INDEX_NAMES = {'index.shtml', 'index.html', 'index.htm'}
+LISTING_EXTENSIONS = {'', '.shtml', '.html', '.htm'}
+
+DATE_RE = re.compile(r'(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+
+
+def normalize_url(url, base=None):
+    """规范化 URL 用于去重: 解析相对路径与 ..，小写协议和主机，去掉默认端口、片段、
+    跟踪参数和目录首页文件名，查询参数排序"""
+    if base:
+        url = urljoin(base, url)
+    parts = urlparse(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{parts.port}'
+    path = parts.path or '/'
+    trailing = path.endswith('/')
+    path = posixpath.normpath(path)
+    if path == '.':
+        path = '/'
+    if posixpath.basename(path) in INDEX_NAMES:
+        path, trailing = posixpath.dirname(path), True
+    if trailing and not path.endswith('/'):
+        path += '/'
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in TRACKING_PARAMS and not k.lower().startswith('utm_'))
+    return urlunparse((scheme, host, path, '', urlencode(query), ''))
+
+
+def format_date(match):
+    """DATE_RE 的匹配结果转为 YYYY-MM-DD，没有匹配时返回空串"""
+    if match is None:
+        return ''
+    y, m, d = (int(g) for g in match.groups())
+    return f'{y:04d}-{m:02d}-{d:02d}'
+
+
+class Frontier:
+    """待抓取的列表页队列；seen 记录所有入过队的规范化 URL，保证每页只抓一次"""
+
+    def __init__(self):
+        self.queue = collections.deque()
+        self.seen = set()
+
+    def push(self, url, depth):
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self.queue.append((url, depth))
+        return True
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+
+class ArticleDiscovery:
+    """从频道首页出发发现文章，结果为 article_catalog.make_entry 格式的记录"""
+
+    def __init__(self, dl, base=DEFAULT_BASE, channels=CHANNELS, since=None,
+                 max_depth=DEFAULT_MAX_DEPTH, max_articles=None, inflight=MAX_INFLIGHT):
+        self.dl = dl
+        self.base = base
+        self.host = urlparse(normalize_url(base)).netloc
+        self.prefixes = tuple(CHANNEL_ROOT.format(c) for c in channels)
+        self.since = since or ''
+        self.max_depth = max_depth
+        self.max_articles = max_articles
+        self.inflight = max(1, inflight)
+        self.frontier = Frontier()
+        # article_id -> 记录；同一篇文章出现在多个列表页时只保留第一次
+        self.articles = {}
+        self.stats = {'pages': 0, 'failed': 0, 'links': 0, 'duplicates': 0, 'too_old': 0,
+                      'cutoff_pages': 0}
+
+    def is_listing(self, url):
+        """本站、所选频道下、不是文章页的 HTML 页面视为列表页"""
+        parts = urlparse(url)
+        if parts.netloc != self.host or not parts.path.startswith(self.prefixes):
+            return False
+        if parse_article_url(url):
+            return False
+        return posixpath.splitext(parts.path)[1].lower() in LISTING_EXTENSIONS
+
+    def parse_listing(self, html, page_url):
+        """返回 (文章 [(url, 标题, 日期)], 列表页链接 [url])"""
+        articles = []
+        listings = []
+        # 日期在链接所在列表项的文本里（链接本身或其上两层父元素）
+        for href, text, title, date in iter_links(html, context_re=DATE_RE):
+            href = href.strip()
+            if not href or href.startswith(('javascript:', 'mailto:', '#')):
+                continue
+            url = normalize_url(href, page_url)
+            self.stats['links'] += 1
+            if parse_article_url(url):
+                if urlparse(url).netloc == self.host:
+                    articles.append((url, title or text, format_date(date)))
+            elif self.is_listing(url):
+                listings.append(url)
+        return articles, listings
+
+    def handle_page(self, url, depth, html):
+        articles, listings = self.parse_listing(html, url)
+        dates = [date for _, _, date in articles if date]
+        for article_url, title, date in articles:
+            if self.since and date and date < self.since:
+                self.stats['too_old'] += 1
+                continue
+            _, article_id = parse_article_url(article_url)
+            if article_id in self.articles:
+                self.stats['duplicates'] += 1
+                continue
+            self.articles[article_id] = make_entry(article_url, title, date)
+
+        # 列表按时间倒序: 整页都早于截止日期时，后面的分页只会更早
+        if self.since and dates and max(dates) < self.since:
+            self.stats['cutoff_pages'] += 1
+            return
+        if depth >= self.max_depth:
+            return
+        for listing in listings:
+            self.frontier.push(listing, depth + 1)
+
+    def done(self):
+        return self.max_articles is not None and len(self.articles) >= self.max_articles
+
+    def run(self):
+        """抓取直到前沿队列为空（或达到 max_articles），返回发现的文章记录"""
+        for prefix in self.prefixes:
+            self.frontier.push(normalize_url(prefix, self.base), 0)
+
+        pending = {}
+        while (self.frontier or pending) and not self.done():
+            while self.frontier and len(pending) < self.inflight:
+                url, depth = self.frontier.pop()
+                pending[self.dl.submit(url, priority=PRIORITY_PAGE)] = (url, depth)
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                url, depth = pending.pop(future)
+                result = future.result()
+                if not result.ok:
+                    self.stats['failed'] += 1
+                    print(f"  ✗ {url}: {result.error}")
+                    continue
+                self.stats['pages'] += 1
+                self.handle_page(url, depth, result.text())
+        for future in pending:
+            future.cancel()
+
+        articles = list(self.articles.values())
+        if self.max_articles is not None:
+            articles = articles[:self.max_articles]
+        return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='遍历频道列表页，生成文章目录')
+    parser.add_argument('--base', default=DEFAULT_BASE, help=f'站点地址（默认 {DEFAULT_BASE}）')
+    parser.add_argument('--channels', nargs='+', default=list(CHANNELS),
+                        help=f'要遍历的频道（默认 {" ".join(CHANNELS)}）')
+    parser.add_argument('--since', default=None, help='只收录该日期（YYYY-MM-DD）及之后的文章')
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH,
+                        help=f'从频道首页起最多跟进的分页层数（默认 {DEFAULT_MAX_DEPTH}）')
+    parser.add_argument('--max-articles', type=int, default=None, help='发现这么多篇后停止')
+    parser.add_argument('--dry-run', action='store_true', help='只输出统计，不写目录文件')
+    add_catalog_args(parser)
+    add_download_args(parser)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print(f"开始发现文章: {args.base}（频道 {', '.join(args.channels)}）")
+    print("=" * 50)
+
+    started = time.perf_counter()
+    with from_args(args, headers=HEADERS) as dl:
+        discovery = ArticleDiscovery(dl, base=args.base, channels=args.channels, since=args.since,
+                                     max_depth=args.max_depth, max_articles=args.max_articles,
+                                     inflight=max(args.workers, 1))
+        discovered = discovery.run()
+    elapsed = time.perf_counter() - started
+
+    stats = discovery.stats
+    print(f"\n列表页 {stats['pages']} 个（失败 {stats['failed']}），链接 {stats['links']} 个，"
+          f"耗时 {elapsed:.1f}s（{stats['pages'] / max(elapsed, 1e-9):.1f} 页/s）")
+    print(f"发现文章 {len(discovered)} 篇，重复 {stats['duplicates']}，"
+          f"早于截止日期 {stats['too_old']}，截止的列表页 {stats['cutoff_pages']}")
+
+    catalog, added = merge_catalog(load_catalog(args.catalog), discovered)
+    if args.dry_run:
+        print(f"（dry-run）目录将有 {len(catalog)} 篇，新增 {added} 篇")
+        return
+    sources = [normalize_url(CHANNEL_ROOT.format(c), args.base) for c in args.channels]
+    save_catalog(catalog, args.catalog, sources)
+    print(f"✓ 目录已保存: {args.catalog}（共 {len(catalog)} 篇，新增 {added} 篇）")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,12 @@
 下载mirrors目录中文章的外链图片到本地
 """
 
-import os
+import argparse
 import re
-import requests
-import hashlib
 from pathlib import Path
-from urllib.parse import urlparse
+
+from blob_store import url_filename
+from downloader import add_download_args, from_args
 
 MIRRORS_DIR = Path(__file__).parent.parent / 'mirrors'
 
@@ -18,41 +18,8 @@ HEADERS = {
     'Referer': 'https://www.sztv.com.cn/',
 }
 
-def get_image_filename(url):
-    """从URL生成本地文件名"""
-    # 尝试从URL获取原始文件名
-    parsed = urlparse(url)
-    path = parsed.path
-    filename = os.path.basename(path)
-    
-    # 如果文件名为空或太短，使用URL的hash
-    if not filename or len(filename) < 5:
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:16]
-        ext = '.jpg'  # 默认扩展名
-        if '.png' in url.lower():
-            ext = '.png'
-        elif '.gif' in url.lower():
-            ext = '.gif'
-        elif '.webp' in url.lower():
-            ext = '.webp'
-        filename = f"img_{url_hash}{ext}"
-    
-    return filename
-
-def download_image(url, save_path):
-    """下载图片"""
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
-            return True
-    except Exception as e:
-        print(f"    下载失败: {e}")
-    return False
-
-def process_html_file(html_path):
-    """处理单个HTML文件，下载外链图片并更新引用"""
+def process_html_file(html_path, dl):
+    """处理单个HTML文件，并发下载外链图片并更新引用"""
     print(f"\n📄 处理: {html_path}")
     
     with open(html_path, 'r', encoding='utf-8') as f:
@@ -73,27 +40,44 @@ def process_html_file(html_path):
     
     download_count = 0
     parent_dir = html_path.parent
+    local_names = {}
+    pending = []
+    # 同一张图片的不同写法（a.jpg 与 a.jpg?x=1）去掉查询参数后保存到同一个文件:
+    # 每个 clean_url 只下载一次，否则两个并发任务会写同一个 .part 并 os.replace 到同一目标
+    variants = {}
     
-    for url in urls:
-        # 清理URL（移除查询参数用于文件名）
+    for url in sorted(urls):
+        # 清理URL（移除查询参数用于文件名）；按 URL 哈希命名，不同路径下的同名图片不会互相覆盖
         clean_url = url.split('?')[0]
-        filename = get_image_filename(clean_url)
+        if clean_url in variants:
+            variants[clean_url].append(url)
+            continue
+        variants[clean_url] = [url]
+        filename = url_filename(clean_url)
         save_path = parent_dir / filename
         
-        # 检查是否已下载
-        if save_path.exists() and save_path.stat().st_size > 100:
-            print(f"  ✓ 已存在: {filename}")
+        # 已下载过的文件由下载器发条件请求，未变化时服务器返回 304
+        pending.append((url, save_path))
+    
+    def report(result):
+        filename = result.path.name
+        if result.not_modified:
+            print(f"  ✓ 未变化: {filename}")
+        elif result.ok:
+            print(f"  ⬇ 下载: {filename}  ✓ 成功 ({result.size} bytes)")
         else:
-            print(f"  ⬇ 下载: {filename}")
-            if download_image(url, save_path):
+            print(f"  ⬇ 下载: {filename}  ✗ 失败: {result.error}")
+    
+    for result in dl.download_all(pending, on_result=report):
+        if result.ok:
+            if not result.not_modified:
                 download_count += 1
-                print(f"    ✓ 成功 ({save_path.stat().st_size} bytes)")
-            else:
-                print(f"    ✗ 失败")
-                continue
-        
-        # 更新HTML中的引用
-        content = content.replace(url, filename)
+            for url in variants[result.url.split('?')[0]]:
+                local_names[url] = result.path.name
+    
+    # 更新HTML中的引用；长的先换，a.jpg 不会先把 a.jpg?x=1 换成 <文件名>?x=1
+    for url in sorted(local_names, key=len, reverse=True):
+        content = content.replace(url, local_names[url])
     
     # 保存更新后的HTML
     with open(html_path, 'w', encoding='utf-8') as f:
@@ -103,19 +87,24 @@ def process_html_file(html_path):
     return download_count
 
 def main():
+    parser = argparse.ArgumentParser(description='下载 mirrors 中文章的外链图片')
+    add_download_args(parser)
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("开始下载外链图片")
     print("=" * 50)
     
     total_downloaded = 0
     
-    # 遍历所有mirrors子目录
-    for dir_path in sorted(MIRRORS_DIR.iterdir()):
-        if dir_path.is_dir() and not dir_path.name.startswith('.'):
-            html_file = dir_path / 'index.html'
-            if html_file.exists():
-                count = process_html_file(html_file)
-                total_downloaded += count
+    # 遍历所有mirrors子目录（所有文件共用一个连接池）
+    with from_args(args, headers=HEADERS) as dl:
+        for dir_path in sorted(MIRRORS_DIR.iterdir()):
+            if dir_path.is_dir() and not dir_path.name.startswith('.'):
+                html_file = dir_path / 'index.html'
+                if html_file.exists():
+                    count = process_html_file(html_file, dl)
+                    total_downloaded += count
     
     print("\n" + "=" * 50)
     print(f"完成！共下载 {total_downloaded} 张图片")
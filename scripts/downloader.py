@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+爬虫脚本共用的并发下载引擎
+- 一个 requests.Session + 连接池：同一主机的请求复用 TCP/TLS 连接
+- 线程池并发，全局并发数与单主机并发数分别可调
+- 结果按提交顺序返回，调用方不需要关心完成顺序
+- 下载到文件时流式写入 <path>.part，校验长度/校验和后 fsync + 原子 rename；
+  中断留下的 .part 在下次运行时用 Range 续传（If-Range 防止拼接到已变化的文件上）
+- 可选的 CrawlManifest: 文件下载带 If-None-Match / If-Modified-Since，304 时沿用本地文件
+- 可选的 ResponseCache（response_cache.py）: 所有请求先查磁盘上的响应缓存，--offline 时只回放缓存
+- 可选的 BlobStore（blob_store.py）: 下载完成的资源按内容收入存储，同样内容在各文章目录间共享硬链接；
+  清单中已有某 URL 的内容时，新路径先从存储链接出来再发条件请求
+- 调度（crawl_scheduler.py）: 优先级队列（页面优先）、按主机限速与熔断、带退避的重试；
+  最终失败的请求追加到重试文件，可用 `python3 scripts/downloader.py --retry` 重新下载
+
+用法:
+    python3 scripts/downloader.py --retry .cache/crawl-retry.jsonl   # 重试上次失败的下载
+
+    with Downloader(headers=HEADERS) as dl:
+        resp = dl.get(url)                                 # 单个请求（受单主机并发限制）
+        pages = dl.fetch_all(urls)                         # 并发获取，按顺序返回 DownloadResult
+        results = dl.download_all([(url, path), ...])      # 并发下载到文件
+"""
+
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from blob_store import BlobStore, DEFAULT_STORE
+from crawl_manifest import CrawlManifest, DEFAULT_MANIFEST, PROJECT_ROOT
+from crawl_scheduler import (DEFAULT_RATE, DEFAULT_RETRIES, RETRY_STATUSES,
+                             HostPolicy, backoff_delay, guess_priority, parse_retry_after)
+from response_cache import add_cache_args, cache_from_args
+
+DEFAULT_WORKERS = 16
+# 与浏览器对同一主机的并发连接数一致，避免对源站过于激进
+DEFAULT_PER_HOST = 6
+DEFAULT_TIMEOUT = 30
+# 单个响应的大小上限，超过即中止（防止误下载超大文件撑爆磁盘/内存）
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+PART_SUFFIX = '.part'
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since', 'If-Range')
+DEFAULT_RETRY_FILE = os.path.join(PROJECT_ROOT, '.cache', 'crawl-retry.jsonl')
+
+# 值得重试的网络异常；其余 RequestException（URL 无效等）直接失败
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class DownloadError(Exception):
+    """下载失败或内容不符合预期（HTTP 错误、超过大小上限、长度或校验和不符等）
+
+    retryable 表示值得重试（429/5xx、响应被截断），retry_after 为服务器要求的等待秒数。
+    """
+
+    def __init__(self, message, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def http_error(resp):
+    return DownloadError(f'HTTP {resp.status_code}', retryable=resp.status_code in RETRY_STATUSES,
+                         retry_after=parse_retry_after(resp.headers.get('Retry-After')))
+
+
+def write_atomic(path, data):
+    """写入临时文件，fsync 后原子替换 path"""
+    path = os.fspath(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.tmp{os.getpid()}'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _fsync_dir(directory)
+
+
+def _fsync_dir(directory):
+    """rename 后同步目录项，确保掉电后新文件名可见（不支持的平台忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def parse_content_range(value):
+    """解析 'bytes start-end/total'，返回 (start, total)，total 未知时为 None"""
+    match = CONTENT_RANGE_PATTERN.match(value or '')
+    if not match:
+        return None, None
+    total = match.group(3)
+    return int(match.group(1)), None if total == '*' else int(total)
+
+
+class DownloadResult:
+    """一次下载的结果；ok 为 False 时 error 说明原因"""
+
+    __slots__ = ('url', 'path', 'status', 'content', 'size', 'error', 'elapsed',
+                 'transferred', 'resumed_from', 'sha256', 'not_modified', 'attempts')
+
+    def __init__(self, url, path=None, status=None, content=None, size=0, error=None, elapsed=0.0):
+        self.url = url
+        self.path = path
+        self.status = status
+        self.content = content
+        # size 为完整内容大小，transferred 为本次实际传输的字节数（续传时更小）
+        self.size = size
+        self.error = error
+        self.elapsed = elapsed
+        self.transferred = 0
+        self.resumed_from = 0
+        self.sha256 = None
+        # 条件请求命中（304），本地文件未变化
+        self.not_modified = False
+        self.attempts = 0
+
+    @property
+    def ok(self):
+        return self.error is None and self.status in (200, 206, 304)
+
+    def text(self, encoding='utf-8'):
+        return self.content.decode(encoding, errors='replace') if self.content is not None else ''
+
+
+class Downloader:
+    """带连接池、优先级队列与按主机调度的并发下载器"""
+
+    def __init__(self, headers=None, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+                 timeout=DEFAULT_TIMEOUT, max_bytes=DEFAULT_MAX_BYTES, manifest=None,
+                 rate=DEFAULT_RATE, retries=DEFAULT_RETRIES, retry_file=None, cache=None, blobs=None):
+        self.workers = max(1, workers)
+        self.manifest = manifest
+        self.cache = cache
+        self.blobs = blobs
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.retries = max(0, retries)
+        self.retry_file = retry_file
+        self.hosts = HostPolicy(max(1, per_host), rate=rate)
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        # 连接池大小与并发数匹配，否则多出的连接用完即关，失去复用的意义
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # (优先级, 序号, 任务)；序号保证同优先级先进先出
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'failed': 0, 'bytes': 0, 'retries': 0, 'circuit_open': 0}
+        self.failures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put((float('inf'), next(self._seq), None))
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        self.session.close()
+        if self.manifest is not None:
+            self.manifest.close()
+        if self.cache is not None:
+            stats = self.cache.stats
+            if any(stats.values()):
+                print(f"响应缓存: 命中 {stats['hits']}，重新验证 {stats['revalidated']}，"
+                      f"未命中 {stats['misses']}，写入 {stats['stored']}，淘汰 {stats['evicted']}")
+            self.cache.close()
+        if self.blobs is not None:
+            stats = self.blobs.stats
+            if stats['linked']:
+                print(f"资源去重: {stats['linked']} 个文件与已有内容共享，节省 {stats['saved_bytes'] / 1024 / 1024:.1f}MB")
+        self.write_failures()
+
+    def _start_workers(self):
+        if not self._threads:
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f'download-{i}', daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _worker(self):
+        while True:
+            _, _, task = self._queue.get()
+            if task is None:
+                return
+            future, args = task
+            if future.set_running_or_notify_cancel():
+                # fetch 只把网络与文件错误记入结果；其他异常（抓取清单的 sqlite3.Error 等）交给 Future，
+                # 否则工作线程退出、Future 永远不会完成，download_all 一直阻塞
+                try:
+                    future.set_result(self.fetch(*args))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def submit(self, url, path=None, headers=None, priority=None):
+        """加入下载队列，返回 Future；priority 越小越先执行，默认按 URL 猜测（页面优先）"""
+        self._start_workers()
+        if priority is None:
+            priority = guess_priority(url)
+        future = Future()
+        self._queue.put((priority, next(self._seq), (future, (url, path, headers))))
+        return future
+
+    def get(self, url, headers=None, **kwargs):
+        """发起 GET 请求（占用一个单主机并发名额并遵守速率限制），返回 requests.Response"""
+        kwargs.setdefault('timeout', self.timeout)
+        with self.hosts.slot(url):
+            self.hosts.wait_turn(url)
+            return self.session.get(url, headers=headers, **kwargs)
+
+    @contextlib.contextmanager
+    def stream(self, url, headers=None):
+        """流式 GET：读完响应体之前一直占用单主机并发名额
+
+        启用响应缓存时先查缓存: 未过期（或 offline）直接返回缓存，不占名额也不限速；
+        过期的带校验器重新验证，304 时返回缓存；新的 200 响应边读边写入缓存。
+        """
+        cache = self.cache
+        request_headers = CaseInsensitiveDict(self.session.headers)
+        request_headers.update(headers or {})
+        entry = cache.lookup('GET', url, request_headers) if cache is not None else None
+        if entry is not None and (cache.offline or entry.fresh()):
+            cache.count('hits')
+            yield entry.response(request_headers)
+            return
+        if cache is not None and cache.offline:
+            raise DownloadError(f'离线模式: 响应缓存中没有 {url}')
+
+        send = dict(headers or {})
+        # 请求自带条件头（抓取清单）时按请求本身的条件发送
+        revalidate = entry is not None and not any(h in request_headers for h in CONDITIONAL_HEADERS)
+        if revalidate:
+            send.update(entry.validators())
+        with self.hosts.slot(url):
+            self.hosts.wait_turn(url)
+            with self.session.get(url, headers=send, stream=True, timeout=self.timeout) as resp:
+                if revalidate and resp.status_code == 304:
+                    cache.count('revalidated')
+                    cache.touch(entry.key, renew=True)
+                    yield entry.response(request_headers)
+                    return
+                tee = cache.tee(resp, 'GET', url, request_headers) if cache is not None else None
+                if tee is None:
+                    yield resp
+                    return
+                cache.count('misses')
+                try:
+                    yield tee
+                finally:
+                    tee.close()
+
+    def fetch(self, url, path=None, headers=None, sha256=None):
+        """获取 url；给出 path 时流式写入文件（结果中不保留 content），sha256 为期望的十六进制摘要
+
+        可重试的失败按退避重试至多 retries 次；主机熔断期间直接失败。
+        """
+        started = time.perf_counter()
+        breaker = self.hosts.breaker(url)
+        result = DownloadResult(url, path)
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                # 重试途中熔断时保留上一次的错误
+                note = f'主机熔断中（连续失败 {breaker.failures} 次）'
+                result.error = f'{result.error}；{note}' if result.error else note
+                with self._stats_lock:
+                    self.stats['circuit_open'] += 1
+                break
+            result = DownloadResult(url, path)
+            result.attempts = attempt + 1
+            retryable, retry_after = self._attempt(url, path, headers, sha256, result)
+            if result.error is None:
+                breaker.success()
+                break
+            if not retryable:
+                # 4xx、校验失败等说明主机本身可用；没有收到响应（URL 无效等本地错误）时不影响熔断器
+                if result.status is not None:
+                    breaker.success()
+                break
+            breaker.failure()
+            if attempt == self.retries:
+                break
+            with self._stats_lock:
+                self.stats['retries'] += 1
+            time.sleep(backoff_delay(attempt, retry_after))
+        result.elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += result.transferred
+            if not result.ok:
+                self.stats['failed'] += 1
+                self.failures.append({
+                    'url': url,
+                    'path': os.fspath(path) if path is not None else None,
+                    'status': result.status,
+                    'error': result.error,
+                    'attempts': result.attempts,
+                    'ts': round(time.time(), 3),
+                })
+        return result
+
+    def _attempt(self, url, path, headers, sha256, result):
+        """执行一次请求，返回 (是否值得重试, Retry-After 秒数)"""
+        try:
+            if path is None:
+                self._fetch_content(url, headers, result)
+            else:
+                self._fetch_file(url, os.fspath(path), headers, sha256, result)
+        except DownloadError as e:
+            result.error = str(e)
+            return e.retryable, e.retry_after
+        except TRANSIENT_ERRORS as e:
+            # 连接失败、超时、读到一半断开
+            result.error = str(e)
+            return True, None
+        except requests.RequestException as e:
+            # InvalidURL、MissingSchema、InvalidSchema、TooManyRedirects 等: 重试也不会成功
+            result.error = str(e)
+            return False, None
+        except OSError as e:
+            result.error = str(e)
+            return False, None
+        return False, None
+
+    def write_failures(self):
+        """把最终失败的请求追加到重试文件（JSON Lines）"""
+        if not self.retry_file or not self.failures:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.retry_file)), exist_ok=True)
+        with open(self.retry_file, 'a', encoding='utf-8') as f:
+            for entry in self.failures:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        print(f"⚠️ {len(self.failures)} 个下载失败，已记录到 {self.retry_file}")
+        self.failures = []
+
+    def _check_size(self, size):
+        if size is not None and self.max_bytes and size > self.max_bytes:
+            raise DownloadError(f'超过大小上限 {self.max_bytes} 字节（{size}）')
+
+    def _fetch_content(self, url, headers, result):
+        """读入内存（页面等小响应），同样受大小上限约束"""
+        with self.stream(url, headers) as resp:
+            result.status = resp.status_code
+            if resp.status_code != 200:
+                raise http_error(resp)
+            length = resp.headers.get('Content-Length')
+            self._check_size(int(length) if length and length.isdigit() else None)
+            chunks = []
+            size = 0
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                size += len(chunk)
+                self._check_size(size)
+                chunks.append(chunk)
+            result.content = b''.join(chunks)
+            result.size = result.transferred = size
+
+    def _fetch_file(self, url, path, headers, sha256, result):
+        """流式下载到 path.part，完成并校验后原子替换 path
+
+        中断（连接断开、超时）时保留 .part 与记录校验器的 .part.json，下次从断点续传；
+        超过大小上限或校验和不符时删除 .part。
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        part = path + PART_SUFFIX
+        meta_path = part + '.json'
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        validator = None
+        if offset:
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta.get('url') == url:
+                    validator = meta.get('validator')
+            except (OSError, ValueError):
+                pass
+            if not validator:
+                offset = 0
+
+        req_headers = dict(headers or {})
+        # 按原样保存字节: 不让服务器压缩，Content-Length 即文件大小，Range 偏移也才有意义
+        req_headers['Accept-Encoding'] = 'identity'
+        conditional = {}
+        if offset:
+            req_headers['Range'] = f'bytes={offset}-'
+            req_headers['If-Range'] = validator
+        elif self.manifest is not None:
+            conditional = self.manifest.conditional_headers(url, path)
+            if not conditional and self.blobs is not None:
+                conditional = self._conditional_from_blob(url, path)
+            req_headers.update(conditional)
+
+        with self.stream(url, req_headers) as resp:
+            result.status = resp.status_code
+            if resp.status_code == 304 and conditional:
+                entry = self.manifest.get(url)
+                self.manifest.touch(url)
+                result.not_modified = True
+                result.size = entry['size']
+                result.sha256 = entry['sha256']
+                return
+            if resp.status_code == 206 and offset:
+                start, total = parse_content_range(resp.headers.get('Content-Range'))
+                if start != offset:
+                    raise DownloadError(f'续传偏移不符: 请求 {offset}，返回 {start}')
+            elif resp.status_code == 200:
+                # 服务器忽略 Range 或文件已变化，从头下载
+                offset = 0
+                length = resp.headers.get('Content-Length')
+                total = int(length) if length and length.isdigit() else None
+            elif resp.status_code == 416:
+                # .part 与服务器文件不一致，删除后下次重新下载
+                self._discard(part, meta_path)
+                raise DownloadError('HTTP 416，已删除不完整的 .part 文件')
+            else:
+                raise http_error(resp)
+            self._check_size(total)
+
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+            validator = etag or last_modified
+            if validator and not validator.startswith('W/'):
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'url': url, 'validator': validator}, f)
+
+            hasher = hashlib.sha256()
+            if offset:
+                with open(part, 'rb') as f:
+                    for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+                        hasher.update(block)
+            written = offset
+            with open(part, 'ab' if offset else 'wb') as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    written += len(chunk)
+                    result.transferred += len(chunk)
+                    if self.max_bytes and written > self.max_bytes:
+                        f.close()
+                        self._discard(part, meta_path)
+                        self._check_size(written)
+                    f.write(chunk)
+                    hasher.update(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        result.resumed_from = offset
+        if total is not None and written != total:
+            raise DownloadError(f'长度不符: 期望 {total}，实际 {written}（保留 .part 以便续传）',
+                                retryable=True)
+        digest = hasher.hexdigest()
+        if sha256 and digest != sha256.lower():
+            self._discard(part, meta_path)
+            raise DownloadError(f'SHA-256 不符: 期望 {sha256}，实际 {digest}')
+
+        os.replace(part, path)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        _fsync_dir(os.path.dirname(os.path.abspath(path)))
+        result.size = written
+        result.sha256 = digest
+        if self.blobs is not None:
+            self.blobs.adopt(path, digest)
+        if self.manifest is not None:
+            self.manifest.record(url, path, etag, last_modified, digest, written)
+
+    def _conditional_from_blob(self, url, path):
+        """URL 在别的路径下载过且内容在存储中: 链接到 path 后按清单发条件请求"""
+        entry = self.manifest.get(url)
+        if self.manifest.refresh or entry is None or not self.blobs.has(entry['sha256']):
+            return {}
+        if not self.blobs.materialise(entry['sha256'], path):
+            return {}
+        return self.manifest.validator_headers(entry)
+
+    @staticmethod
+    def _discard(*paths):
+        for p in paths:
+            if os.path.exists(p):
+                os.remove(p)
+
+    def fetch_all(self, urls, headers=None, on_result=None, priority=None):
+        """并发获取多个 URL，按输入顺序返回 DownloadResult 列表"""
+        return self.download_all([(url, None) for url in urls], headers=headers, on_result=on_result,
+                                 priority=priority)
+
+    def download_all(self, items, headers=None, on_result=None, priority=None):
+        """并发下载 [(url, path), ...]，按输入顺序返回 DownloadResult 列表
+
+        on_result(result) 在每个结果按顺序就绪时调用，用于输出进度。
+        priority 为空时按 URL 猜测（页面优先于图片/CSS/JS）。
+        """
+        futures = [self.submit(url, path, headers, priority) for url, path in items]
+        results = []
+        for future in futures:
+            result = future.result()
+            if on_result:
+                on_result(result)
+            results.append(result)
+        return results
+
+
+def add_download_args(parser):
+    """给脚本的 argparse 加上并发参数"""
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'全局并发下载数（默认 {DEFAULT_WORKERS}）')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                        help=f'同一主机的最大并发数（默认 {DEFAULT_PER_HOST}）')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help='增量抓取清单路径（默认 .cache/crawl-manifest.sqlite）')
+    parser.add_argument('--refresh', action='store_true',
+                        help='忽略清单和响应缓存，全部重新下载（下载结果仍会写入）')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'每个主机每秒最多请求数（默认 {DEFAULT_RATE:g}，0 表示不限）')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help=f'可重试错误（429/5xx/连接错误）的最大重试次数（默认 {DEFAULT_RETRIES}）')
+    parser.add_argument('--retry-file', default=DEFAULT_RETRY_FILE,
+                        help='最终失败的下载追加到此文件（默认 .cache/crawl-retry.jsonl）')
+    parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help=f'单个文件大小上限（MB，默认 {DEFAULT_MAX_BYTES // (1024 * 1024)}）')
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help='不把下载的资源收入内容寻址存储（.cache/blobs），每个路径各存一份')
+    add_cache_args(parser)
+
+
+def from_args(args, headers=None):
+    """按 add_download_args 的参数创建 Downloader"""
+    manifest = CrawlManifest(args.manifest, refresh=args.refresh)
+    return Downloader(headers=headers, workers=args.workers, per_host=args.per_host,
+                      max_bytes=args.max_size * 1024 * 1024, manifest=manifest,
+                      rate=args.rate, retries=args.retries, retry_file=args.retry_file,
+                      cache=cache_from_args(args),
+                      blobs=None if args.no_dedupe else BlobStore(DEFAULT_STORE))
+
+
+def retry_failed(args):
+    """重新下载重试文件中的文件，仍失败的写回重试文件"""
+    if not os.path.exists(args.retry):
+        print(f"没有重试文件: {args.retry}")
+        return
+    entries = {}
+    with open(args.retry, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[(entry['url'], entry.get('path'))] = entry
+    # 只有带本地路径的下载可以独立重试；页面等内存请求需要重新运行对应脚本
+    items = [(url, path) for url, path in entries if path]
+    skipped = len(entries) - len(items)
+    os.replace(args.retry, args.retry + '.old')
+
+    args.retry_file = args.retry
+    with from_args(args) as dl:
+        results = dl.download_all(items)
+    ok = sum(1 for r in results if r.ok)
+    print(f"重试 {len(items)} 个下载: 成功 {ok}，仍失败 {len(items) - ok}")
+    if skipped:
+        print(f"{skipped} 个页面请求需要重新运行对应脚本")
+    os.remove(args.retry + '.old')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='重试上次失败的下载')
+    parser.add_argument('--retry', default=DEFAULT_RETRY_FILE, help='重试文件路径')
+    add_download_args(parser)
+    retry_failed(parser.parse_args())
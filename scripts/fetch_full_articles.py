@@ -2,126 +2,122 @@
 """
 从sztv.com.cn抓取完整文章内容（包括动态加载的图片）
 更新mirrors目录中对应的HTML文件
+
+所有文章共用一个浏览器（browser_pool.py），并发渲染，正文出现且网络静默即视为就绪。
+渲染时中止统计/字体/音视频/第三方脚本，页面已加载的图片直接从响应中保存，不再重复下载；
+--no-routing 恢复原行为，用于对比渲染时间和传输字节数。
+增量: 原文页面未变化（304）且上次渲染结果已记录时跳过渲染；渲染结果与上次相同时不重写 HTML。
+正文由 JS 动态加载，页面外壳不变而正文变化时需要 --force。
 """
 
+import argparse
+import json
 import os
 import re
 import asyncio
-import hashlib
-import requests
-from urllib.parse import urljoin, urlparse
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-
-# 文章配置: mirrors目录 -> 原文URL
-ARTICLES = {
-    '01': 'https://www.sztv.com.cn/ysz/zx/zbsz/80611955.shtml',  # 腾讯新闻
-    '02': 'https://www.sztv.com.cn/ysz/zx/rd/80611627.shtml',    # 深度丨三航母时代
-    '03': 'https://www.sztv.com.cn/ysz/zx/tj/80611833.shtml',    # 深圳出台青年人才住房
-    '04': 'https://www.sztv.com.cn/ysz/zx/tj/80611814.shtml',    # 海南自由贸易港
-    '05': 'https://www.sztv.com.cn/ysz/zx/tj/80611789.shtml',    # 外交部亚洲事务特使
-    '06': 'https://www.sztv.com.cn/ysz/zx/tj/80611791.shtml',    # 元旦火车票
-    '07': 'https://www.sztv.com.cn/ysz/zx/zw/80611586.shtml',    # 咏春舞剧
-    '08': 'https://www.sztv.com.cn/ysz/zx/zw/80611296.shtml',    # 食物银行
-    '09': 'https://www.sztv.com.cn/ysz/zx/tj/80611001.shtml',    # 中央财办 (首页ID 10)
-    '10': 'https://www.sztv.com.cn/ysz/zx/tj/80611004.shtml',    # 山东舰入列6周年 (首页ID 11)
-    '11': 'https://www.sztv.com.cn/ysz/zx/tj/80611058.shtml',    # 台当局小红书 (首页ID 12)
-    '12': 'https://www.sztv.com.cn/ysz/zx/zw/80611248.shtml',    # 期待！深圳奇迹 (首页ID 9)
-}
+from urllib.parse import urljoin
+from bs4 import Tag
+
+from article_catalog import add_catalog_args, load_catalog
+from blob_store import url_filename
+from browser_pool import BrowserPool, DEFAULT_BUDGET, DEFAULT_CONCURRENCY, print_timings
+from crawl_manifest import fingerprint, page_cache_path
+from downloader import add_download_args, from_args, write_atomic
+from html_doc import parse, parse_fragment, replace_children
 
 MIRRORS_DIR = '/Volumes/Prism/sharp2/mirrors'
 
+MOBILE_USER_AGENT = 'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15'
 
-def download_image(url: str, save_dir: str) -> str:
-    """下载图片到本地，返回本地文件名"""
-    try:
-        # 生成文件名
-        parsed = urlparse(url)
-        ext = os.path.splitext(parsed.path)[1] or '.jpg'
-        # 使用URL的hash作为文件名，避免重复
-        filename = hashlib.md5(url.encode()).hexdigest()[:12] + ext
-        
+IMAGE_HEADERS = {
+    'User-Agent': MOBILE_USER_AGENT,
+    'Referer': 'https://www.sztv.com.cn/'
+}
+
+# 正文容器出现即说明文章内容已渲染
+CONTENT_SELECTOR = '.article-body'
+
+
+def download_images(urls: list, save_dir: str, dl, captured: dict = None) -> dict:
+    """保存图片到本地，返回 {URL: 本地文件名}（失败的不在其中）
+
+    captured 为渲染时捕获的 {URL: 字节}，命中的直接写盘，其余并发下载。
+    """
+    captured = captured or {}
+    local_names = {}
+    pending = []
+    for url in dict.fromkeys(urls):
+        filename = url_filename(url)
         filepath = os.path.join(save_dir, filename)
-        
-        # 如果已存在就跳过
-        if os.path.exists(filepath):
-            print(f"  [跳过] {filename} (已存在)")
-            return filename
-        
-        # 下载
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15',
-            'Referer': 'https://www.sztv.com.cn/'
-        }
-        resp = requests.get(url, headers=headers, timeout=30)
-        resp.raise_for_status()
-        
-        with open(filepath, 'wb') as f:
-            f.write(resp.content)
-        
-        print(f"  [下载] {filename} <- {url[:60]}...")
-        return filename
-    except Exception as e:
-        print(f"  [错误] 下载失败 {url}: {e}")
-        return None
+        # 渲染时已捕获的直接写盘；其余交给下载器（已下载过的发条件请求）
+        if url in captured:
+            write_atomic(filepath, captured[url])
+            if dl.blobs is not None:
+                dl.blobs.adopt(filepath)
+            print(f"  [捕获] {filename} ({len(captured[url])} bytes)")
+            local_names[url] = filename
+        else:
+            pending.append((url, filepath))
+    
+    for result in dl.download_all(pending):
+        filename = os.path.basename(result.path)
+        if result.not_modified:
+            print(f"  [未变化] {filename}")
+            local_names[result.url] = filename
+        elif result.ok:
+            print(f"  [下载] {filename} <- {result.url[:60]}...")
+            local_names[result.url] = filename
+        else:
+            print(f"  [错误] 下载失败 {result.url}: {result.error}")
+    return local_names
 
 
-async def fetch_article_content(url: str) -> tuple:
-    """使用Playwright获取渲染后的文章内容"""
-    print(f"\n正在抓取: {url}")
-    
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page(
-                user_agent='Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15'
-            )
-            
-            # 使用domcontentloaded而不是networkidle，更快
-            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            
-            # 等待文章内容加载
-            await page.wait_for_timeout(5000)
-            
-            # 获取文章正文区域的HTML
-            article_body = await page.query_selector('.article-body')
-            if article_body:
-                content_html = await article_body.inner_html()
-            else:
-                content_html = ""
-            
-            # 获取文章标题
-            title_el = await page.query_selector('.article-title')
-            title = await title_el.inner_text() if title_el else "文章"
-            
-            # 获取作者和时间
-            info = {}
-            author_el = await page.query_selector('#author')
-            if author_el:
-                info['author'] = await author_el.get_attribute('value')
-            
-            time_el = await page.query_selector('#publishdate')
-            if time_el:
-                info['publishTime'] = await time_el.get_attribute('value')
-            
-            await browser.close()
-            
-        return title.strip(), content_html, info
-    except Exception as e:
-        print(f"  [错误] 抓取失败: {e}")
-        return "", "", {}
-
-
-def process_content_images(html: str, save_dir: str, base_url: str) -> str:
-    """处理HTML中的图片，下载到本地并替换路径"""
-    soup = BeautifulSoup(html, 'html.parser')
+async def extract_article(page) -> tuple:
+    """从渲染完成的页面提取 (标题, 正文HTML, 作者/时间信息)"""
+    # 获取文章正文区域的HTML
+    article_body = await page.query_selector(CONTENT_SELECTOR)
+    if article_body:
+        content_html = await article_body.inner_html()
+    else:
+        content_html = ""
+    
+    # 获取文章标题
+    title_el = await page.query_selector('.article-title')
+    title = await title_el.inner_text() if title_el else "文章"
+    
+    # 获取作者和时间
+    info = {}
+    author_el = await page.query_selector('#author')
+    if author_el:
+        info['author'] = await author_el.get_attribute('value')
     
+    time_el = await page.query_selector('#publishdate')
+    if time_el:
+        info['publishTime'] = await time_el.get_attribute('value')
+    
+    return title.strip(), content_html, info
+
+
+def content_images(nodes: list) -> list:
+    """正文节点（parse_fragment 的结果）中的所有 <img>"""
+    images = []
+    for node in nodes:
+        if isinstance(node, Tag):
+            if node.name == 'img':
+                images.append(node)
+            images.extend(node.find_all('img'))
+    return images
+
+
+def process_content_images(nodes: list, save_dir: str, base_url: str, dl, captured: dict = None):
+    """处理正文节点中的图片，保存到本地并就地替换路径（captured 见 download_images）"""
     # 创建images子目录
     img_dir = os.path.join(save_dir, 'images')
     os.makedirs(img_dir, exist_ok=True)
     
     # 查找所有图片
-    for img in soup.find_all('img'):
+    images = []
+    for img in content_images(nodes):
         src = img.get('src') or img.get('data-src') or img.get('data-original')
         if not src:
             continue
@@ -133,9 +129,12 @@ def process_content_images(html: str, save_dir: str, base_url: str) -> str:
         # 跳过base64图片
         if src.startswith('data:'):
             continue
-        
-        # 下载图片
-        local_name = download_image(src, img_dir)
+        images.append((img, src))
+    
+    # 下载图片
+    local_names = download_images([src for _, src in images], img_dir, dl, captured)
+    for img, src in images:
+        local_name = local_names.get(src)
         if local_name:
             # 更新src为本地路径
             img['src'] = f'images/{local_name}'
@@ -143,12 +142,10 @@ def process_content_images(html: str, save_dir: str, base_url: str) -> str:
             for attr in ['data-src', 'data-original', 'data-lazy']:
                 if img.has_attr(attr):
                     del img[attr]
-    
-    return str(soup)
 
 
-def update_mirror_html(mirror_dir: str, new_content: str, title: str, info: dict = None):
-    """更新mirrors中的HTML文件"""
+def update_mirror_html(mirror_dir: str, content_nodes: list, title: str, info: dict = None):
+    """更新mirrors中的HTML文件（content_nodes 为已处理过图片的正文节点，直接移入页面）"""
     html_path = os.path.join(mirror_dir, 'index.html')
     
     if not os.path.exists(html_path):
@@ -158,7 +155,7 @@ def update_mirror_html(mirror_dir: str, new_content: str, title: str, info: dict
     with open(html_path, 'r', encoding='utf-8') as f:
         html = f.read()
     
-    soup = BeautifulSoup(html, 'html.parser')
+    soup = parse(html)
     
     # 更新标题
     title_el = soup.find('title')
@@ -173,27 +170,21 @@ def update_mirror_html(mirror_dir: str, new_content: str, title: str, info: dict
     if info:
         info_div = soup.find(class_='info')
         if info_div:
-            info_html = ''
-            if info.get('author'):
-                info_html += f'<span class="source">{info["author"]}</span>'
-            if info.get('publishTime'):
-                info_html += f'<span class="time">{info["publishTime"]}</span>'
-            if info_html:
-                info_div.clear()
-                info_soup = BeautifulSoup(info_html, 'html.parser')
-                for child in info_soup.children:
-                    info_div.append(child)
+            spans = []
+            for key, cls in (('author', 'source'), ('publishTime', 'time')):
+                if info.get(key):
+                    span = soup.new_tag('span', attrs={'class': cls})
+                    span.string = info[key]
+                    spans.append(span)
+            if spans:
+                replace_children(info_div, spans)
                 print(f"  [更新] 作者/时间: {info.get('author', '')} {info.get('publishTime', '')}")
     
     # 找到article-body并替换内容
     article_body = soup.find(id='content') or soup.find(class_='article-body')
     if article_body:
-        # 清空现有内容
-        article_body.clear()
-        # 添加新内容
-        new_soup = BeautifulSoup(new_content, 'html.parser')
-        for child in new_soup.children:
-            article_body.append(child)
+        # 用新内容替换现有内容
+        replace_children(article_body, content_nodes)
         
         print(f"  [更新] article-body 内容已替换")
     else:
@@ -206,37 +197,76 @@ def update_mirror_html(mirror_dir: str, new_content: str, title: str, info: dict
     print(f"  [保存] {html_path}")
 
 
-async def main():
+async def process_article(pool, dl, mirror_id: str, url: str, force: bool = False):
+    """渲染一篇文章并更新对应的 mirrors 页面，返回 RenderResult（跳过时返回 None）"""
+    mirror_dir = os.path.join(MIRRORS_DIR, mirror_id)
+    
+    if not os.path.exists(mirror_dir):
+        print(f"\n[跳过] {mirror_id}: 目录不存在")
+        return None
+    
+    # 0. 条件请求原文页面：未变化且有上次的渲染记录时不再启动渲染
+    output_key = f'rendered:{mirror_id}:{url}'
+    previous = dl.manifest.output_fingerprint(output_key)
+    page = await asyncio.to_thread(dl.fetch, url, page_cache_path(url))
+    if page.not_modified and previous and not force:
+        print(f"\n[跳过] mirrors/{mirror_id}: 原文未变化")
+        return None
+    
+    # 1. 获取渲染后的文章内容
+    result = await pool.render(url, extract_article, selector=CONTENT_SELECTOR)
+    print(f"\n{'='*40}")
+    print(f"处理 mirrors/{mirror_id}")
+    print(f"URL: {url}")
+    if not result.ok:
+        print(f"  [错误] 抓取失败: {result.error}")
+        return result
+    if not result.ready:
+        print(f"  [警告] {pool.budget:g}s 内未就绪，使用当前页面内容")
+    title, content_html, info = result.value
+    
+    if not content_html or len(content_html) < 100:
+        print(f"  [警告] 获取到的内容太短或为空，跳过")
+        return result
+    
+    print(f"  [获取] 标题: {title}")
+    print(f"  [获取] 内容长度: {len(content_html)} 字符")
+    
+    rendered = fingerprint(title, content_html, json.dumps(info, sort_keys=True, ensure_ascii=False))
+    if rendered == previous and not force:
+        print(f"  [未变化] 渲染结果与上次相同，不重写")
+        return result
+    
+    # 2. 处理图片 - 下载到本地；3. 更新HTML文件（阻塞 IO 放到线程中，不拖慢其他页面渲染）
+    # 正文只解析一次，图片本地化就地修改节点，再直接移入 mirrors 页面
+    content_nodes = parse_fragment(content_html)
+    await asyncio.to_thread(process_content_images, content_nodes, mirror_dir, url, dl, result.images)
+    # 图片已写盘，释放内存
+    result.images = {name: b'' for name in result.images}
+    await asyncio.to_thread(update_mirror_html, mirror_dir, content_nodes, title, info)
+    dl.manifest.set_output_fingerprint(output_key, rendered)
+    return result
+
+
+async def main(args):
     print("=" * 60)
     print("开始抓取文章完整内容")
     print("=" * 60)
     
-    for mirror_id, url in ARTICLES.items():
-        mirror_dir = os.path.join(MIRRORS_DIR, mirror_id)
-        
-        if not os.path.exists(mirror_dir):
-            print(f"\n[跳过] {mirror_id}: 目录不存在")
-            continue
-        
-        print(f"\n{'='*40}")
-        print(f"处理 mirrors/{mirror_id}")
-        print(f"URL: {url}")
-        
-        # 1. 获取渲染后的文章内容
-        title, content_html, info = await fetch_article_content(url)
-        
-        if not content_html or len(content_html) < 100:
-            print(f"  [警告] 获取到的内容太短或为空，跳过")
-            continue
-        
-        print(f"  [获取] 标题: {title}")
-        print(f"  [获取] 内容长度: {len(content_html)} 字符")
-        
-        # 2. 处理图片 - 下载到本地
-        processed_html = process_content_images(content_html, mirror_dir, url)
-        
-        # 3. 更新HTML文件
-        update_mirror_html(mirror_dir, processed_html, title, info)
+    # 只有做过镜像的文章才需要回填（mirrors 目录 -> 原文 URL）
+    articles = {a['mirror']: a['url'] for a in load_catalog(args.catalog, args.limit) if a.get('mirror')}
+    
+    with from_args(args, headers=IMAGE_HEADERS) as dl:
+        async with BrowserPool(concurrency=args.pages, user_agent=MOBILE_USER_AGENT,
+                               budget=args.budget, block=not args.no_routing,
+                               capture_images=not args.no_routing) as pool:
+            results = await asyncio.gather(*(process_article(pool, dl, mirror_id, url, args.force)
+                                             for mirror_id, url in articles.items()))
+    
+    rows = [(mirror_id, result) for mirror_id, result in zip(articles, results) if result is not None]
+    if rows:
+        print_timings(rows, pool.launch_time)
+    print(f"requests 补充下载: {dl.stats['requests']} 个请求，{dl.stats['bytes'] / 1024 / 1024:.2f}MB")
     
     print("\n" + "=" * 60)
     print("完成!")
@@ -244,4 +274,15 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='用 Playwright 抓取完整文章内容并更新 mirrors')
+    parser.add_argument('--pages', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'同时渲染的页面数（默认 {DEFAULT_CONCURRENCY}）')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help=f'单个页面等待就绪的最长秒数（默认 {DEFAULT_BUDGET:g}）')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略增量记录，重新渲染并重写所有文章')
+    parser.add_argument('--no-routing', action='store_true',
+                        help='不中止无关请求、不捕获图片（原行为，用于对比）')
+    add_catalog_args(parser)
+    add_download_args(parser)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+HTML 解析封装（各爬虫脚本共用）
+- parse(): 可修改的文档（BeautifulSoup），有 lxml 时用 lxml 构建，否则回退到 html.parser
+- parse_fragment() / replace_children(): 解析一次片段并把节点直接移入目标元素，不再 str() 后重新解析
+- iter_links(): 只读的链接提取，有 selectolax 时用 selectolax，否则回退到 BeautifulSoup
+
+环境变量 HTML_PARSER 可强制指定 BeautifulSoup 的后端（lxml / html.parser），
+用于对比输出或在 lxml 行为不一致时回退。各后端耗时见 bench_html_parse.py。
+"""
+
+import os
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# selectolax 1.0 起只提供 lexbor 后端，旧版本用 modest 后端
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+# BeautifulSoup 后端，按速度从快到慢
+TREE_BUILDERS = ('lxml', 'html.parser')
+
+
+def available_builders():
+    return [name for name in TREE_BUILDERS if name != 'lxml' or HAS_LXML]
+
+
+def default_builder():
+    """HTML_PARSER 指定且可用时用它，否则用最快的可用后端"""
+    forced = os.environ.get('HTML_PARSER')
+    available = available_builders()
+    if forced in available:
+        return forced
+    return available[0]
+
+
+def parse(html, builder=None):
+    """解析完整页面，返回可修改的 BeautifulSoup 文档"""
+    return BeautifulSoup(html, builder or default_builder())
+
+
+def parse_fragment(html, builder=None):
+    """解析 HTML 片段（如正文 innerHTML），返回可移入其他文档的顶层节点列表
+
+    lxml 会给片段补上 <html><body>，这里只取 body 的子节点。
+    """
+    builder = builder or default_builder()
+    soup = BeautifulSoup(html, builder)
+    root = soup
+    if builder == 'lxml' and soup.body is not None:
+        root = soup.body
+    return list(root.contents)
+
+
+def replace_children(tag, nodes):
+    """清空 tag 并把 nodes（parse_fragment 的结果或其他文档的节点）移入"""
+    tag.clear()
+    for node in nodes:
+        tag.append(node.extract())
+
+
+def _bs4_links(html, context_re, depth):
+    for a in parse(html).find_all('a', href=True):
+        match = None
+        if context_re is not None:
+            node = a
+            for _ in range(depth):
+                if node is None:
+                    break
+                match = context_re.search(node.get_text(' ', strip=True))
+                if match:
+                    break
+                node = node.parent
+        yield a['href'], a.get_text(strip=True), a.get('title'), match
+
+
+def _selectolax_links(html, context_re, depth):
+    for a in HTMLParser(html).css('a[href]'):
+        match = None
+        if context_re is not None:
+            node = a
+            for _ in range(depth):
+                if node is None:
+                    break
+                match = context_re.search(node.text(separator=' ', strip=True))
+                if match:
+                    break
+                node = node.parent
+        yield a.attributes.get('href') or '', a.text(strip=True), a.attributes.get('title'), match
+
+
+def iter_links(html, context_re=None, depth=3):
+    """逐个返回 (href, 链接文字, title 属性, 上下文匹配)
+
+    context_re 在链接及其上 depth 层父元素的文本中由近到远查找（如列表项里的日期），
+    没有匹配时为 None。
+    """
+    if HTMLParser is not None and os.environ.get('HTML_PARSER') in (None, '', 'selectolax'):
+        return _selectolax_links(html, context_re, depth)
+    return _bs4_links(html, context_re, depth)
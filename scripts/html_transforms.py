@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+mirrors HTML 改写引擎：多个改写脚本组成一条链，每个文件只读一次、写一次
+- 各改写脚本（update_gsplat_containers.py 等）把改写逻辑写成 content -> content 的纯函数，
+  用 @register 注册为一个变换；原脚本单独运行时行为不变
+- 变换链在内存中的同一份文本上依次执行，全部完成后写一次文件（原子替换），
+  改写前后的内容记入快照存储（snapshot_store.py，.cache/snapshots），每次运行可整体回滚
+- 报告每个变换改动了哪些文件、几处、增减多少字节
+- 目标页面自动发现: frontend/mirrors 下的 */index.html 中内容匹配 --match（默认含 splat-container
+  或 data-ply）或 CSS --selector 的页面；各文件分发到进程池并行处理，完成一个打印一个
+- 指纹索引（transform_index.py）: 文件未变化且已知变换链对它不起作用、或它就是这条链写出的内容时，
+  只做 stat 就跳过；每一步的输入/输出哈希都记入索引，并自动检测非幂等的变换（--force 忽略索引）
+
+变换都是针对原始文本的正则改写，因此共享的表示就是文本本身：解析成 DOM 再序列化会改变
+空白与属性引号，结果无法与逐个运行脚本逐字节一致。
+
+用法:
+    python3 scripts/html_transforms.py --list
+    python3 scripts/html_transforms.py --discover                         # 只列出匹配的页面
+    python3 scripts/html_transforms.py --chain restore_aspect_ratio,spin_animation --dry-run
+    python3 scripts/html_transforms.py --chain clean_scripts --selector 'script[src]' --jobs 8
+    python3 scripts/html_transforms.py --chain hoist_styles --match ''      # 全部页面提取重复样式（瘦身见 minify_mirrors.py）
+    python3 scripts/html_transforms.py --self-check                     # 单次执行 == 基线脚本逐个运行（黄金样本）
+"""
+
+import argparse
+import concurrent.futures
+import difflib
+import glob
+import gzip
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import re
+import time
+
+from snapshot_store import DEFAULT_SNAPSHOTS, SnapshotStore
+from transform_index import DEFAULT_INDEX, TransformIndex, content_sha
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIRRORS_DIR = os.path.join(PROJECT_ROOT, 'frontend', 'mirrors')
+# 自动发现: mirrors 下每篇文章的 index.html 中，含 3D 模型容器的页面（各改写脚本处理的就是这些）
+DEFAULT_PATTERN = '*/index.html'
+DEFAULT_MATCH = r'splat-container|data-ply'
+
+# 注册变换的脚本，导入顺序即默认链的顺序（也是这些脚本当初依次运行的顺序）
+TRANSFORM_MODULES = (
+    'update_gsplat_containers',
+    'update_container_aspect_ratio',
+    'update_flexible_height',
+    'restore_aspect_ratio',
+    'remove_container_aspect_ratio',
+    'add_spin_animation',
+    'clean_mirrors_scripts',
+    'minify_mirrors',
+)
+
+# 自检用的黄金样本: 基线脚本处理样本页面的结果
+GOLDEN_DIR = os.path.join(PROJECT_ROOT, 'tests', 'fixtures', 'html_transforms')
+
+TRANSFORMS = {}
+
+
+class Transform:
+    """一个已注册的变换: 名称、纯函数 content -> content、说明、版本"""
+
+    def __init__(self, name, func, description, version=1):
+        self.name = name
+        self.func = func
+        self.description = description
+        self._version = version
+        self._fingerprint = None
+
+    @property
+    def version(self):
+        """注册时的 version 加上所在脚本源码的哈希: 改了正则或模板常量，索引中的旧结果自动失效"""
+        if self._fingerprint is None:
+            source = inspect.getsource(inspect.getmodule(self.func))
+            self._fingerprint = f"{self._version}:{hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]}"
+        return self._fingerprint
+
+
+class Change:
+    """某个变换在某个文件上的改动"""
+
+    def __init__(self, name, hunks, delta):
+        self.name = name
+        self.hunks = hunks
+        self.delta = delta
+
+    def __str__(self):
+        return f"{self.name}（{self.hunks} 处，{self.delta:+d}B）"
+
+
+def register(name, description=None, version=1):
+    """装饰器: 把 content -> content 的函数注册为变换；说明默认取文档字符串第一行"""
+    def decorator(func):
+        doc = (func.__doc__ or '').strip().splitlines()
+        TRANSFORMS[name] = Transform(name, func, description or (doc[0] if doc else ''), version)
+        return func
+    return decorator
+
+
+def load_transforms():
+    """导入各改写脚本，返回按默认顺序排列的 {名称: Transform}
+
+    各脚本注册到 html_transforms 模块的 TRANSFORMS；本文件作为 __main__ 运行或在 spawn 出的
+    子进程中时那是另一个模块对象，因此从 html_transforms 取注册表。
+    """
+    for module in TRANSFORM_MODULES:
+        importlib.import_module(module)
+    return importlib.import_module('html_transforms').TRANSFORMS
+
+
+def resolve_chain(names=None):
+    """变换名列表（None 为全部）→ Transform 列表；未知名称抛出 KeyError"""
+    transforms = load_transforms()
+    if not names:
+        return list(transforms.values())
+    unknown = [name for name in names if name not in transforms]
+    if unknown:
+        raise KeyError(f"未知变换: {', '.join(unknown)}（可用: {', '.join(transforms)}）")
+    return [transforms[name] for name in names]
+
+
+def count_hunks(before, after):
+    """按行比较，返回改动的段数"""
+    matcher = difflib.SequenceMatcher(None, before.splitlines(), after.splitlines(), autojunk=False)
+    return sum(1 for op, *_ in matcher.get_opcodes() if op != 'equal')
+
+
+def chain_key(chain):
+    return '|'.join(f'{transform.name}@{transform.version}' for transform in chain)
+
+
+def chain_is_noop(sha, chain, index):
+    """索引中记录着链上每个变换对内容 sha 都不起作用"""
+    return all(index.result(sha, t.name, t.version) == sha for t in chain)
+
+
+def apply_chain(content, chain, index=None, sha=None, dry_run=False):
+    """在同一份文本上依次执行变换，返回 (结果, [Change])；没有改动的变换不出现在列表中
+
+    给出 index 时: 已知对当前内容不起作用的变换直接跳过，每一步的结果记入索引；
+    某个变换改动了内容时，再对它的输出执行一次，仍有改动即记为非幂等。dry_run 时只读索引。
+    """
+    changes = []
+    if index is not None and sha is None:
+        sha = content_sha(content)
+    for transform in chain:
+        if index is not None and index.result(sha, transform.name, transform.version) == sha:
+            continue
+        updated = transform.func(content)
+        if updated != content:
+            changes.append(Change(transform.name, count_hunks(content, updated),
+                                  len(updated.encode('utf-8')) - len(content.encode('utf-8'))))
+            if index is not None:
+                updated_sha = content_sha(updated)
+                if not dry_run:
+                    index.record_result(sha, transform.name, transform.version, updated_sha)
+                    check_idempotent(transform, sha, updated, updated_sha, index)
+                sha = updated_sha
+            content = updated
+        elif index is not None and not dry_run:
+            index.record_result(sha, transform.name, transform.version, sha)
+    return content, changes
+
+
+def check_idempotent(transform, input_sha, output, output_sha, index):
+    """对变换的输出再执行一次: 结果记入索引，仍有改动时标记为非幂等"""
+    if index.result(output_sha, transform.name, transform.version) is not None:
+        return
+    again_sha = content_sha(transform.func(output))
+    index.record_result(output_sha, transform.name, transform.version, again_sha)
+    if again_sha != output_sha:
+        index.flag(transform.name, transform.version, input_sha, output_sha, again_sha)
+
+
+def page_matches(content, match=None, selector=None):
+    """内容匹配正则 match，且（给出时）含有 CSS 选择器 selector 对应的元素"""
+    if match and not re.search(match, content):
+        return False
+    if selector:
+        from html_doc import parse
+        return parse(content).select_one(selector) is not None
+    return True
+
+
+def discover_pages(mirrors_dir=MIRRORS_DIR, match=DEFAULT_MATCH, selector=None, pattern=DEFAULT_PATTERN):
+    """mirrors_dir 下按 pattern 找到的、内容满足 page_matches 的页面（按路径排序）"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(glob.escape(mirrors_dir), pattern))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            if page_matches(f.read(), match, selector):
+                pages.append(path)
+    return pages
+
+
+def write_text_atomic(path, content):
+    """写入临时文件后原子替换 path: 中途失败不会留下半个页面，硬链接的其他副本也不受影响"""
+    tmp = f'{path}.tmp{os.getpid()}'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def rewrite_file(path, chain, dry_run=False, snapshot=None, match=None, selector=None, index=None, force=False):
+    """对单个文件执行变换链（读一次、写一次），返回 (状态, [Change])
+
+    状态: updated 已改写 / unchanged 无改动（或各变换的改动相互抵消）/ skipped 不满足 match/selector /
+    cached 索引表明变换链对它不起作用 / applied 它就是这条变换链写出的内容；后两种不读文件。
+    snapshot 为 SnapshotRun 时，写文件之前先记录改写前后的内容。dry_run 时文件和索引都不写。
+    """
+    key = chain_key(chain) if index is not None else None
+    # 匹配条件的判断结果也按内容哈希记在索引里（作为名为 @match 的"变换"）
+    match_key = f'{match or ""}|{selector or ""}'
+    if index is not None and not force:
+        sha = index.file_sha(path)
+        if sha is not None:
+            if (match or selector) and index.result(sha, '@match', match_key) == 'no':
+                return 'skipped', []
+            if index.produced_by(sha, key):
+                return 'applied', []
+            if chain_is_noop(sha, chain, index):
+                return 'cached', []
+    with open(path, 'r', encoding='utf-8') as f:
+        original = f.read()
+    sha = content_sha(original) if index is not None else None
+    # dry-run 只读索引（命中时同样跳过），不写入任何记录
+    record = index is not None and not dry_run
+    if not page_matches(original, match, selector):
+        if record:
+            index.record_result(sha, '@match', match_key, 'no')
+            index.record_file(path, sha)
+        return 'skipped', []
+    if index is not None and not force and index.produced_by(sha, key):
+        if record:
+            index.record_file(path, sha)
+        return 'applied', []
+
+    content, changes = apply_chain(original, chain, index, sha, dry_run=dry_run)
+    if content == original:
+        if record:
+            index.record_file(path, sha)
+            if changes:
+                index.record_chain(sha, key, sha)
+        return 'unchanged', changes
+    if dry_run:
+        return 'updated', changes
+    if snapshot is not None:
+        snapshot.record(path, original, content)
+    write_text_atomic(path, content)
+    if record:
+        output_sha = content_sha(content)
+        index.record_chain(sha, key, output_sha)
+        index.record_file(path, output_sha)
+    return 'updated', changes
+
+
+# 每个工作进程打开一次索引
+_process_index = {}
+
+
+def _open_index(path, readonly=False):
+    if (path, readonly) not in _process_index:
+        _process_index[path, readonly] = TransformIndex(path, readonly=readonly)
+    return _process_index[path, readonly]
+
+
+def _rewrite_task(task):
+    """进程池中处理一个文件，返回 (路径, 状态, [Change], 错误)"""
+    path, names, options = task
+    try:
+        chain = resolve_chain(names)
+        index_path = options.pop('index_path', None)
+        index = _open_index(index_path, readonly=options.get('dry_run', False)) if index_path else None
+        status, changes = rewrite_file(path, chain, index=index, **options)
+        return path, status, changes, None
+    except Exception as e:
+        return path, 'failed', [], f'{type(e).__name__}: {e}'
+
+
+def run_batch(paths, chain, jobs=None, index_path=None, **options):
+    """把文件分发到进程池执行变换链，按完成顺序逐个产出 (路径, 状态, [Change], 错误)
+
+    options 为 rewrite_file 的 dry_run/snapshot/match/selector/force；index_path 为指纹索引路径。
+    jobs 为 1 时在当前进程中顺序执行（便于调试）；默认与 CPU 核数相同。
+    """
+    names = [transform.name for transform in chain]
+    tasks = [(path, names, dict(options, index_path=index_path)) for path in paths]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    if jobs == 1:
+        for task in tasks:
+            yield _rewrite_task(task)
+        return
+    with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+        futures = [pool.submit(_rewrite_task, task) for task in tasks]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def load_golden(golden_dir=GOLDEN_DIR):
+    """黄金样本: (基线变换链 [变换名], [(样本名, 内容, {变换名或 chain: 期望结果的 SHA-256})])"""
+    with open(os.path.join(golden_dir, 'golden.json'), 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    cases = []
+    for name, expected in sorted(golden['cases'].items()):
+        with gzip.open(os.path.join(golden_dir, 'inputs', name), 'rt', encoding='utf-8') as f:
+            cases.append((name, f.read(), expected))
+    return golden['chain'], cases
+
+
+def self_check(chain, golden_dir=GOLDEN_DIR):
+    """把单次执行的结果与黄金样本比较，返回不一致的 [(样本名, 变换名或 chain)]
+
+    黄金样本是重构之前的原始脚本逐个运行的结果（tests/fixtures/html_transforms/make_golden.py 生成），
+    与 @register 的纯函数无关。每个变换单独比较；chain 与基线变换链相同时再比较整条链。
+    """
+    baseline_chain, cases = load_golden(golden_dir)
+    names = [transform.name for transform in chain]
+    unchecked = [name for name in names if name not in baseline_chain]
+    if unchecked:
+        print(f"  ℹ️ 没有基线脚本、不在黄金样本中: {', '.join(unchecked)}\n")
+    mismatches = []
+    for case, content, expected in cases:
+        failed = [t.name for t in chain
+                  if t.name in expected and content_sha(apply_chain(content, [t])[0]) != expected[t.name]]
+        summary = ''
+        if names == baseline_chain:
+            actual, changes = apply_chain(content, chain)
+            if content_sha(actual) != expected['chain']:
+                failed.append('chain')
+            summary = ', '.join(str(c) for c in changes) or '无改动'
+        mismatches += [(case, name) for name in failed]
+        if failed:
+            print(f"  ✗ {case}: 与基线脚本不一致（{', '.join(failed)}）")
+        else:
+            print(f"  ✓ {case}{': ' + summary if summary else ''}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对 mirrors HTML 单次执行一条改写链（自动发现页面、多进程）')
+    parser.add_argument('files', nargs='*', help='要处理的 HTML（默认自动发现 frontend/mirrors 下的页面）')
+    parser.add_argument('--chain', help='逗号分隔的变换名，按给出的顺序执行（自检时默认黄金样本的基线变换链）')
+    parser.add_argument('--list', action='store_true', help='列出已注册的变换')
+    parser.add_argument('--discover', action='store_true', help='只列出自动发现的页面')
+    parser.add_argument('--mirrors-dir', default=MIRRORS_DIR, help='自动发现的根目录（默认 frontend/mirrors）')
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help=f'页面路径模式（默认 {DEFAULT_PATTERN}）')
+    parser.add_argument('--match', default=DEFAULT_MATCH,
+                        help=f'只处理内容匹配此正则的页面（默认 {DEFAULT_MATCH!r}，空字符串表示不限）')
+    parser.add_argument('--selector', help='只处理含有此 CSS 选择器元素的页面，如 div.splat-container')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help=f'并行进程数（默认 CPU 核数 {os.cpu_count()}）')
+    parser.add_argument('--dry-run', action='store_true', help='只报告改动，不写文件')
+    parser.add_argument('--snapshots', default=DEFAULT_SNAPSHOTS, help='快照存储目录（默认 .cache/snapshots）')
+    parser.add_argument('--no-snapshot', action='store_true', help='不记录快照（无法回滚）')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='指纹索引路径（默认 .cache/transform-index.sqlite）')
+    parser.add_argument('--no-index', action='store_true', help='不使用指纹索引')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略索引，对所有页面重新执行（包括已经应用过这条链的页面）')
+    parser.add_argument('--self-check', action='store_true',
+                        help='验证单次执行的结果与黄金样本（原始脚本逐个运行的结果）完全一致（不修改文件）')
+    args = parser.parse_args()
+
+    if args.list:
+        for transform in load_transforms().values():
+            print(f"{transform.name:<24} {transform.description}")
+        return
+
+    if args.discover:
+        files = args.files or discover_pages(args.mirrors_dir, args.match, args.selector, args.pattern)
+        for path in files:
+            print(os.path.relpath(path, PROJECT_ROOT))
+        print(f"\n共 {len(files)} 个页面")
+        return
+
+    if not args.chain and not args.self_check:
+        # 全部变换依次执行会把容器重置为模板再逐步改写，改写文件时必须明确给出变换链
+        parser.error('需要 --chain（可用 --list 查看已注册的变换）')
+    names = args.chain.split(',') if args.chain else None
+    if args.self_check and names is None:
+        # 默认检查黄金样本记录的整条基线变换链
+        names = load_golden()[0]
+    try:
+        chain = resolve_chain(names)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    if args.self_check:
+        print(f"🔍 自检: 黄金样本 {os.path.relpath(GOLDEN_DIR, PROJECT_ROOT)}，"
+              f"变换链 {' → '.join(t.name for t in chain)}\n")
+        mismatches = self_check(chain)
+        if mismatches:
+            print(f"\n❌ {len(mismatches)} 处与基线脚本不一致")
+            raise SystemExit(1)
+        print("\n✨ 全部一致")
+        return
+
+    # 匹配检查放到各进程里，与改写共用一次读取
+    if args.files:
+        paths = args.files
+    else:
+        paths = sorted(glob.glob(os.path.join(glob.escape(args.mirrors_dir), args.pattern)))
+    print(f"🔧 变换链: {' → '.join(t.name for t in chain)}{'（dry-run）' if args.dry_run else ''}")
+    print(f"   {len(paths)} 个候选页面，{max(1, min(args.jobs or 1, len(paths) or 1))} 个进程\n")
+
+    started = time.perf_counter()
+    per_transform = {t.name: [0, 0] for t in chain}
+    counts = dict.fromkeys(('updated', 'unchanged', 'skipped', 'cached', 'applied', 'failed'), 0)
+    index_path = None if args.no_index else args.index
+    if args.dry_run and index_path and not os.path.exists(index_path):
+        # dry-run 不创建索引
+        index_path = None
+    snapshot = None
+    if not args.dry_run and not args.no_snapshot:
+        snapshot = SnapshotStore(args.snapshots).begin(f"html_transforms: {','.join(t.name for t in chain)}")
+    results = run_batch(paths, chain, jobs=args.jobs, index_path=index_path, dry_run=args.dry_run,
+                        snapshot=snapshot, match=args.match, selector=args.selector, force=args.force)
+    for done, (path, status, changes, error) in enumerate(results, 1):
+        counts[status] += 1
+        name = os.path.relpath(path, PROJECT_ROOT)
+        progress = f"[{done}/{len(paths)}]"
+        summary = ', '.join(str(c) for c in changes)
+        if status == 'failed':
+            print(f"{progress} ❌ {name}: {error}", flush=True)
+        elif status == 'updated':
+            print(f"{progress} ✅ {name}: {summary}", flush=True)
+            for change in changes:
+                per_transform[change.name][0] += 1
+                per_transform[change.name][1] += change.hunks
+        elif status == 'applied':
+            print(f"{progress} ⏭️ 已应用过此变换链: {name}", flush=True)
+        elif status == 'cached':
+            print(f"{progress} ℹ️ 无需更新（索引）: {name}", flush=True)
+        elif status == 'unchanged':
+            note = f"（改动相互抵消: {summary}）" if changes else ''
+            print(f"{progress} ℹ️ 无需更新: {name}{note}", flush=True)
+
+    print(f"\n{'变换':<24} {'文件':>6} {'改动处':>8}")
+    for transform_name, (file_count, hunks) in per_transform.items():
+        print(f"{transform_name:<24} {file_count:>6} {hunks:>8}")
+    print(f"\n✨ 完成! {'将' if args.dry_run else '已'}更新 {counts['updated']} 个文件，"
+          f"无需更新 {counts['unchanged']}，索引命中 {counts['cached']}，已应用 {counts['applied']}，"
+          f"不匹配 {counts['skipped']}，失败 {counts['failed']}，耗时 {time.perf_counter() - started:.2f}s")
+    if snapshot is not None:
+        snapshot.end()
+        if counts['updated']:
+            print(f"📸 快照 {snapshot.id}，回滚: python3 scripts/snapshot_store.py rollback {snapshot.id}")
+
+    if index_path:
+        index = TransformIndex(index_path, readonly=args.dry_run)
+        flagged = index.flagged()
+        index.close()
+        unstable = [t.name for t in chain if flagged.get(t.name) == t.version]
+        if unstable:
+            print(f"⚠️ 非幂等变换: {', '.join(unstable)}（对自己的输出再执行仍会改动；"
+                  f"已应用过的页面会被跳过，--force 才会再次执行）")
+    if counts['failed']:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+开发服务器的缓存层
+- ETagIndex: 基于文件内容的强 ETag，持久化索引按 mtime + size 失效
+- CachePolicy: 按路径模式决定 Cache-Control（只有 data/ply 下的模型标记为 immutable，其余按 ETag 重新验证）
+- HotFileCache: 小文件（index.html、CSS、articles-data.js、封面）的内存 LRU 缓存
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_PATH = os.path.join(PROJECT_ROOT, '.cache', 'etag-index.json')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+# 开发者显式关闭缓存时使用（原来的行为）
+NO_STORE_HEADERS = [
+    ('Cache-Control', 'no-cache, no-store, must-revalidate, max-age=0'),
+    ('Pragma', 'no-cache'),
+    ('Expires', '0'),
+]
+
+# 路径模式 -> Cache-Control，按顺序匹配第一条；其余走 no-cache + ETag 重新验证
+# mirrors/*/images/1d30d1e60f37.jpg 这类文件名是 URL 的 md5（url_filename），不是内容哈希:
+# 远端内容变化后重新下载仍是同一个名字，不能标记为 immutable
+DEFAULT_RULES = [
+    # data/ply 下的 PLY 模型体积大且不会原地修改（与 netlify.toml 一致）
+    (r'^/data/ply/[^/]+\.ply$', IMMUTABLE),
+]
+
+HASH_BUFSIZE = 1024 * 1024
+# 新增多少条记录后落盘一次
+SAVE_EVERY = 32
+
+
+class ETagIndex:
+    """文件内容哈希索引
+
+    key 为文件绝对路径，记录 (mtime_ns, size, etag)；mtime 或 size 变化时重新计算。
+    大文件（PLY）只在第一次请求或修改后哈希一次，重启服务器后从索引文件恢复。
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self._entries = {}
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._entries = {k: tuple(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._entries)
+            self._dirty = 0
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, path, fs):
+        """返回 path 当前内容的强 ETag（带引号）"""
+        key = os.path.abspath(path)
+        entry = self._entries.get(key)
+        if entry and entry[0] == fs.st_mtime_ns and entry[1] == fs.st_size:
+            return entry[2]
+
+        etag = '"%s"' % file_digest(key)
+        with self._lock:
+            self._entries[key] = (fs.st_mtime_ns, fs.st_size, etag)
+            self._dirty += 1
+            should_save = self._dirty >= SAVE_EVERY
+        if should_save:
+            self.save()
+        return etag
+
+
+class CachePolicy:
+    """按 URL 路径模式决定 Cache-Control"""
+
+    def __init__(self, rules=DEFAULT_RULES, default=REVALIDATE):
+        self.rules = [(re.compile(pattern), value) for pattern, value in rules]
+        self.default = default
+
+    def cache_control(self, url_path):
+        for pattern, value in self.rules:
+            if pattern.search(url_path):
+                return value
+        return self.default
+
+
+def file_digest(path):
+    """文件内容的 SHA-256（取前 32 位十六进制）"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_BUFSIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+
+def etag_matches(header_value, etag):
+    """If-None-Match 比较（弱比较，忽略 W/ 前缀）"""
+    if etag is None:
+        return False
+    if header_value.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in header_value.split(',')]
+    return any(tag[2:] == etag if tag.startswith('W/') else tag == etag for tag in candidates)
+
+
+class HotFileCache:
+    """小文件内存 LRU 缓存
+
+    key 为 (路径, mtime_ns, size)，文件修改后旧条目自然失效并被淘汰。
+    只缓存不超过 max_file_size 的文件，总字节数不超过 max_bytes。
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_file_size=2 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def accepts(self, fs):
+        return fs.st_size <= self.max_file_size and fs.st_size <= self.max_bytes
+
+    def get(self, path, fs, f):
+        """返回 (文件内容, 是否命中)；未命中时从已打开的文件对象 f 读取并放入缓存"""
+        key = (path, fs.st_mtime_ns, fs.st_size)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data, True
+            self.misses += 1
+
+        data = f.read()
+        if len(data) != fs.st_size:
+            # 读取期间文件被修改，不缓存
+            return data, False
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._size += len(data)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return data, False
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+            }
@@ -2,13 +2,27 @@
 """
 HTTPS 服务器，用于测试需要安全上下文的 Web API（如陀螺仪）
 使用自签名证书
+
+用法:
+    python3 scripts/https_server.py
+    python3 scripts/https_server.py --no-cache           # Safari 调试：强制禁止缓存
+    python3 scripts/https_server.py --write-buffer 512   # TLS 分块写缓冲区（KB）
+    python3 scripts/https_server.py --ecdsa              # 使用 ECDSA P-256 证书（握手比 RSA-4096 快得多）
+    python3 scripts/https_server.py --json-log access.log  # JSON 结构化访问日志
+指标: https://localhost:8443/__metrics（Prometheus）、/__metrics.json
 """
 
-import http.server
+import argparse
 import ssl
 import os
 import subprocess
 import sys
+import threading
+
+from http_cache import ETagIndex, HotFileCache
+from metrics import JSONAccessLog, Metrics
+from serve_modes import ThreadedHTTPServer
+from static_handler import StaticHandler
 
 # 配置
 PORT = 8443
@@ -16,22 +30,39 @@ DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CERT_DIR = os.path.join(DIRECTORY, 'certs')
 CERT_FILE = os.path.join(CERT_DIR, 'server.pem')
 KEY_FILE = os.path.join(CERT_DIR, 'server.key')
+ECDSA_CERT_FILE = os.path.join(CERT_DIR, 'server-ecdsa.pem')
+ECDSA_KEY_FILE = os.path.join(CERT_DIR, 'server-ecdsa.key')
+
+# keep-alive 配置
+KEEPALIVE_TIMEOUT = 15
+MAX_KEEPALIVE_REQUESTS = 100
+
+def cert_paths(ecdsa=False):
+    """返回 (证书, 私钥) 路径"""
+    if ecdsa:
+        return ECDSA_CERT_FILE, ECDSA_KEY_FILE
+    return CERT_FILE, KEY_FILE
 
-def generate_self_signed_cert():
-    """生成自签名证书"""
+def generate_self_signed_cert(ecdsa=False):
+    """生成自签名证书（默认 RSA-4096，ecdsa=True 时生成 ECDSA P-256）"""
     os.makedirs(CERT_DIR, exist_ok=True)
+    cert_file, key_file = cert_paths(ecdsa)
     
-    if os.path.exists(CERT_FILE) and os.path.exists(KEY_FILE):
-        print(f"证书已存在: {CERT_FILE}")
+    if os.path.exists(cert_file) and os.path.exists(key_file):
+        print(f"证书已存在: {cert_file}")
         return True
     
     print("生成自签名证书...")
     
     # 使用 openssl 生成证书
+    if ecdsa:
+        newkey = ['-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1']
+    else:
+        newkey = ['-newkey', 'rsa:4096']
     cmd = [
-        'openssl', 'req', '-x509', '-newkey', 'rsa:4096',
-        '-keyout', KEY_FILE,
-        '-out', CERT_FILE,
+        'openssl', 'req', '-x509', *newkey,
+        '-keyout', key_file,
+        '-out', cert_file,
         '-days', '365',
         '-nodes',
         '-subj', '/CN=localhost/O=Development/C=CN',
@@ -40,7 +71,7 @@ def generate_self_signed_cert():
     
     try:
         subprocess.run(cmd, check=True, capture_output=True)
-        print(f"证书已生成: {CERT_FILE}")
+        print(f"证书已生成: {cert_file}")
         return True
     except subprocess.CalledProcessError as e:
         print(f"生成证书失败: {e}")
@@ -62,7 +93,53 @@ def get_local_ip():
     except:
         return "127.0.0.1"
 
-class CustomHandler(http.server.SimpleHTTPRequestHandler):
+class TLSServer(ThreadedHTTPServer):
+    """每个连接一个线程的 HTTPS 服务器
+
+    accept 后不在主线程握手，而是在连接线程中握手，慢速客户端不会阻塞 accept；
+    同时统计完整握手与会话复用（session ticket / session cache）次数。
+    """
+
+    def __init__(self, server_address, RequestHandlerClass, context):
+        super().__init__(server_address, RequestHandlerClass)
+        self.context = context
+        self.handshakes = 0
+        self.resumed = 0
+        self.failed = 0
+        self._stats_lock = threading.Lock()
+
+    def get_request(self):
+        conn, addr = self.socket.accept()
+        return self.context.wrap_socket(conn, server_side=True, do_handshake_on_connect=False), addr
+
+    def finish_request(self, request, client_address):
+        request.settimeout(self.RequestHandlerClass.timeout)
+        try:
+            request.do_handshake()
+        except (ssl.SSLError, OSError):
+            # 客户端未信任自签名证书等，直接丢弃连接
+            with self._stats_lock:
+                self.failed += 1
+            return
+        with self._stats_lock:
+            self.handshakes += 1
+            if request.session_reused:
+                self.resumed += 1
+        super().finish_request(request, client_address)
+
+    def stats(self):
+        return {
+            'handshakes': self.handshakes,
+            'resumed': self.resumed,
+            'failed': self.failed,
+        }
+
+class CustomHandler(StaticHandler):
+    # HTTP/1.1 持久连接：一个页面的 ~80 个资源复用少量 TLS 连接
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    max_keepalive_requests = MAX_KEEPALIVE_REQUESTS
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
     
@@ -72,16 +149,52 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
         
-        # 强制禁止缓存 - 特别针对 Safari
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate, max-age=0')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
-        
+        # 缓存头由 StaticHandler 添加：默认 ETag + 按路径策略，--no-cache 时强制禁止缓存（Safari 调试用）
         super().end_headers()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='HTTPS 开发服务器')
+    parser.add_argument('--port', type=int, default=PORT, help=f'监听端口（默认 {PORT}）')
+    parser.add_argument('--ecdsa', action='store_true', help='使用 ECDSA P-256 证书')
+    parser.add_argument('--keepalive-timeout', type=int, default=KEEPALIVE_TIMEOUT,
+                        help=f'空闲连接超时秒数（默认 {KEEPALIVE_TIMEOUT}）')
+    parser.add_argument('--max-requests', type=int, default=MAX_KEEPALIVE_REQUESTS,
+                        help=f'每个连接最多处理的请求数（默认 {MAX_KEEPALIVE_REQUESTS}）')
+    parser.add_argument('--tls-tickets', type=int, default=2,
+                        help='每次握手下发的 TLS 1.3 session ticket 数（默认 2）')
+    parser.add_argument('--http10', action='store_true',
+                        help='旧行为：HTTP/1.0 短连接（用于对比压测）')
+    parser.add_argument('--no-tls-resumption', action='store_true',
+                        help='旧行为：禁用 TLS 会话复用（用于对比压测）')
+    parser.add_argument('--no-metrics', action='store_true', help='关闭 /__metrics 指标统计')
+    parser.add_argument('--json-log', nargs='?', const='-', metavar='PATH',
+                        help='JSON 结构化访问日志（缓冲、后台写出），不带 PATH 时写到 stderr')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='强制禁止缓存（no-store/Pragma/Expires），不做 ETag/304')
+    parser.add_argument('--hot-cache-mb', type=int, default=64,
+                        help='小文件内存 LRU 缓存大小（MB，0 表示关闭，默认 64）')
+    parser.add_argument('--write-buffer', type=int, default=256,
+                        help='TLS 分块写缓冲区大小（KB，默认 256）')
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    CustomHandler.no_cache = args.no_cache
+    CustomHandler.etag_index = ETagIndex()
+    CustomHandler.write_buffer_size = args.write_buffer * 1024
+    if args.hot_cache_mb > 0:
+        CustomHandler.hot_cache = HotFileCache(max_bytes=args.hot_cache_mb * 1024 * 1024)
+    if not args.no_metrics:
+        CustomHandler.metrics = Metrics(hot_cache=CustomHandler.hot_cache)
+    if args.json_log:
+        CustomHandler.access_log = JSONAccessLog(args.json_log)
+    CustomHandler.timeout = args.keepalive_timeout
+    CustomHandler.max_keepalive_requests = args.max_requests
+    if args.http10:
+        CustomHandler.protocol_version = 'HTTP/1.0'
+    
     # 生成证书
-    if not generate_self_signed_cert():
+    if not generate_self_signed_cert(ecdsa=args.ecdsa):
         print("\n无法生成证书，将使用 HTTP 模式")
         print("注意: iOS 陀螺仪功能需要 HTTPS!")
         use_https = False
@@ -93,22 +206,28 @@ def main():
     if use_https:
         # HTTPS 服务器
         context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-        context.load_cert_chain(CERT_FILE, KEY_FILE)
+        context.load_cert_chain(*cert_paths(args.ecdsa))
+        # 会话复用：TLS 1.3 用 session ticket，TLS 1.2 用 ticket 或服务端 session cache
+        if args.no_tls_resumption:
+            context.options |= ssl.OP_NO_TICKET
+            context.num_tickets = 0
+        else:
+            context.num_tickets = args.tls_tickets
         
-        server = http.server.HTTPServer(('0.0.0.0', PORT), CustomHandler)
-        server.socket = context.wrap_socket(server.socket, server_side=True)
+        server = TLSServer(('0.0.0.0', args.port), CustomHandler, context)
         
-        print(f"\n🔒 HTTPS 服务器已启动!")
+        print(f"\n🔒 HTTPS 服务器已启动! ({CustomHandler.protocol_version}, "
+              f"{'ECDSA' if args.ecdsa else 'RSA'} 证书)")
         print(f"\n访问地址:")
-        print(f"  本机: https://localhost:{PORT}/frontend/")
-        print(f"  局域网: https://{local_ip}:{PORT}/frontend/")
-        print(f"\n陀螺仪测试: https://{local_ip}:{PORT}/frontend/gyro-test.html")
-        print(f"3D 视差: https://{local_ip}:{PORT}/frontend/gsplat-viewer.html")
+        print(f"  本机: https://localhost:{args.port}/frontend/")
+        print(f"  局域网: https://{local_ip}:{args.port}/frontend/")
+        print(f"\n陀螺仪测试: https://{local_ip}:{args.port}/frontend/gyro-test.html")
+        print(f"3D 视差: https://{local_ip}:{args.port}/frontend/gsplat-viewer.html")
         print(f"\n⚠️ 首次访问需要在浏览器中信任自签名证书")
         print(f"   iOS: 设置 → 通用 → 关于本机 → 证书信任设置")
     else:
         # HTTP 服务器（备用）
-        server = http.server.HTTPServer(('0.0.0.0', 8080), CustomHandler)
+        server = ThreadedHTTPServer(('0.0.0.0', 8080), CustomHandler)
         print(f"\n⚠️ HTTP 服务器已启动 (陀螺仪可能无法工作)")
         print(f"\n访问地址:")
         print(f"  本机: http://localhost:8080/frontend/")
@@ -121,6 +240,14 @@ def main():
     except KeyboardInterrupt:
         print("\n服务器已停止")
         server.shutdown()
+    finally:
+        if CustomHandler.access_log:
+            CustomHandler.access_log.close()
+        CustomHandler.etag_index.save()
+        if isinstance(server, TLSServer):
+            print(f"TLS 握手: {server.stats()}")
+        if CustomHandler.hot_cache:
+            print(f"内存缓存: {CustomHandler.hot_cache.stats()}")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+开发服务器的请求指标与结构化访问日志
+- Metrics: 按路径模式分组的请求数、状态码、发送字节数、TTFB/总耗时直方图、缓存命中
+  通过 /__metrics（Prometheus 文本格式）和 /__metrics.json（JSON 快照）暴露
+- JSONAccessLog: 每个请求一行 JSON，先写入内存缓冲，由后台线程批量落盘
+
+prefork 模式下每个 worker 进程有各自独立的指标。
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# 路径模式分组，按顺序匹配第一条
+DEFAULT_GROUPS = [
+    ('ply', r'\.ply$'),
+    ('mirror_page', r'/mirrors/[^/]+/(?:index\.html)?$'),
+    ('mirror_asset', r'/mirrors/'),
+    ('cover', r'/covers/'),
+    ('html', r'(?:\.html?|/)$'),
+    ('css', r'\.css$'),
+    ('js', r'\.js$'),
+    ('image', r'\.(?:jpe?g|png|gif|webp|ico|svg)$'),
+]
+OTHER_GROUP = 'other'
+
+# 直方图桶（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = 'devserver'
+
+
+class Histogram:
+    """固定桶直方图（非累积计数，导出时再累加）"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """按桶上界估算分位数"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, total in self.cumulative():
+            if total >= target:
+                return bound if bound != float('inf') else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class Metrics:
+    """线程安全的请求指标"""
+
+    def __init__(self, groups=DEFAULT_GROUPS, hot_cache=None):
+        self.groups = [(name, re.compile(pattern)) for name, pattern in groups]
+        self.hot_cache = hot_cache
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)        # (group, status) -> n
+        self._bytes = defaultdict(int)           # group -> bytes
+        self._ttfb = defaultdict(Histogram)      # group -> Histogram
+        self._duration = defaultdict(Histogram)  # group -> Histogram
+        self._cache = defaultdict(int)           # result -> n
+
+    def group_for(self, path):
+        for name, pattern in self.groups:
+            if pattern.search(path):
+                return name
+        return OTHER_GROUP
+
+    def observe(self, path, status, nbytes, ttfb, duration, cache_result=None):
+        group = self.group_for(path)
+        with self._lock:
+            self._requests[(group, status)] += 1
+            self._bytes[group] += nbytes
+            if ttfb is not None:
+                self._ttfb[group].observe(ttfb)
+            self._duration[group].observe(duration)
+            if cache_result:
+                self._cache[cache_result] += 1
+
+    def snapshot(self):
+        """JSON 快照"""
+        with self._lock:
+            groups = {}
+            for (group, status), n in self._requests.items():
+                entry = groups.setdefault(group, {'requests': 0, 'status': {}, 'bytes': 0})
+                entry['requests'] += n
+                entry['status'][str(status)] = n
+            for group, entry in groups.items():
+                entry['bytes'] = self._bytes[group]
+                for name, hists in (('ttfb', self._ttfb), ('duration', self._duration)):
+                    h = hists.get(group)
+                    if h and h.count:
+                        entry[name] = {
+                            'count': h.count,
+                            'avg_ms': h.sum / h.count * 1000,
+                            'p50_ms': h.quantile(0.5) * 1000,
+                            'p99_ms': h.quantile(0.99) * 1000,
+                        }
+            cache = dict(self._cache)
+        if self.hot_cache is not None:
+            cache['hot_cache'] = self.hot_cache.stats()
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'groups': groups,
+            'cache': cache,
+        }
+
+    def prometheus(self):
+        """Prometheus 文本格式"""
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+        with self._lock:
+            header('requests_total', 'counter', 'Requests by path group and status code.')
+            for (group, status), n in sorted(self._requests.items()):
+                lines.append(f'{PREFIX}_requests_total{{group="{group}",status="{status}"}} {n}')
+
+            header('response_bytes_total', 'counter', 'Bytes sent (headers and body) by path group.')
+            for group, n in sorted(self._bytes.items()):
+                lines.append(f'{PREFIX}_response_bytes_total{{group="{group}"}} {n}')
+
+            for name, hists, help_text in (
+                ('ttfb_seconds', self._ttfb, 'Time from request parsed to headers flushed.'),
+                ('request_duration_seconds', self._duration, 'Total time to serve a request.'),
+            ):
+                header(name, 'histogram', help_text)
+                for group, h in sorted(hists.items()):
+                    for bound, total in h.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{PREFIX}_{name}_bucket{{group="{group}",le="{le}"}} {total}')
+                    lines.append(f'{PREFIX}_{name}_sum{{group="{group}"}} {h.sum:.6f}')
+                    lines.append(f'{PREFIX}_{name}_count{{group="{group}"}} {h.count}')
+
+            header('cache_responses_total', 'counter',
+                   'Responses by cache result (hot_hit, hot_miss, not_modified).')
+            for result, n in sorted(self._cache.items()):
+                lines.append(f'{PREFIX}_cache_responses_total{{result="{result}"}} {n}')
+
+        if self.hot_cache is not None:
+            stats = self.hot_cache.stats()
+            header('hot_cache_bytes', 'gauge', 'Bytes held in the in-memory hot file cache.')
+            lines.append(f'{PREFIX}_hot_cache_bytes {stats["bytes"]}')
+            header('hot_cache_entries', 'gauge', 'Entries in the in-memory hot file cache.')
+            lines.append(f'{PREFIX}_hot_cache_entries {stats["entries"]}')
+
+        header('uptime_seconds', 'gauge', 'Seconds since the server started.')
+        lines.append(f'{PREFIX}_uptime_seconds {time.time() - self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+
+class JSONAccessLog:
+    """缓冲的 JSON 访问日志
+
+    log() 只把记录追加到内存列表（热路径上不做 IO 和序列化），
+    后台线程每 flush_interval 秒或缓冲满 max_buffer 条时批量写出。
+    后台线程在首次 log() 时按进程启动，prefork fork 出的 worker 各自有自己的线程。
+    """
+
+    def __init__(self, path='-', flush_interval=1.0, max_buffer=1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        if path == '-':
+            self._stream = sys.stderr
+        else:
+            self._stream = open(path, 'a', encoding='utf-8', buffering=64 * 1024)
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='access-log', daemon=True)
+            self._thread.start()
+
+    def log(self, record):
+        if self._pid != os.getpid():
+            with self._lock:
+                self._ensure_thread()
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.max_buffer
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if records:
+            self._stream.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+            self._stream.flush()
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=5)
+        self.flush()
+        if self._stream is not sys.stderr:
+            self._stream.close()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except (OSError, ValueError):
+                pass
@@ -0,0 +1,994 @@
+#!/usr/bin/env python3
+"""
+mirrors 页面瘦身：重复的内联样式提取为 CSS 类，压缩空白，删除空的包装元素
+- hoist_styles: 同一页面中重复出现的 style="..."（公众号正文里几百个 section/span 带着同一段
+  -webkit-tap-highlight-color…font-family 的样式）提取为 :where(.hsN) 规则，写入 <head> 中的
+  一个 <style data-hoisted> 块，元素改为 class="hsN"；只在能省字节时提取。页面脚本会通过 el.style 改写的
+  属性（display、宽高、位置、transform 等，见 SCRIPTED_PROPS_RE）留在内联样式里，不提取
+- minify_html: 删除注释（条件注释除外），空白压缩为一个空格，块级元素边界与 <br> 两侧的空白删除；
+  删除空的包装元素（无属性或只有不影响尺寸的样式的 span/strong/section/div 等），只包着一个 <br> 的
+  行内包装元素换成这个 <br>；<pre>/<textarea>/<script>/<style> 与 white-space: pre* 的元素内不动。
+  display: none/contents 或带 hidden 属性的元素、<body> 中的 <script>/<style> 等不生成盒子，两侧的空白照常保留。
+  display 与 white-space 同样来自页面的 <style> 与 <link rel="stylesheet">（按简单选择器匹配，只往保留空白的
+  方向用）: style_custom.css 的 br{display:none} 让 <br> 两侧的空白照常渲染，white-space: pre-line 的
+  .bottomInfo 中的换行占一行
+
+优先级: 内联样式压过样式表中的普通声明、输给样式表中的 !important 声明；提取出的规则全部加 !important、
+用 :where() 把特异性降为 0，并放在页面已有样式表之前，得到同样的结果。原本就带 !important 的
+内联声明（压过样式表中的一切）留在元素上不提取。!important 的规则也压过脚本之后写入的普通内联样式，
+所以脚本会改写的属性不提取；脚本改写其他属性（如 color）的页面不要执行 hoist_styles。
+
+和其他改写脚本一样注册为 html_transforms.py 的变换，也可以在那里组成变换链执行；变换只拿到页面文本，
+读不到链接的样式表，链接了样式表的页面（mirrors 全部如此）在变换链中只删注释，瘦身用本脚本执行。
+
+用法:
+    python3 scripts/minify_mirrors.py                   # frontend/mirrors 下全部页面（记录快照）
+    python3 scripts/minify_mirrors.py --dry-run         # 只报告每个页面的字节数与 DOM 节点数
+    python3 scripts/minify_mirrors.py --self-check      # 渲染样式等价 + 幂等检查（不修改文件）
+    python3 scripts/minify_mirrors.py frontend/mirrors/08/index.html
+"""
+
+import argparse
+import html
+import os
+import re
+import sys
+from urllib.parse import unquote, urlparse
+
+from html_transforms import PROJECT_ROOT, discover_pages, register, write_text_atomic
+from snapshot_store import SnapshotStore
+
+HOIST_PREFIX = 'hs'
+HOIST_MARKER = 'data-hoisted'
+# 只提取这些正文排版元素的样式；img 等可能被脚本改写内联样式的元素不动
+HOIST_TAGS = {
+    'section', 'p', 'span', 'strong', 'em', 'b', 'i', 'u', 'a', 'font', 'div',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'ul', 'ol', 'li',
+}
+# 3D 模型容器及其内部的元素由前端脚本控制，不提取
+SKIP_HOIST_RE = re.compile(r'splat')
+# 页面脚本（mui.js、jQuery 的 show/hide/animate、zy_media 等）通过 el.style 写入的属性及其简写/分写，
+# 提取成 !important 规则后脚本写入的值不再生效，因此留在内联样式里
+SCRIPTED_PROPS_RE = re.compile(
+    r'^(-[a-z]+-)?(display|visibility|opacity|zoom|position|z-index|inset|top|right|bottom|left'
+    r'|(min-|max-)?(width|height)|margin(-.+)?|padding(-.+)?|overflow(-.+)?|transform(-.+)?|transition(-.+)?)$')
+
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr',
+}
+RAW_TEXT_TAGS = {'script', 'style', 'textarea', 'title', 'xmp'}
+PRESERVE_TAGS = {'pre', 'textarea', 'listing', 'plaintext'}
+# 默认 display: block 等的元素（渲染检查也按它换行）
+BLOCK_TAGS = {
+    'html', 'body', 'address', 'article', 'aside', 'blockquote', 'details', 'dialog', 'dd', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'header', 'hgroup', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table',
+    'tbody', 'thead', 'tfoot', 'tr', 'td', 'th', 'ul',
+}
+# 两侧的空白不会被渲染的元素: 块级元素、<br>、<head>
+BOUNDARY_TAGS = BLOCK_TAGS | {'br', 'head'}
+# 不渲染的元素: 在 <head> 中时两侧都是边界；在 <body> 中不生成盒子（display: none），两侧的空白照常合并
+HEAD_TAGS = {'title', 'meta', 'link', 'style', 'script', 'base', 'noscript', 'template'}
+WRAPPER_TAGS = {'span', 'strong', 'b', 'em', 'i', 'u', 'font', 'section', 'div'}
+INLINE_WRAPPER_TAGS = {'span', 'strong', 'b', 'em', 'i', 'u', 'font'}
+# 空元素上不影响布局的样式属性（带其他属性的空元素可能有尺寸、边距或撑开行高，保留）
+SAFE_EMPTY_PROPS = {
+    'color', 'caret-color', '-webkit-tap-highlight-color', 'text-align', 'text-indent',
+    'text-decoration', 'text-transform', 'letter-spacing', 'word-spacing', 'word-break',
+    'overflow-wrap', 'word-wrap', 'box-sizing', 'max-width', 'visibility', 'cursor',
+}
+
+TOKEN_RE = re.compile(r"""
+    (?P<comment><!--.*?-->)
+  | (?P<other><![^>]*>|<\?[^>]*>)
+  | (?P<end></(?P<end_name>[a-zA-Z][^\s/>]*)[^>]*>)
+  | (?P<start><(?P<start_name>[a-zA-Z][^\s/>]*)(?:"[^"]*"|'[^']*'|[^'">])*>)
+  | (?P<text>[^<]+|<)
+""", re.DOTALL | re.VERBOSE)
+ATTR_RE = re.compile(r"""\s*([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+))?""")
+WHITESPACE_RE = re.compile(r'[ \t\n\r\f]+')
+IMPORTANT_RE = re.compile(r'\s*!\s*important\s*$', re.IGNORECASE)
+HOISTED_RULE_RE = re.compile(r':where\(\.(%s\d+)\)\{([^}]*)\}' % HOIST_PREFIX)
+
+
+def tokenize(content):
+    """切分为 [(类型, 原文, 小写标签名)]，类型为 start/end/text/comment/other/raw；
+    ''.join(原文) 与输入完全相同。script/style 等元素的内容整体作为一个 raw 片段
+    """
+    tokens = []
+    pos = 0
+    while pos < len(content):
+        match = TOKEN_RE.match(content, pos)
+        for kind in ('comment', 'other', 'end', 'start', 'text'):
+            if match.group(kind) is not None:
+                break
+        name = (match.group('start_name') or match.group('end_name') or '').lower()
+        tokens.append((kind, match.group(kind), name))
+        pos = match.end()
+        if kind == 'start' and name in RAW_TEXT_TAGS and not match.group(kind).endswith('/>'):
+            close = re.compile(r'</%s[\s>/]' % re.escape(name), re.IGNORECASE).search(content, pos)
+            end = close.start() if close else len(content)
+            if end > pos:
+                tokens.append(('raw', content[pos:end], name))
+            pos = end
+    return tokens
+
+
+def parse_attrs(tag):
+    """起始标签的属性: {小写属性名: (值, 在标签中的起止位置)}，值已解码实体"""
+    attrs = {}
+    name_end = re.match(r'<[^\s/>]*', tag).end()
+    body_end = len(tag) - (2 if tag.endswith('/>') else 1)
+    for match in ATTR_RE.finditer(tag, name_end, body_end):
+        value = match.group(2) or ''
+        if value[:1] in ('"', "'"):
+            value = value[1:-1]
+        attrs.setdefault(match.group(1).lower(), (html.unescape(value), match.span()))
+    return attrs
+
+
+def parse_declarations(style):
+    """style 文本 → [(属性, 值, 是否 !important)]，同一属性按层叠规则只保留生效的一条；
+    忽略空值声明（浏览器同样忽略）
+    """
+    parts = []
+    depth = 0
+    quote = None
+    current = ''
+    for char in style:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(0, depth - 1)
+        elif char == ';' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    parts.append(current)
+
+    declarations = []
+    for part in parts:
+        prop, sep, value = part.partition(':')
+        prop = prop.strip().lower()
+        value = ' '.join(value.split())
+        important = bool(IMPORTANT_RE.search(value))
+        value = IMPORTANT_RE.sub('', value)
+        if not sep or not prop or not value:
+            continue
+        for i, (old_prop, _, old_important) in enumerate(declarations):
+            if old_prop == prop:
+                if old_important and not important:
+                    break
+                del declarations[i]
+                declarations.append((prop, value, important))
+                break
+        else:
+            declarations.append((prop, value, important))
+    return declarations
+
+
+def hoisted_rules(content):
+    """页面中已提取的规则 {类名: 声明}"""
+    rules = {}
+    for block in re.findall(r'<style %s>(.*?)</style>' % HOIST_MARKER, content, re.DOTALL):
+        rules.update(HOISTED_RULE_RE.findall(block))
+    return rules
+
+
+def element_style(attrs, rules):
+    """元素的样式声明: 已提取到 hsN 类中的规则在前，内联样式在后"""
+    style = ''
+    for class_name in attrs.get('class', ('', None))[0].split():
+        if class_name in rules:
+            style += rules[class_name] + ';'
+    return parse_declarations(style + attrs.get('style', ('', None))[0])
+
+
+# ---------------------------------------------------------------------------
+# 页面样式表: 决定空白是否渲染的 display、white-space 可能来自 <style> 块与 <link rel="stylesheet">
+# （mirrors 的 style_custom.css 里就有 br{display:none} 与 .article-content .bottomInfo{white-space:pre-line}）
+
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_PUNCT_RE = re.compile(r'[{};]')
+CSS_BRACE_RE = re.compile(r'[{}]')
+# 其中的规则照常针对元素（条件不判断）
+CONDITIONAL_AT_RULE_RE = re.compile(r'@(media|supports|document|layer)\b', re.IGNORECASE)
+STYLE_BLOCK_RE = re.compile(r'<style\b([^>]*)>(.*?)</style\s*>', re.DOTALL | re.IGNORECASE)
+LINK_TAG_RE = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+
+
+def parse_stylesheet(css):
+    """样式表文本 → [(选择器列表, [(属性, 值, 是否 !important)])]，按出现顺序
+
+    @media/@supports 中的规则不判断条件、按可能生效收入；@font-face/@keyframes 等不针对元素的块与
+    @import/@charset 语句跳过
+    """
+    css = CSS_COMMENT_RE.sub('', css)
+    rules = []
+    pos = 0
+    while pos < len(css):
+        match = CSS_PUNCT_RE.search(css, pos)
+        if match is None:
+            break
+        prelude = css[pos:match.start()].strip()
+        pos = match.end()
+        if match.group() != '{':
+            # 条件块的结尾，或 @import 等语句
+            continue
+        if CONDITIONAL_AT_RULE_RE.match(prelude):
+            continue
+        depth = 1
+        end = pos
+        while depth and end < len(css):
+            end = CSS_BRACE_RE.search(css, end)
+            end = end.end() if end else len(css)
+            depth += 1 if css[end - 1] == '{' else -1
+        if not prelude.startswith('@'):
+            rules.append((prelude, parse_declarations(css[pos:end - 1])))
+        pos = end
+    return rules
+
+
+def _split_selector(selector, separators):
+    """在括号、方括号与引号之外按 separators 中的字符切分，返回 [(分隔符, 片段)]（第一段的分隔符为 ''）"""
+    parts = []
+    depth = 0
+    quote = None
+    current = ''
+    separator = ''
+    for char in selector:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth = max(0, depth - 1)
+        elif char in separators and depth == 0:
+            if current.strip():
+                parts.append((separator, current.strip()))
+                separator = ''
+                current = ''
+            if char.strip():
+                separator = char
+            elif not separator:
+                separator = ' '
+            continue
+        current += char
+    if current.strip():
+        parts.append((separator, current.strip()))
+    return parts
+
+
+SIMPLE_SELECTOR_RE = re.compile(r"""
+    (?P<tag>\*|[a-zA-Z][\w-]*) | \#(?P<id>[\w-]+) | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<value>"[^"]*"|'[^']*'|[^\]\s]+)\s*(?P<flag>[iIsS])?\s*)?\]
+  | (?P<colons>::?)(?P<pseudo>[\w-]+)(?:\((?:[^()]|\([^()]*\))*\))?
+""", re.VERBOSE)
+# 生成内容的伪元素: 在元素内容的首/尾多出一个行内盒子
+GENERATED_PSEUDO = {'before', 'after'}
+# 不是元素本身的盒子，也不生成内容的伪元素（::first-line、::selection、::-webkit-scrollbar 等）
+OTHER_PSEUDO_RE = re.compile(r'^(first-line|first-letter|selection|placeholder|marker|backdrop|-webkit-.+|-moz-.+)$')
+
+
+def _compile_selector(selector):
+    """一个选择器 → (复合选择器 [(标签, id 元组, 类元组, 属性条件元组)]（从右往左）, 伪元素, 特异性)；
+    与元素本身无关（::first-line 等）时返回 None
+
+    按"可能匹配"处理: 伪类（:hover、:not()、:first-child 等）不判断，> 按后代处理，+ ~ 左侧的部分忽略。
+    """
+    compounds = []
+    for combinator, text in reversed(_split_selector(selector, ' \t\n\r\f>+~')):
+        compounds.append(text)
+        if combinator in ('+', '~'):
+            break
+    steps = []
+    pseudo = None
+    specificity = [0, 0, 0]
+    for i, text in enumerate(compounds):
+        tag = None
+        ids = []
+        classes = []
+        conditions = []
+        for match in SIMPLE_SELECTOR_RE.finditer(text):
+            name = match.group('pseudo')
+            if match.group('tag'):
+                tag = match.group('tag').lower()
+                specificity[2] += tag != '*'
+            elif match.group('id'):
+                ids.append(match.group('id'))
+                specificity[0] += 1
+            elif match.group('cls'):
+                classes.append(match.group('cls'))
+                specificity[1] += 1
+            elif match.group('attr'):
+                value = match.group('value') or ''
+                if value[:1] in ('"', "'"):
+                    value = value[1:-1]
+                conditions.append((match.group('attr').lower(), match.group('op'), value,
+                                   (match.group('flag') or '').lower() == 'i'))
+                specificity[1] += 1
+            elif name.lower() in GENERATED_PSEUDO or match.group('colons') == '::' or OTHER_PSEUDO_RE.match(name):
+                if i or name.lower() not in GENERATED_PSEUDO:
+                    return None
+                pseudo = name.lower()
+                specificity[2] += 1
+            else:
+                specificity[1] += 1
+        steps.append((tag, tuple(ids), tuple(classes), tuple(conditions)))
+    return steps, pseudo, tuple(specificity)
+
+
+def _node(name, attrs):
+    """选择器匹配用的元素描述: (标签, id, 类集合, {属性: 值})"""
+    return name, attrs.get('id', ''), frozenset(attrs.get('class', '').split()), attrs
+
+
+def _attr_matches(condition, attrs):
+    name, op, expected, ignore_case = condition
+    if name not in attrs:
+        return False
+    actual = attrs[name]
+    if ignore_case:
+        actual, expected = actual.lower(), expected.lower()
+    if op is None:
+        return True
+    if op == '=':
+        return actual == expected
+    if op == '~=':
+        return expected in actual.split()
+    if op == '|=':
+        return actual == expected or actual.startswith(expected + '-')
+    if not expected:
+        return False
+    return {'^=': actual.startswith, '$=': actual.endswith, '*=': actual.__contains__}[op](expected)
+
+
+def _compound_matches(compound, node):
+    tag, ids, classes, conditions = compound
+    return (tag in (None, '*', node[0]) and all(i == node[1] for i in ids) and node[2].issuperset(classes)
+            and all(_attr_matches(condition, node[3]) for condition in conditions))
+
+
+class PageStyles:
+    """页面样式表中的规则，按最右侧复合选择器的 id/类/标签分桶"""
+
+    def __init__(self, stylesheets):
+        self._buckets = {}
+        order = 0
+        for css in stylesheets:
+            for selectors, declarations in parse_stylesheet(css):
+                if not declarations:
+                    continue
+                for _, selector in _split_selector(selectors, ','):
+                    compiled = _compile_selector(selector)
+                    if compiled is None:
+                        continue
+                    steps, pseudo, specificity = compiled
+                    tag, ids, classes, _ = steps[0]
+                    key = ('#', ids[0]) if ids else ('.', classes[0]) if classes else (tag or '*')
+                    self._buckets.setdefault(key, []).append((order, steps, pseudo, specificity, declarations))
+                    order += 1
+
+    def match(self, node, ancestors):
+        """匹配 node 的规则 [(伪元素, 特异性, 顺序, 声明)]，按出现顺序；ancestors 为从近到远的祖先"""
+        candidates = [self._buckets.get('*', []), self._buckets.get(node[0], [])]
+        if node[1]:
+            candidates.append(self._buckets.get(('#', node[1]), []))
+        candidates += [self._buckets.get(('.', c), []) for c in node[2]]
+        matched = []
+        for order, steps, pseudo, specificity, declarations in sorted(r for bucket in candidates for r in bucket):
+            if not _compound_matches(steps[0], node):
+                continue
+            # 只有后代关系时，贪心地匹配最近的祖先即可
+            remaining = iter(ancestors)
+            if all(any(_compound_matches(step, ancestor) for ancestor in remaining) for step in steps[1:]):
+                matched.append((pseudo, specificity, order, declarations))
+        return matched
+
+
+def stylesheet_links(content):
+    """页面 <link rel="stylesheet"> 的 href，按文档顺序"""
+    hrefs = []
+    for tag in LINK_TAG_RE.findall(content):
+        attrs = parse_attrs(tag)
+        if 'stylesheet' in attrs.get('rel', ('', None))[0].lower().split() and attrs.get('href', ('', None))[0]:
+            hrefs.append(attrs['href'][0])
+    return hrefs
+
+
+def load_stylesheets(content, base_dir):
+    """读取页面链接的样式表（href 相对 base_dir），返回 [CSS 文本]；有外部 URL 或读不到的文件时返回 None"""
+    stylesheets = []
+    for href in stylesheet_links(content):
+        parsed = urlparse(href)
+        if parsed.scheme or parsed.netloc:
+            return None
+        try:
+            with open(os.path.join(base_dir, unquote(parsed.path)), 'r', encoding='utf-8', errors='replace') as f:
+                stylesheets.append(f.read())
+        except OSError:
+            return None
+    return stylesheets
+
+
+def page_styles(content, stylesheets=None):
+    """页面的样式规则: <style> 块（提取出的 hsN 规则除外）加上 stylesheets（链接的样式表的内容）
+
+    页面链接了样式表而 stylesheets 为 None 时样式未知，返回 None。
+    """
+    if stylesheets is None:
+        if stylesheet_links(content):
+            return None
+        stylesheets = []
+    blocks = [css for attrs, css in STYLE_BLOCK_RE.findall(content) if HOIST_MARKER not in attrs]
+    return PageStyles(blocks + list(stylesheets))
+
+
+def _display(declarations, hidden=False):
+    """'block'（按标签默认）/'inline'/'atomic'（inline-block 等，内部自成一块、外部是行内）/
+    'none'（不渲染）/'contents'（自身不生成盒子）；hidden 为元素带 hidden 属性（默认 display: none）
+    """
+    for prop, value, _ in declarations:
+        if prop == 'display':
+            if value in ('none', 'contents'):
+                return value
+            if value.startswith('inline'):
+                return 'inline' if value == 'inline' else 'atomic'
+            return 'block'
+    return 'none' if hidden else 'block'
+
+
+def _sheet_declarations(matched, pseudo=None):
+    """匹配的样式表规则中（pseudo 为 None 时是元素本身的）声明，不论层叠先后"""
+    return [declaration for p, _, _, declarations in matched if p == pseudo for declaration in declarations]
+
+
+def _sheet_may_inline(matched):
+    """样式表可能把元素设为 display: block 以外的值（此时按行内元素处理，两侧空白不删）"""
+    return any(prop == 'display' and _display([(prop, value, False)]) != 'block'
+               for prop, value, _ in _sheet_declarations(matched))
+
+
+def _sheet_harmless(name, matched):
+    """匹配的样式表规则都不会让空元素占位: 只有 SAFE_EMPTY_PROPS 与默认 display，没有 ::before/::after"""
+    default = 'block' if name in BLOCK_TAGS else 'inline'
+    return all(pseudo is None and all(prop in SAFE_EMPTY_PROPS or
+                                      (prop == 'display' and _display([(prop, value, False)]) == default)
+                                      for prop, value, _ in declarations)
+               for pseudo, _, _, declarations in matched)
+
+
+def _preserves_whitespace(name, declarations):
+    if name in PRESERVE_TAGS:
+        return True
+    return any(prop in ('white-space', 'white-space-collapse') and
+               re.match(r'pre|break-spaces|preserve', value)
+               for prop, value, _ in declarations)
+
+
+def _close(stack, name):
+    """弹出到与 name 匹配的起始标签（中间未闭合的元素一并弹出），返回它；没有匹配时返回 None"""
+    for i in range(len(stack) - 1, -1, -1):
+        if stack[i]['name'] == name:
+            entry = stack[i]
+            del stack[i:]
+            return entry
+    return None
+
+
+def _ancestors(stack):
+    """栈中元素的选择器描述，从近到远"""
+    return [entry['node'] for entry in reversed(stack)]
+
+
+def _droppable(entry, inner, styles, stack):
+    """entry 对应的元素是否为可以删除（或换成其中的 <br>）的空包装元素；stack 为它外层的元素"""
+    if entry['name'] not in WRAPPER_TAGS:
+        return None
+    attrs = entry['attrs']
+    if set(attrs) - {'style'}:
+        return None
+    if any(prop not in SAFE_EMPTY_PROPS for prop, _, _ in parse_declarations(attrs.get('style', ('', None))[0])):
+        return None
+    if not _sheet_harmless(entry['name'], entry['matched']):
+        return None
+    if all(kind == 'text' and not WHITESPACE_RE.sub('', raw) for kind, raw, _ in inner):
+        # 行内元素中的空白会渲染成空格，只删除完全为空的；块级元素中只有空白时同样不占空间
+        # （white-space: pre* 时空白本身占行，同样只删除完全为空的）
+        if not inner or (entry['name'] not in INLINE_WRAPPER_TAGS and not entry['preserve']):
+            return 'drop'
+    if (entry['name'] in INLINE_WRAPPER_TAGS and len(inner) == 1
+            and inner[0][0] == 'start' and inner[0][2] == 'br'):
+        # 去掉这层包装后 <br> 匹配的样式表规则不能变（如 span br{display:none}）
+        br = _node('br', {key: value for key, (value, _) in parse_attrs(inner[0][1]).items()})
+        outer = _ancestors(stack)
+        if styles.match(br, [entry['node']] + outer) == styles.match(br, outer):
+            return 'unwrap'
+    return None
+
+
+def _open_entry(name, raw, rules, styles, stack):
+    """起始标签在栈中的记录: 属性、选择器描述、匹配的样式表规则、是否（含继承）保留空白"""
+    attrs = parse_attrs(raw)
+    node = _node(name, {key: value for key, (value, _) in attrs.items()})
+    matched = styles.match(node, _ancestors(stack))
+    preserve = any(entry['preserve'] for entry in stack) or _preserves_whitespace(
+        name, element_style(attrs, rules) + _sheet_declarations(matched))
+    return {'name': name, 'attrs': attrs, 'node': node, 'matched': matched, 'preserve': preserve}
+
+
+def _drop_empty_wrappers(tokens, rules, styles):
+    output = []
+    stack = []
+    for token in tokens:
+        kind, raw, name = token
+        if kind == 'start' and name not in VOID_TAGS and not raw.endswith('/>'):
+            stack.append(dict(_open_entry(name, raw, rules, styles, stack), index=len(output)))
+        elif kind == 'end':
+            entry = _close(stack, name)
+            if entry is not None:
+                inner = output[entry['index'] + 1:]
+                action = _droppable(entry, inner, styles, stack)
+                if action == 'drop':
+                    del output[entry['index']:]
+                    continue
+                if action == 'unwrap':
+                    output[entry['index']:] = inner
+                    continue
+        output.append(token)
+    return output
+
+
+def _boundaries(tokens, rules, styles):
+    """每个 token 前、后的空白是否不会被渲染（位于行首/行尾: 块级元素的起止、<br>、<head> 中的元素；
+    inline-block 等元素只有内侧算），以及它是否位于保留空白的元素中
+
+    页面样式表只往保守的方向用: 可能把元素设为非块级（br{display:none}）时按行内元素处理；
+    可能设置 white-space: pre* 时保留空白；有 ::before/::after 时内侧紧挨着生成的行内盒子，不算边界。
+    """
+    before = []
+    after = []
+    preserve = []
+    stack = []
+    for kind, raw, name in tokens:
+        preserve.append(any(entry['preserve'] for entry in stack))
+        if kind == 'start':
+            entry = _open_entry(name, raw, rules, styles, stack)
+            if name in HEAD_TAGS:
+                display = 'block' if any(entry['name'] == 'head' for entry in stack) else 'inline'
+            elif name in BOUNDARY_TAGS:
+                display = _display(element_style(entry['attrs'], rules), 'hidden' in entry['attrs'])
+            else:
+                display = 'inline'
+            if display in ('none', 'contents') or _sheet_may_inline(entry['matched']):
+                # 不生成盒子: 两侧的文本在同一行内，空白照常合并、不能删
+                display = 'inline'
+            entry.update(display=display,
+                         generated_before=bool(_sheet_declarations(entry['matched'], 'before')),
+                         generated_after=bool(_sheet_declarations(entry['matched'], 'after')))
+            if name not in VOID_TAGS and not raw.endswith('/>'):
+                stack.append(entry)
+            before.append(display == 'block')
+            after.append(display != 'inline' and not entry['generated_before'])
+        elif kind == 'end':
+            # 结束标签按它自己的起始标签判断（display: inline-block 的 section 外侧不算边界）
+            entry = _close(stack, name)
+            display = entry['display'] if entry else ('block' if name in BOUNDARY_TAGS else 'inline')
+            before.append(display != 'inline' and not (entry and entry['generated_after']))
+            after.append(display == 'block')
+        else:
+            before.append(kind == 'other')
+            after.append(kind == 'other')
+    return before, after, preserve
+
+
+def _collapse_whitespace(tokens, rules, styles):
+    # 删掉包装元素后两侧的文本合并为一段，与重新切分的结果一致
+    merged = []
+    for token in tokens:
+        if token[0] == 'text' and merged and merged[-1][0] == 'text':
+            merged[-1] = ('text', merged[-1][1] + token[1], '')
+        else:
+            merged.append(token)
+    tokens = merged
+    before, after, preserve = _boundaries(tokens, rules, styles)
+
+    output = []
+    last = None
+    for i, (kind, raw, name) in enumerate(tokens):
+        if kind == 'text' and not preserve[i]:
+            text = WHITESPACE_RE.sub(' ', raw)
+            if text.startswith(' ') and (last is None or after[last]):
+                text = text[1:]
+            if text.endswith(' ') and (i + 1 == len(tokens) or before[i + 1]):
+                text = text[:-1]
+            if not text:
+                continue
+            raw = text
+        output.append((kind, raw, name))
+        last = i
+    return output
+
+
+@register('minify_html')
+def minify_html(content, stylesheets=None):
+    """删除注释与空的包装元素，压缩空白
+
+    stylesheets 为页面 <link rel="stylesheet"> 的内容（load_stylesheets）；页面链接了样式表而没有给出时
+    （如在 html_transforms.py 的变换链中），无法知道哪些元素保留空白、哪些不生成盒子，只删除注释。
+    """
+    tokens = [token for token in tokenize(content)
+              if token[0] != 'comment' or token[1].startswith('<!--[if')]
+    styles = page_styles(content, stylesheets)
+    if styles is not None:
+        rules = hoisted_rules(content)
+        tokens = _drop_empty_wrappers(tokens, rules, styles)
+        tokens = _collapse_whitespace(tokens, rules, styles)
+    return ''.join(raw for _, raw, _ in tokens)
+
+
+def _declarations_text(declarations, important=False):
+    return ';'.join(f'{prop}:{value}{"!important" if important or imp else ""}'
+                    for prop, value, imp in declarations)
+
+
+def _style_attr(declarations):
+    return f' style="{html.escape(_declarations_text(declarations))}"' if declarations else ''
+
+
+def _rule(class_name, declarations):
+    return f':where(.{class_name}){{{_declarations_text(declarations, important=True)}}}'
+
+
+def _rewrite_tag(raw, attrs, class_name, remaining):
+    """style 属性换成 remaining 中的声明（为空时去掉）；class_name 不为空时加到 class 属性（没有时新建）"""
+    edits = []
+    style_span = attrs['style'][1]
+    if class_name and 'class' in attrs:
+        value, span = attrs['class']
+        edits.append((span, f' class="{html.escape(value + " " + class_name)}"'))
+        edits.append((style_span, _style_attr(remaining)))
+    else:
+        edits.append((style_span, (f' class="{class_name}"' if class_name else '') + _style_attr(remaining)))
+    for (start, end), text in sorted(edits, reverse=True):
+        raw = raw[:start] + text + raw[end:]
+    return raw
+
+
+@register('hoist_styles')
+def hoist_styles(content):
+    """重复的内联样式提取为 CSS 类"""
+    if HOIST_MARKER in content:
+        return content
+    tokens = tokenize(content)
+    # 第一遍: 统计每个候选元素的样式
+    candidates = {}
+    counts = {}
+    stack = []
+    for i, (kind, raw, name) in enumerate(tokens):
+        if kind == 'end':
+            _close(stack, name)
+            continue
+        if kind != 'start':
+            continue
+        attrs = parse_attrs(raw)
+        if re.search(r'(^|\s)%s\d+(\s|$)' % HOIST_PREFIX, attrs.get('class', ('', None))[0]):
+            # 页面里已经有同名的类
+            return content
+        skip = any(entry['skip'] for entry in stack) or any(
+            SKIP_HOIST_RE.search(attrs.get(key, ('', None))[0]) for key in ('class', 'id'))
+        if name not in VOID_TAGS and not raw.endswith('/>'):
+            stack.append({'name': name, 'skip': skip})
+        if 'style' not in attrs or skip:
+            continue
+        declarations = parse_declarations(attrs['style'][0])
+        # 原本带 !important 的声明（内联 !important 压过样式表中的一切）与脚本会改写的属性留在内联样式里
+        key = tuple(d for d in declarations if not d[2] and not SCRIPTED_PROPS_RE.match(d[0]))
+        remaining = [d for d in declarations if d not in key]
+        if not declarations:
+            candidates[i] = (attrs, None, [])
+        elif name in HOIST_TAGS and key and not any('<' in value for _, value, _ in key):
+            candidates[i] = (attrs, key, remaining)
+            start, end = attrs['style'][1]
+            count, saved = counts.get(key, (0, 0))
+            counts[key] = (count + 1, saved + end - start - len(_style_attr(remaining)))
+
+    # 提取后每个元素多出 class="hsN"，页面多一条规则；能省字节的才提取
+    classes = {}
+    rules = []
+    for key, (count, saved) in counts.items():
+        class_name = f'{HOIST_PREFIX}{len(classes)}'
+        rule = _rule(class_name, key)
+        if count > 1 and saved - count * len(f' class="{class_name}"') - len(rule) > 0:
+            classes[key] = class_name
+            rules.append(rule)
+
+    # 样式块放在 <head> 中第一个样式表之前（没有时放在 </head> 前），同特异性时页面样式表在后、优先
+    insert_at = None
+    for i, (kind, raw, name) in enumerate(tokens):
+        if kind == 'start' and (name == 'style' or (name == 'link' and 'stylesheet' in raw.lower())):
+            insert_at = i
+            break
+        if (kind == 'end' and name == 'head') or (kind == 'start' and name == 'body'):
+            insert_at = i if name == 'head' else None
+            break
+    if insert_at is None:
+        return content
+
+    changed = False
+    for i, (attrs, key, remaining) in candidates.items():
+        if key is None or key in classes:
+            kind, raw, name = tokens[i]
+            tokens[i] = (kind, _rewrite_tag(raw, attrs, classes.get(key), remaining), name)
+            changed = True
+    if not changed:
+        return content
+    if rules:
+        tokens.insert(insert_at, ('raw', f'<style {HOIST_MARKER}>{"".join(rules)}</style>', 'style'))
+    return ''.join(raw for _, raw, _ in tokens)
+
+
+def count_nodes(content):
+    """DOM 节点数（元素、文本、注释等，按 html_doc 的解析结果）"""
+    from html_doc import parse
+    return sum(1 for _ in parse(content).descendants)
+
+
+def _file_rewrite(func, file_path, snapshot=None):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        original = f.read()
+    content = func(original)
+    if content == original:
+        return False
+    if snapshot is not None:
+        snapshot.record(file_path, original, content)
+    write_text_atomic(file_path, content)
+    return True
+
+
+def minify_page(content, stylesheets=None):
+    """minify_html + hoist_styles"""
+    return hoist_styles(minify_html(content, stylesheets))
+
+
+def minify_file(file_path, snapshot=None):
+    """单个文件执行 minify_html（读取页面链接的样式表）"""
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    return _file_rewrite(lambda content: minify_html(content, load_stylesheets(content, base_dir)),
+                         file_path, snapshot)
+
+
+def hoist_styles_file(file_path, snapshot=None):
+    """单个文件执行 hoist_styles"""
+    return _file_rewrite(hoist_styles, file_path, snapshot)
+
+
+# ---------------------------------------------------------------------------
+# 渲染样式等价检查
+
+def _effective_style(element, rules):
+    """元素最终得到的声明 {属性: (值, 是否 !important)}: 提取出的规则（还原为普通声明）加上内联样式
+
+    脚本会改写的属性来自提取出的规则时记为 'hoisted'，与内联样式不等价（脚本写入的内联值会输给它）。
+    """
+    style = {}
+    for class_name in element.get('class') or []:
+        if class_name in rules:
+            style.update((prop, (value, 'hoisted' if SCRIPTED_PROPS_RE.match(prop) else False))
+                         for prop, value, _ in parse_declarations(rules[class_name]))
+    style.update((prop, (value, imp)) for prop, value, imp in parse_declarations(element.get('style', '')))
+    return style
+
+
+def _signature(element, rules):
+    attrs = {}
+    for key, value in element.attrs.items():
+        if key == 'class':
+            value = [c for c in value if c not in rules]
+            if not value:
+                continue
+        if key != 'style':
+            attrs[key] = value
+    return element.name, attrs, _effective_style(element, rules)
+
+
+def _bs4_node(element):
+    return _node(element.name, {key: ' '.join(value) if isinstance(value, list) else value
+                                for key, value in element.attrs.items()})
+
+
+def _cascade(element, rules, styles):
+    """元素最终的 display、white-space 等声明 [(属性, 值, 是否 !important)] 与生成内容的伪元素集合:
+    样式表规则按 !important、特异性、先后层叠，内联样式（含还原的提取规则）在同等重要性下优先
+    """
+    ancestors = [_bs4_node(parent) for parent in element.parents if parent.name != '[document]']
+    matched = styles.match(_bs4_node(element), ancestors)
+    winners = {}
+    for pseudo, specificity, order, declarations in matched:
+        if pseudo is None:
+            for prop, value, important in declarations:
+                key = (important, 0, specificity, order)
+                if prop not in winners or key > winners[prop][0]:
+                    winners[prop] = (key, value)
+    for prop, (value, important) in _effective_style(element, rules).items():
+        # 提取出的脚本属性来自 :where(.hsN){...!important}: 特异性 0、位于页面样式表之前
+        key = (True, 0, (0, 0, 0), -1) if important == 'hoisted' else (bool(important), 1, (0, 0, 0), 0)
+        if prop not in winners or key > winners[prop][0]:
+            winners[prop] = (key, value)
+    generated = {pseudo for pseudo, _, _, declarations in matched
+                 if pseudo and any(prop == 'content' and value not in ('none', 'normal')
+                                   for prop, value, _ in declarations)}
+    return [(prop, value, key[0]) for prop, (key, value) in winners.items()], generated
+
+
+def _rendered_text(element, rules, styles, out, preserve=False):
+    """近似的渲染文本: 块级元素与 <br> 处换行，inline-block 等内部首尾空白不显示，其余空白合并
+
+    保留空白的元素中的换行记为 \\r，不与块级元素边界的换行合并；::before/::after 的生成内容记为 \\ufffc。
+    """
+    from bs4 import Comment, NavigableString
+    for child in element.children:
+        if isinstance(child, Comment):
+            continue
+        if isinstance(child, NavigableString):
+            out.append(str(child).replace('\n', '\r') if preserve else WHITESPACE_RE.sub(' ', str(child)))
+            continue
+        name = child.name
+        if name in ('script', 'style', 'title', 'template', 'head'):
+            continue
+        declarations, generated = _cascade(child, rules, styles)
+        display = _display(declarations, child.has_attr('hidden'))
+        if display == 'none':
+            continue
+        if name == 'br':
+            out.append('\n')
+            continue
+        if name not in BLOCK_TAGS and display == 'block' and not any(prop == 'display' for prop, _, _ in declarations):
+            display = 'inline'
+        inner = _rendered_text(child, rules, styles, [], preserve or _preserves_whitespace(name, declarations))
+        inner = ['\ufffc' if 'before' in generated else ''] + inner + ['\ufffc' if 'after' in generated else '']
+        if display == 'block':
+            out += ['\n'] + inner + ['\n']
+        elif display == 'atomic':
+            out.append(normalize_rendered_text(''.join(inner)))
+        else:
+            out += inner
+    return out
+
+
+def normalize_rendered_text(text):
+    text = re.sub(r' *\n[\n ]*', '\n', text)
+    return re.sub(r' {2,}', ' ', text).strip()
+
+
+def compare_rendering(before, after, stylesheets=None):
+    """比较改写前后的页面，返回差异说明列表（空列表为等价）
+
+    - 每个元素（按文档顺序）标签、属性与最终样式声明相同；改写后少掉的只能是空的包装元素
+    - 按块级元素换行、合并空白之后的文本相同；display、white-space 按页面的 <style> 与
+      stylesheets（链接的样式表的内容，没有给出时只用 <style>）层叠
+    """
+    from html_doc import parse
+    soup_before, soup_after = parse(before), parse(after)
+    rules_before, rules_after = hoisted_rules(before), hoisted_rules(after)
+    elements_after = [el for el in soup_after.find_all(True) if not el.has_attr(HOIST_MARKER)]
+    problems = []
+    j = 0
+    for element in (el for el in soup_before.find_all(True) if not el.has_attr(HOIST_MARKER)):
+        signature = _signature(element, rules_before)
+        if j < len(elements_after) and _signature(elements_after[j], rules_after) == signature:
+            j += 1
+            continue
+        empty = not element.get_text().strip() and all(child.name == 'br' for child in element.find_all(True))
+        harmless = set(element.attrs) <= {'style'} and set(signature[2]) <= SAFE_EMPTY_PROPS
+        if element.name in WRAPPER_TAGS and empty and harmless:
+            continue
+        got = _signature(elements_after[j], rules_after) if j < len(elements_after) else None
+        problems.append(f"元素不一致: {signature[0]} {signature[2]} → {got[0] if got else '（缺失）'} "
+                        f"{got[2] if got else ''}")
+        break
+    if not problems and j != len(elements_after):
+        problems.append(f"改写后多出 {len(elements_after) - j} 个元素")
+    styles_before = page_styles(before, stylesheets or [])
+    styles_after = page_styles(after, stylesheets or [])
+    text_before = normalize_rendered_text(''.join(_rendered_text(soup_before, rules_before, styles_before, [])))
+    text_after = normalize_rendered_text(''.join(_rendered_text(soup_after, rules_after, styles_after, [])))
+    if text_before != text_after:
+        for i, (a, b) in enumerate(zip(text_before, text_after)):
+            if a != b:
+                break
+        else:
+            i = min(len(text_before), len(text_after))
+        problems.append(f"渲染文本不一致（第 {i} 个字符）: {text_before[max(0, i - 20):i + 20]!r} → "
+                        f"{text_after[max(0, i - 20):i + 20]!r}")
+    return problems
+
+
+def self_check(paths):
+    """对每个页面检查渲染样式等价与幂等，返回有问题的页面数"""
+    failed = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            original = f.read()
+        stylesheets = load_stylesheets(original, os.path.dirname(os.path.abspath(path)))
+        result = minify_page(original, stylesheets)
+        again = minify_page(result, stylesheets)
+        problems = compare_rendering(original, result, stylesheets)
+        if stylesheets is None:
+            problems.append('链接的样式表读不到（只删除了注释），渲染检查没有用到它们')
+        if again != result:
+            problems.append('不幂等: 对输出再执行一次仍有改动')
+        name = os.path.relpath(path, PROJECT_ROOT)
+        if problems:
+            failed += 1
+            print(f"  ✗ {name}")
+            for problem in problems:
+                print(f"      {problem}")
+        else:
+            print(f"  ✓ {name}: {len(original.encode('utf-8'))} → {len(result.encode('utf-8'))} 字节")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='mirrors 页面瘦身: 提取重复内联样式、压缩 HTML')
+    parser.add_argument('files', nargs='*', help='要处理的 HTML（默认 frontend/mirrors 下全部页面）')
+    parser.add_argument('--dry-run', action='store_true', help='只报告，不写文件')
+    parser.add_argument('--self-check', action='store_true', help='渲染样式等价与幂等检查（不修改文件）')
+    args = parser.parse_args()
+
+    paths = args.files or discover_pages(match=None)
+
+    if args.self_check:
+        print(f"🔍 渲染样式等价检查: {len(paths)} 个页面\n")
+        failed = self_check(paths)
+        if failed:
+            print(f"\n❌ {failed} 个页面不通过")
+            sys.exit(1)
+        print("\n✨ 全部通过")
+        return
+
+    print(f"🗜️ 页面瘦身{'（dry-run）' if args.dry_run else ''}: {len(paths)} 个页面\n")
+    print(f"{'页面':<32} {'字节':>18} {'DOM 节点':>14} {'提取类':>6}")
+    totals = [0, 0, 0, 0]
+    snapshot = None if args.dry_run else SnapshotStore().begin('minify_mirrors')
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            original = f.read()
+        stylesheets = load_stylesheets(original, os.path.dirname(os.path.abspath(path)))
+        if stylesheets is None:
+            print(f"  ⚠️ {os.path.relpath(path, PROJECT_ROOT)}: 链接的样式表读不到，只删除注释")
+        content = minify_page(original, stylesheets)
+        size_before, size_after = len(original.encode('utf-8')), len(content.encode('utf-8'))
+        nodes_before, nodes_after = count_nodes(original), count_nodes(content)
+        classes = len(HOISTED_RULE_RE.findall(content)) - len(HOISTED_RULE_RE.findall(original))
+        name = os.path.relpath(path, PROJECT_ROOT)
+        print(f"{name:<32} {size_before:>7} → {size_after:>7} {nodes_before:>5} → {nodes_after:>5} {classes:>6}"
+              f"  {(1 - size_after / size_before) * 100 if size_before else 0:>5.1f}%")
+        for i, value in enumerate((size_before, size_after, nodes_before, nodes_after)):
+            totals[i] += value
+        if content != original and snapshot is not None:
+            snapshot.record(path, original, content)
+            write_text_atomic(path, content)
+    if snapshot is not None:
+        snapshot.end()
+
+    print(f"\n✨ 合计 {totals[0] / 1024:.0f}KB → {totals[1] / 1024:.0f}KB"
+          f"（-{(1 - totals[1] / totals[0]) * 100 if totals[0] else 0:.1f}%），"
+          f"DOM 节点 {totals[2]} → {totals[3]}")
+    if snapshot is not None:
+        print(f"📸 快照 {snapshot.id}，回滚: python3 scripts/snapshot_store.py rollback {snapshot.id}")
+        print("   .gz/.br 预压缩文件需重新生成: python3 scripts/build_compressed.py")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+多进程 prefork 模式
+父进程只负责监督: fork N 个 worker 共享监听 socket（继承 fd，或各自以 SO_REUSEPORT 绑定），
+worker 异常退出时自动重启；Ctrl+C / SIGTERM 时通知所有 worker 优雅退出。
+仅支持 POSIX（Linux / macOS）。
+"""
+
+import os
+import signal
+import threading
+import time
+
+# worker 收到 SIGTERM 后等待进行中请求完成的最长秒数
+GRACE_PERIOD = 10.0
+# 启动后这么快就退出的 worker 视为崩溃循环，重启前先等待
+CRASH_BACKOFF = 1.0
+POLL_INTERVAL = 0.2
+
+
+def supports_prefork():
+    return hasattr(os, 'fork')
+
+
+def run_worker(server, on_exit=None):
+    """worker 主循环：serve_forever 在后台线程运行，主线程等待 SIGTERM"""
+    # Ctrl+C 会发给整个进程组，worker 忽略 SIGINT，由父进程统一发送 SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    baseline = threading.active_count()
+    serve_thread = threading.Thread(target=server.serve_forever, name='serve', daemon=True)
+    serve_thread.start()
+    while not stop.wait(0.5):
+        if not serve_thread.is_alive():
+            break
+
+    # 停止 accept，再等待进行中的请求线程结束
+    server.shutdown()
+    server.server_close()
+    deadline = time.monotonic() + GRACE_PERIOD
+    while threading.active_count() > baseline and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    if on_exit:
+        on_exit()
+
+
+def serve_prefork(server_factory, workers, reuse_port=False, on_worker_exit=None):
+    """以 prefork 方式运行服务器
+
+    server_factory(reuse_port) 返回一个已绑定并监听的服务器实例。
+    reuse_port=False 时父进程创建一次，worker 继承同一个监听 fd；
+    reuse_port=True 时每个 worker 各自以 SO_REUSEPORT 绑定，由内核做负载均衡。
+    """
+    shared = None if reuse_port else server_factory(False)
+    if shared is not None:
+        # 多个进程在同一个 fd 上 accept，没抢到连接的 worker 不能阻塞在 accept 上；
+        # 设置超时（而非非阻塞）还能让 accept 返回的连接保持阻塞模式
+        shared.socket.settimeout(POLL_INTERVAL)
+    children = {}
+    stopping = threading.Event()
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                server = shared if shared is not None else server_factory(True)
+                run_worker(server, on_worker_exit)
+            except BaseException:
+                import traceback
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (slot, time.monotonic())
+        return pid
+
+    def request_stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    for slot in range(workers):
+        spawn(slot)
+    print(f"👷 已启动 {workers} 个 worker: {', '.join(str(pid) for pid in children)}")
+
+    try:
+        while not stopping.is_set():
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid == 0:
+                time.sleep(POLL_INTERVAL)
+                continue
+            slot, started = children.pop(pid, (None, 0.0))
+            if slot is None or stopping.is_set():
+                continue
+            print(f"⚠️ worker {pid} 异常退出 (status {status})，重启中...")
+            if time.monotonic() - started < CRASH_BACKOFF:
+                time.sleep(CRASH_BACKOFF)
+            spawn(slot)
+    finally:
+        _stop_children(children)
+        if shared is not None:
+            shared.server_close()
+
+
+def _stop_children(children):
+    """SIGTERM 所有 worker，超时后 SIGKILL"""
+    for pid in list(children):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            children.pop(pid, None)
+
+    deadline = time.monotonic() + GRACE_PERIOD + 2
+    while children and time.monotonic() < deadline:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.05)
+        else:
+            children.pop(pid, None)
+
+    for pid in list(children):
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
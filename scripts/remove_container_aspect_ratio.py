@@ -2,37 +2,48 @@
 """移除splat-container的aspect-ratio限制，让容器自适应canvas"""
 
 import re
-import os
 
-mirrors_base = '/Volumes/Prism/sharp2/mirrors'
-mirror_dirs = ['01', '02', '04', '07', '08']
+from html_transforms import discover_pages, register
+from snapshot_store import SnapshotStore
 
-for mirror_dir in mirror_dirs:
-    index_path = os.path.join(mirrors_base, mirror_dir, 'index.html')
-    
-    if not os.path.exists(index_path):
-        continue
-    
-    with open(index_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
+@register('remove_aspect_ratio')
+def move_aspect_ratio_to_canvas(content):
+    """去掉容器的 aspect-ratio，canvas 改为相对定位并自带 16:9"""
     # 移除容器style中的aspect-ratio:16/9;
     content = re.sub(
         r'(<div class="splat-container"[^>]*style="[^"]*?)aspect-ratio:16/9;',
         r'\1',
         content
     )
-    
+
     # 修改canvas的style：从absolute改为relative，添加aspect-ratio
-    content = re.sub(
+    return re.sub(
         r'<canvas class="gsplat-canvas" style="position:absolute;top:0;left:0;width:100%;height:100%;display:block;">',
         '<canvas class="gsplat-canvas" style="position:relative;width:100%;aspect-ratio:16/9;display:block;">',
         content
     )
-    
+
+def remove_aspect_ratio(index_path, snapshot=None):
+    """处理单个文件（直接覆盖，snapshot 不为空时先记录改写前后的内容）"""
+    with open(index_path, 'r', encoding='utf-8') as f:
+        original = f.read()
+
+    content = move_aspect_ratio_to_canvas(original)
+    if snapshot is not None and content != original:
+        snapshot.record(index_path, original, content)
+
     with open(index_path, 'w', encoding='utf-8') as f:
         f.write(content)
-    
-    print(f'✅ 已更新: {index_path}')
 
-print('\n完成！容器现在会自适应16:9的canvas')
+def main():
+    # frontend/mirrors 下含 3D 模型容器的页面
+    with SnapshotStore().begin('remove_container_aspect_ratio') as run:
+        for index_path in discover_pages():
+            remove_aspect_ratio(index_path, run)
+
+            print(f'✅ 已更新: {index_path}')
+
+    print('\n完成！容器现在会自适应16:9的canvas')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+爬虫的 HTTP 响应缓存（Downloader 透明使用）
+- 响应体按 SHA-256 内容寻址保存在 .cache/http/blobs/，相同内容只存一份
+- 索引（SQLite）以 方法 + URL + 响应 Vary 指定的请求头 为键，保存状态码与响应头
+- TTL 内直接从磁盘返回；过期后带上缓存的 ETag / Last-Modified 重新验证，304 则续期
+- 总大小超过上限时按最近访问时间（LRU）淘汰
+- offline 模式只从缓存返回（不论是否过期），未命中即失败，不访问网络：
+  解析逻辑的开发与回归以磁盘速度运行，结果可重复
+
+只缓存 200 响应；带 Range 的请求（续传）不写入缓存。请求本身带条件头（抓取清单发出的
+If-None-Match / If-Modified-Since）且与缓存的校验器一致时，直接返回 304。
+服务器的 Cache-Control 不参与判断（开发用缓存，以 TTL 为准），Vary: * 的响应不缓存。
+
+用法:
+    python3 scripts/response_cache.py            # 查看缓存统计
+    python3 scripts/response_cache.py --prune    # 删除过期条目并按大小上限淘汰
+    python3 scripts/response_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from requests.structures import CaseInsensitiveDict
+
+from crawl_manifest import PROJECT_ROOT
+
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'http')
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+
+MODES = ('use', 'refresh', 'offline', 'off')
+
+# 不随缓存的响应一起返回的头（传输层相关，或因为保存的是解码后的内容而失效）
+HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length',
+               'set-cookie', 'date', 'age'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    base TEXT NOT NULL,
+    vary TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body_sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_base ON entries (base);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+def cache_key(method, url, vary_names, request_headers):
+    """方法 + URL + Vary 列出的请求头（名称小写排序）"""
+    parts = [method.upper(), url]
+    for name in vary_names:
+        parts.append(f'{name}:{request_headers.get(name, "")}')
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def parse_vary(value):
+    """Vary 头 → 排序后的小写头名列表；Vary: * 返回 None（不可缓存）"""
+    names = sorted({v.strip().lower() for v in (value or '').split(',') if v.strip()})
+    if '*' in names:
+        return None
+    return names
+
+
+class CachedResponse:
+    """从缓存返回的响应，提供 Downloader 用到的 status_code / headers / iter_content"""
+
+    def __init__(self, status_code, headers, body_path=None, from_cache=True):
+        self.status_code = status_code
+        self.headers = headers
+        self.body_path = body_path
+        self.from_cache = from_cache
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        if self.body_path is None:
+            return
+        with open(self.body_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+
+
+class CacheEntry:
+    """索引中的一条记录"""
+
+    def __init__(self, cache, row):
+        (self.key, self.base, vary, self.status, headers, self.body_sha256, self.size,
+         self.stored_at, self.accessed_at) = row
+        self.cache = cache
+        self.vary = json.loads(vary)
+        self.headers = CaseInsensitiveDict(json.loads(headers))
+
+    def fresh(self):
+        return time.time() - self.stored_at < self.cache.ttl
+
+    def validators(self):
+        """用于过期后重新验证的条件请求头"""
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+    def satisfies(self, request_headers):
+        """请求的条件头与缓存的校验器一致（客户端的副本就是这份内容）"""
+        inm = request_headers.get('If-None-Match')
+        if inm:
+            etag = self.headers.get('ETag')
+            return bool(etag) and etag in [t.strip() for t in inm.split(',')]
+        ims = request_headers.get('If-Modified-Since')
+        return bool(ims) and ims == self.headers.get('Last-Modified')
+
+    def response(self, request_headers):
+        self.cache.touch(self.key)
+        if self.satisfies(request_headers):
+            return CachedResponse(304, CaseInsensitiveDict(self.headers))
+        headers = CaseInsensitiveDict(self.headers)
+        headers['Content-Length'] = str(self.size)
+        return CachedResponse(self.status, headers, self.cache.blob_path(self.body_sha256))
+
+
+class TeeResponse:
+    """包装网络响应: 读取响应体的同时写入临时文件，完整读完后在 close() 时存入缓存"""
+
+    def __init__(self, cache, resp, key, base, vary):
+        self.cache = cache
+        self.resp = resp
+        self.status_code = resp.status_code
+        self.headers = resp.headers
+        self.key = key
+        self.base = base
+        self.vary = vary
+        self.complete = False
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.tmp_dir, suffix='.body')
+        self._file = os.fdopen(fd, 'wb')
+        self._hasher = hashlib.sha256()
+        self._size = 0
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        for chunk in self.resp.iter_content(chunk_size):
+            self._file.write(chunk)
+            self._hasher.update(chunk)
+            self._size += len(chunk)
+            yield chunk
+        self.complete = True
+
+    def close(self):
+        """响应体读完则存入缓存，否则（中途出错、超过大小上限）丢弃"""
+        self._file.close()
+        if self.complete:
+            self.cache.store(self.key, self.base, self.vary, self.status_code, self.headers,
+                             self.tmp_path, self._hasher.hexdigest(), self._size)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class ResponseCache:
+    """线程安全的响应缓存；mode 见 MODES（refresh: 不读缓存但写入新响应）"""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, mode='use'):
+        if mode not in MODES:
+            raise ValueError(f'未知的缓存模式: {mode}')
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+    @property
+    def offline(self):
+        return self.mode == 'offline'
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def lookup(self, method, url, request_headers):
+        """返回与请求匹配的 CacheEntry（不论是否过期），没有时返回 None"""
+        if self.mode in ('refresh', 'off'):
+            return None
+        base = f'{method.upper()} {url}'
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM entries WHERE base = ?', (base,)).fetchall()
+        for row in rows:
+            entry = CacheEntry(self, row)
+            if entry.key == cache_key(method, url, entry.vary, request_headers) and \
+                    os.path.exists(self.blob_path(entry.body_sha256)):
+                return entry
+        return None
+
+    def touch(self, key, renew=False):
+        """记录访问时间（LRU）；renew=True 时重新验证通过，TTL 重新计算"""
+        now = time.time()
+        with self._lock:
+            if renew:
+                self._conn.execute('UPDATE entries SET accessed_at = ?, stored_at = ? WHERE key = ?',
+                                   (now, now, key))
+            else:
+                self._conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+
+    def tee(self, resp, method, url, request_headers):
+        """网络响应可缓存时返回 TeeResponse，否则返回 None"""
+        if self.mode == 'off' or resp.status_code != 200 or 'Range' in request_headers:
+            return None
+        vary = parse_vary(resp.headers.get('Vary'))
+        if vary is None:
+            return None
+        key = cache_key(method, url, vary, request_headers)
+        return TeeResponse(self, resp, key, f'{method.upper()} {url}', vary)
+
+    def store(self, key, base, vary, status, headers, tmp_path, digest, size):
+        blob = self.blob_path(digest)
+        if os.path.exists(blob):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(tmp_path, blob)
+        kept = {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS}
+        now = time.time()
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                               (key, base, json.dumps(vary), status, json.dumps(kept), digest, size, now, now))
+            self._conn.commit()
+            self.stats['stored'] += 1
+        self.evict()
+
+    def total_bytes(self):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body_sha256, size FROM entries)').fetchone()
+        return row[0]
+
+    def evict(self, max_bytes=None):
+        """按最近访问时间淘汰，直到总大小不超过上限；返回淘汰条数"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if not max_bytes:
+            return 0
+        evicted = 0
+        total = self.total_bytes()
+        while total > max_bytes:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT key, body_sha256, size FROM entries ORDER BY accessed_at LIMIT 64').fetchall()
+                if not rows:
+                    break
+                for key, digest, size in rows:
+                    self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                    evicted += 1
+                    # 其他条目仍引用同一内容时保留文件
+                    if self._conn.execute('SELECT 1 FROM entries WHERE body_sha256 = ? LIMIT 1',
+                                          (digest,)).fetchone() is None:
+                        self._remove_blob(digest)
+                        total -= size
+                        if total <= max_bytes:
+                            break
+                self._conn.commit()
+        self.stats['evicted'] += evicted
+        return evicted
+
+    def prune_expired(self):
+        """删除超过 TTL 的条目（offline 回放前不要运行），返回删除条数"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute('SELECT key, body_sha256 FROM entries WHERE stored_at < ?',
+                                      (cutoff,)).fetchall()
+            for key, _ in rows:
+                self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            for digest in {digest for _, digest in rows}:
+                if self._conn.execute('SELECT 1 FROM entries WHERE body_sha256 = ? LIMIT 1',
+                                      (digest,)).fetchone() is None:
+                    self._remove_blob(digest)
+            self._conn.commit()
+        return len(rows)
+
+    def _remove_blob(self, digest):
+        try:
+            os.remove(self.blob_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def summary(self):
+        with self._lock:
+            count, fresh = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(stored_at >= ?), 0) FROM entries',
+                (time.time() - self.ttl,)).fetchone()
+        return {'entries': count, 'fresh': fresh, 'bytes': self.total_bytes()}
+
+
+def add_cache_args(parser):
+    """给脚本的 argparse 加上响应缓存参数"""
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='响应缓存目录（默认 .cache/http）')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL,
+                        help=f'缓存有效期秒数，过期后重新验证（默认 {DEFAULT_TTL}）')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help=f'缓存大小上限（MB，默认 {DEFAULT_MAX_BYTES // (1024 * 1024)}，0 表示不限）')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--offline', action='store_true', help='只从响应缓存回放，不访问网络')
+    group.add_argument('--no-cache', action='store_true', help='不使用响应缓存')
+
+
+def cache_from_args(args):
+    """按 add_cache_args 的参数创建 ResponseCache（--refresh 时只写不读）"""
+    if args.no_cache:
+        return None
+    mode = 'offline' if args.offline else ('refresh' if getattr(args, 'refresh', False) else 'use')
+    return ResponseCache(args.cache_dir, ttl=args.cache_ttl, max_bytes=args.cache_size * 1024 * 1024, mode=mode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查看或清理爬虫的响应缓存')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='响应缓存目录（默认 .cache/http）')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL, help='缓存有效期秒数')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='缓存大小上限（MB，0 表示不限）')
+    parser.add_argument('--prune', action='store_true', help='删除过期条目并按大小上限淘汰')
+    parser.add_argument('--clear', action='store_true', help='删除整个缓存目录')
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(args.cache_dir, ignore_errors=True)
+        print(f"✓ 已删除 {args.cache_dir}")
+        return
+    cache = ResponseCache(args.cache_dir, ttl=args.cache_ttl, max_bytes=args.cache_size * 1024 * 1024)
+    if args.prune:
+        expired = cache.prune_expired()
+        evicted = cache.evict()
+        print(f"✓ 删除过期 {expired} 条，淘汰 {evicted} 条")
+    info = cache.summary()
+    print(f"缓存 {args.cache_dir}: {info['entries']} 条（未过期 {info['fresh']}），"
+          f"{info['bytes'] / 1024 / 1024:.1f}MB / 上限 {args.cache_size}MB")
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
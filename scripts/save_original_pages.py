@@ -4,28 +4,15 @@
 下载文章页面的HTML、CSS、JS等资源
 """
 
-import requests
-import os
+import argparse
 import re
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin
 from pathlib import Path
 
-# 文章列表
-ARTICLES = [
-    ("80611955", "https://www.sztv.com.cn/ysz/zx/zbsz/80611955.shtml"),
-    ("80611627", "https://www.sztv.com.cn/ysz/zx/rd/80611627.shtml"),
-    ("80611833", "https://www.sztv.com.cn/ysz/zx/tj/80611833.shtml"),
-    ("80611814", "https://www.sztv.com.cn/ysz/zx/tj/80611814.shtml"),
-    ("80611789", "https://www.sztv.com.cn/ysz/zx/tj/80611789.shtml"),
-    ("80611791", "https://www.sztv.com.cn/ysz/zx/tj/80611791.shtml"),
-    ("80611586", "https://www.sztv.com.cn/ysz/zx/zw/80611586.shtml"),
-    ("80611296", "https://www.sztv.com.cn/ysz/zx/zw/80611296.shtml"),
-    ("80611248", "https://www.sztv.com.cn/ysz/zx/zw/80611248.shtml"),
-    ("80611001", "https://www.sztv.com.cn/ysz/zx/tj/80611001.shtml"),
-    ("80611004", "https://www.sztv.com.cn/ysz/zx/tj/80611004.shtml"),
-    ("80611058", "https://www.sztv.com.cn/ysz/zx/tj/80611058.shtml"),
-]
+from article_catalog import add_catalog_args, load_catalog
+from blob_store import url_filename
+from downloader import add_download_args, from_args
+from html_doc import parse
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -36,21 +23,60 @@ HEADERS = {
 def ensure_dir(path):
     Path(path).mkdir(parents=True, exist_ok=True)
 
-def save_resource(url, save_path, base_url):
-    """下载并保存资源文件"""
-    try:
-        full_url = urljoin(base_url, url)
-        response = requests.get(full_url, headers=HEADERS, timeout=30)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
-            return True
-    except Exception as e:
-        print(f"  下载失败 {url}: {e}")
-    return False
+def collect_resources(soup):
+    """收集 CSS / JS / 图片: [(类别, 标签, 属性列表, 原始引用, 本地相对路径), ...]
+
+    本地文件名按引用的 URL 哈希（blob_store.url_filename），与文档中的顺序无关；
+    各文章引用的同一个站点 JS/CSS 文件名相同，内容由存储共享。
+    """
+    resources = []
+    for link in soup.find_all('link', rel='stylesheet'):
+        href = link.get('href')
+        if href:
+            resources.append(('css', link, ['href'], href, f"css/{url_filename(href, '.css')}"))
+    
+    for script in soup.find_all('script', src=True):
+        src = script.get('src')
+        if src:
+            resources.append(('js', script, ['src'], src, f"js/{url_filename(src, '.js')}"))
+    
+    for img in soup.find_all('img'):
+        src = img.get('src') or img.get('data-src')
+        if src:
+            src = str(src)  # 转换为字符串
+            if src.startswith('data:'):
+                continue
+            attrs = [attr for attr in ('src', 'data-src') if img.get(attr)]
+            resources.append(('img', img, attrs, src, f"img/{url_filename(src)}"))
+    return resources
 
-def save_article(article_id, url, output_dir):
-    """保存单篇文章及其资源"""
+def download_resources(dl, base_url, article_dir, resources):
+    """并发下载资源，返回与 resources 一一对应的结果；同一引用出现多次时只下载一次"""
+    unique = {}
+    for _, _, _, ref, local in resources:
+        unique.setdefault(local, urljoin(base_url, ref))
+    results = dict(zip(unique, dl.download_all([(url, Path(article_dir) / local)
+                                                for local, url in unique.items()])))
+    return [results[local] for _, _, _, _, local in resources]
+
+def apply_resources(resources, results):
+    """下载成功的资源改为本地路径，返回各类别成功数"""
+    counts = {'css': 0, 'js': 0, 'img': 0}
+    for (kind, tag, attrs, ref, local), result in zip(resources, results):
+        if not result.ok:
+            print(f"  下载失败 {ref}: {result.error}")
+            continue
+        counts[kind] += 1
+        # 更新HTML中的引用
+        for attr in attrs:
+            tag[attr] = local
+    return counts
+
+def save_article(article_id, url, page, output_dir, dl):
+    """保存单篇文章及其资源（page 为 original.html 的下载结果，资源并发下载）
+
+    页面与所有资源都未变化（304）时不重写 index.html。
+    """
     print(f"\n📄 保存文章: {article_id}")
     
     article_dir = Path(output_dir) / article_id
@@ -60,57 +86,27 @@ def save_article(article_id, url, output_dir):
     ensure_dir(article_dir / 'img')
     
     try:
-        # 获取HTML
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
-        html_content = response.text
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if not page.ok:
+            raise IOError(page.error)
+        # 原始HTML已由下载器保存为 original.html
+        with open(article_dir / 'original.html', 'r', encoding='utf-8', errors='replace') as f:
+            html_content = f.read()
+        soup = parse(html_content)
+        print(f"  ✓ HTML{'未变化' if page.not_modified else '已保存'}")
         
-        # 保存原始HTML
-        with open(article_dir / 'original.html', 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"  ✓ HTML已保存")
+        resources = collect_resources(soup)
         
-        # 提取并保存CSS
-        css_count = 0
-        for i, link in enumerate(soup.find_all('link', rel='stylesheet')):
-            href = link.get('href')
-            if href:
-                css_filename = f"style_{i}.css"
-                if save_resource(href, article_dir / 'css' / css_filename, url):
-                    css_count += 1
-                    # 更新HTML中的引用
-                    link['href'] = f"css/{css_filename}"
-        print(f"  ✓ CSS: {css_count} 个文件")
+        results = download_resources(dl, url, article_dir, resources)
         
-        # 提取并保存JS
-        js_count = 0
-        for i, script in enumerate(soup.find_all('script', src=True)):
-            src = script.get('src')
-            if src:
-                js_filename = f"script_{i}.js"
-                if save_resource(src, article_dir / 'js' / js_filename, url):
-                    js_count += 1
-                    script['src'] = f"js/{js_filename}"
-        print(f"  ✓ JS: {js_count} 个文件")
+        changed = not page.not_modified or any(r.ok and not r.not_modified for r in results)
+        if not changed and (article_dir / 'index.html').exists():
+            print(f"  ✓ 页面与 {len(results)} 个资源均未变化，跳过")
+            return True
         
-        # 提取并保存图片
-        img_count = 0
-        for i, img in enumerate(soup.find_all('img')):
-            src = img.get('src') or img.get('data-src')
-            if src:
-                src = str(src)  # 转换为字符串
-                if src.startswith('data:'):
-                    continue
-                ext = os.path.splitext(urlparse(src).path)[1] or '.jpg'
-                img_filename = f"img_{i}{ext}"
-                if save_resource(src, article_dir / 'img' / img_filename, url):
-                    img_count += 1
-                    if img.get('src'):
-                        img['src'] = f"img/{img_filename}"
-                    if img.get('data-src'):
-                        img['data-src'] = f"img/{img_filename}"
-        print(f"  ✓ 图片: {img_count} 个文件")
+        counts = apply_resources(resources, results)
+        print(f"  ✓ CSS: {counts['css']} 个文件")
+        print(f"  ✓ JS: {counts['js']} 个文件")
+        print(f"  ✓ 图片: {counts['img']} 个文件")
         
         # 保存处理后的HTML（本地资源版本）
         with open(article_dir / 'index.html', 'w', encoding='utf-8') as f:
@@ -124,6 +120,12 @@ def save_article(article_id, url, output_dir):
         return False
 
 def main():
+    parser = argparse.ArgumentParser(description='保存原始网页及其资源')
+    add_catalog_args(parser)
+    add_download_args(parser)
+    args = parser.parse_args()
+    articles = [(a['article_id'], a['url']) for a in load_catalog(args.catalog, args.limit)]
+    
     base_dir = Path(__file__).parent.parent
     output_dir = base_dir / 'data' / 'original_pages'
     ensure_dir(output_dir)
@@ -133,13 +135,18 @@ def main():
     print("=" * 50)
     
     success_count = 0
-    for article_id, url in ARTICLES:
-        if save_article(article_id, url, output_dir):
-            success_count += 1
+    with from_args(args, headers=HEADERS) as dl:
+        # 先并发获取所有文章页面，再逐篇并发下载资源
+        pages = dl.download_all([(url, output_dir / article_id / 'original.html')
+                                 for article_id, url in articles])
+        for (article_id, url), page in zip(articles, pages):
+            if save_article(article_id, url, page, output_dir, dl):
+                success_count += 1
     
     print("\n" + "=" * 50)
-    print(f"完成！成功保存 {success_count}/{len(ARTICLES)} 篇文章")
+    print(f"完成！成功保存 {success_count}/{len(articles)} 篇文章")
     print(f"保存位置: {output_dir}")
+    print(f"增量: {dl.manifest.stats['not_modified']} 个未变化，{dl.manifest.stats['fetched']} 个已下载")
     print("=" * 50)
 
 if __name__ == '__main__':
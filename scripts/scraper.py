@@ -3,77 +3,17 @@
 文章爬虫脚本 - 爬取深圳卫视新闻文章内容和图片
 """
 
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
 import os
 import re
 from urllib.parse import urljoin
 from datetime import datetime
 
-# 文章列表
-ARTICLES = [
-    {
-        "id": 1,
-        "url": "https://www.sztv.com.cn/ysz/zx/zbsz/80611955.shtml",
-        "title": "腾讯新闻何毅进：\"可信度\"是AI时代最稀缺的资源"
-    },
-    {
-        "id": 2,
-        "url": "https://www.sztv.com.cn/ysz/zx/rd/80611627.shtml",
-        "title": "深度丨中国\"三航母时代\"渐入佳境，硬核实力震慑\"台独\"分裂势力"
-    },
-    {
-        "id": 3,
-        "url": "https://www.sztv.com.cn/ysz/zx/tj/80611833.shtml",
-        "title": "深圳出台青年人才住房支持新政"
-    },
-    {
-        "id": 4,
-        "url": "https://www.sztv.com.cn/ysz/zx/tj/80611814.shtml",
-        "title": "海南自由贸易港正式启动全岛封关"
-    },
-    {
-        "id": 5,
-        "url": "https://www.sztv.com.cn/ysz/zx/tj/80611789.shtml",
-        "title": "外交部亚洲事务特使将再次赴柬埔寨、泰国穿梭调停"
-    },
-    {
-        "id": 6,
-        "url": "https://www.sztv.com.cn/ysz/zx/tj/80611791.shtml",
-        "title": "元旦火车票今起开售 购票注意事项请收好"
-    },
-    {
-        "id": 7,
-        "url": "https://www.sztv.com.cn/ysz/zx/zw/80611586.shtml",
-        "title": "深圳原创舞剧《咏春》开启北美首演，加拿大媒体刊文点赞"
-    },
-    {
-        "id": 8,
-        "url": "https://www.sztv.com.cn/ysz/zx/zw/80611296.shtml",
-        "title": "火出圈的深圳\"食物银行\"，已上线三年惠及近50万人次"
-    },
-    {
-        "id": 9,
-        "url": "https://www.sztv.com.cn/ysz/zx/zw/80611248.shtml",
-        "title": "期待！深圳奇迹的打开方式"
-    },
-    {
-        "id": 10,
-        "url": "https://www.sztv.com.cn/ysz/zx/tj/80611001.shtml",
-        "title": "中央财办：扩大内需是明年排在首位的重点任务"
-    },
-    {
-        "id": 11,
-        "url": "https://www.sztv.com.cn/ysz/zx/tj/80611004.shtml",
-        "title": "山东舰入列6周年！三航母时代已来，期待更多突破"
-    },
-    {
-        "id": 12,
-        "url": "https://www.sztv.com.cn/ysz/zx/tj/80611058.shtml",
-        "title": "台当局辩称\"封禁\"小红书无关两岸政策 国台办回应"
-    }
-]
+from article_catalog import add_catalog_args, load_catalog
+from crawl_manifest import page_cache_path
+from downloader import add_download_args, from_args
+from html_doc import parse
 
 # 请求头
 HEADERS = {
@@ -87,74 +27,65 @@ def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
-def download_image(url, save_path):
-    """下载图片"""
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        if response.status_code == 200:
-            with open(save_path, 'wb') as f:
-                f.write(response.content)
-            print(f"  ✓ 下载图片: {save_path}")
-            return True
-    except Exception as e:
-        print(f"  ✗ 下载失败 {url}: {e}")
-    return False
+def extract_metadata(article, soup):
+    """从已解析的文章页面提取元数据（图片为去重后的绝对 URL）"""
+    # 提取文章内容
+    content_div = soup.find('div', class_='article-content') or soup.find('div', class_='content')
+    
+    # 提取所有图片
+    images = []
+    img_tags = soup.find_all('img')
+    
+    for img in img_tags:
+        src = img.get('src') or img.get('data-src')
+        if src:
+            src = str(src)  # 转换为字符串
+            # 跳过logo、图标等
+            if any(skip in src.lower() for skip in ['logo', 'icon', 'sofa', 'send', 'line.png', 'default.jpg']):
+                continue
+            # 转换为绝对URL
+            full_url = urljoin(article['url'], src)
+            if full_url not in images:
+                images.append(full_url)
+    
+    # 提取发布时间和来源
+    source = ""
+    pub_time = ""
+    meta_info = soup.find('div', class_='article-info') or soup.find('div', class_='info')
+    if meta_info:
+        text = meta_info.get_text()
+        # 尝试提取时间
+        time_match = re.search(r'\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}', text)
+        if time_match:
+            pub_time = time_match.group()
+    
+    # 提取正文内容（纯文本）
+    content_text = ""
+    if content_div:
+        content_text = content_div.get_text(strip=True)
+    
+    return {
+        "id": article['id'],
+        "title": article['title'],
+        "url": article['url'],
+        "source": source,
+        "publish_time": pub_time,
+        "images": images,
+        "content": content_text[:500] + "..." if len(content_text) > 500 else content_text
+    }
 
-def scrape_article(article):
-    """爬取单篇文章"""
+def scrape_article(article, page):
+    """解析单篇文章（page 为页面下载结果，内容在 page.path）"""
     print(f"\n正在爬取: {article['title']}")
     
     try:
-        response = requests.get(article['url'], headers=HEADERS, timeout=30)
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 提取文章内容
-        content_div = soup.find('div', class_='article-content') or soup.find('div', class_='content')
-        
-        # 提取所有图片
-        images = []
-        img_tags = soup.find_all('img')
+        if not page.ok:
+            raise IOError(page.error)
+        with open(page.path, 'r', encoding='utf-8', errors='replace') as f:
+            soup = parse(f.read())
         
-        for img in img_tags:
-            src = img.get('src') or img.get('data-src')
-            if src:
-                src = str(src)  # 转换为字符串
-                # 跳过logo、图标等
-                if any(skip in src.lower() for skip in ['logo', 'icon', 'sofa', 'send', 'line.png', 'default.jpg']):
-                    continue
-                # 转换为绝对URL
-                full_url = urljoin(article['url'], src)
-                if full_url not in images:
-                    images.append(full_url)
-        
-        # 提取发布时间和来源
-        source = ""
-        pub_time = ""
-        meta_info = soup.find('div', class_='article-info') or soup.find('div', class_='info')
-        if meta_info:
-            text = meta_info.get_text()
-            # 尝试提取时间
-            time_match = re.search(r'\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}', text)
-            if time_match:
-                pub_time = time_match.group()
-        
-        # 提取正文内容（纯文本）
-        content_text = ""
-        if content_div:
-            content_text = content_div.get_text(strip=True)
-        
-        article_data = {
-            "id": article['id'],
-            "title": article['title'],
-            "url": article['url'],
-            "source": source,
-            "publish_time": pub_time,
-            "images": images,
-            "content": content_text[:500] + "..." if len(content_text) > 500 else content_text
-        }
-        
-        print(f"  找到 {len(images)} 张图片")
+        article_data = extract_metadata(article, soup)
+        print(f"  找到 {len(article_data['images'])} 张图片")
         return article_data
         
     except Exception as e:
@@ -163,6 +94,12 @@ def scrape_article(article):
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='爬取文章内容和图片')
+    add_catalog_args(parser)
+    add_download_args(parser)
+    args = parser.parse_args()
+    articles = load_catalog(args.catalog, args.limit)
+    
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(base_dir, 'data')
     articles_dir = os.path.join(data_dir, 'articles')
@@ -173,36 +110,60 @@ def main():
     
     all_articles = []
     
-    for article in ARTICLES:
-        article_data = scrape_article(article)
-        if article_data:
+    with from_args(args, headers=HEADERS) as dl:
+        # 并发获取所有文章页面（保存在 .cache/pages，未变化时为 304）
+        pages = dl.download_all([(article['url'], page_cache_path(article['url'])) for article in articles])
+        
+        downloads = []  # (article_data, 远程URL, 本地相对路径, 本地绝对路径)
+        for article, page in zip(articles, pages):
+            article_data = scrape_article(article, page)
+            if not article_data:
+                continue
             all_articles.append(article_data)
+            article_data['local_images'] = []
             
-            # 下载图片
             article_img_dir = os.path.join(images_dir, f"article_{article['id']}")
             ensure_dir(article_img_dir)
-            
-            local_images = []
             for idx, img_url in enumerate(article_data['images']):
                 ext = os.path.splitext(img_url.split('?')[0])[1] or '.jpg'
                 img_filename = f"img_{idx+1}{ext}"
-                img_path = os.path.join(article_img_dir, img_filename)
-                
-                if download_image(img_url, img_path):
-                    local_images.append({
-                        "original_url": img_url,
-                        "local_path": f"images/article_{article['id']}/{img_filename}"
-                    })
-            
-            article_data['local_images'] = local_images
+                downloads.append((article_data, img_url,
+                                  f"images/article_{article['id']}/{img_filename}",
+                                  os.path.join(article_img_dir, img_filename)))
+        
+        # 所有文章的图片一起并发下载，结果按顺序写回
+        def report(result):
+            if result.not_modified:
+                print(f"  = 未变化: {result.path}")
+            elif result.ok:
+                print(f"  ✓ 下载图片: {result.path}")
+            else:
+                print(f"  ✗ 下载失败 {result.url}: {result.error}")
+        
+        results = dl.download_all([(url, path) for _, url, _, path in downloads], on_result=report)
+        for (article_data, img_url, local_path, _), result in zip(downloads, results):
+            if result.ok:
+                article_data['local_images'].append({
+                    "original_url": img_url,
+                    "local_path": local_path
+                })
     
-    # 保存文章数据
+    # 保存文章数据（内容未变化时不重写）
     output_file = os.path.join(articles_dir, 'articles.json')
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    output = json.dumps(all_articles, ensure_ascii=False, indent=2)
+    previous = None
+    if os.path.exists(output_file):
+        with open(output_file, 'r', encoding='utf-8') as f:
+            previous = f.read()
     
     print(f"\n\n✓ 爬取完成！共 {len(all_articles)} 篇文章")
-    print(f"✓ 数据已保存到: {output_file}")
+    print(f"✓ 增量: {dl.manifest.stats['not_modified']} 个未变化，{dl.manifest.stats['fetched']} 个已下载")
+    if output == previous:
+        print(f"✓ 数据未变化: {output_file}")
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"✓ 数据已保存到: {output_file}")
 
 if __name__ == '__main__':
     main()
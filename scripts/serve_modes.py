@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+开发服务器的并发模式
+- single:   socketserver.TCPServer，一次只处理一个连接（原始行为）
+- threaded: 每个连接一个线程（ThreadingHTTPServer 语义）
+- asyncio:  asyncio 事件循环负责 accept，请求交给有界线程池处理
+"""
+
+import asyncio
+import http.server
+import socket
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+
+MODES = ('single', 'threaded', 'asyncio')
+DEFAULT_MODE = 'threaded'
+DEFAULT_POOL_SIZE = 32
+
+# 默认 backlog 只有 5，几十个客户端同时连接时会丢 SYN，表现为 1 秒级的长尾延迟
+REQUEST_QUEUE_SIZE = 128
+
+
+class SingleHTTPServer(socketserver.TCPServer):
+    """单连接服务器（与原 server.py 行为一致）"""
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+
+class ThreadedHTTPServer(http.server.ThreadingHTTPServer):
+    """每个连接一个线程"""
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+
+class AsyncioHTTPServer(http.server.HTTPServer):
+    """asyncio 负责 accept，Handler 在有界线程池中运行
+
+    同时处理的连接数不超过 pool_size，其余连接留在内核 backlog 中排队，
+    Handler 类不需要任何改动，CORS 等响应头行为保持一致。
+    """
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def __init__(self, server_address, RequestHandlerClass, pool_size=DEFAULT_POOL_SIZE,
+                 bind_and_activate=True):
+        super().__init__(server_address, RequestHandlerClass, bind_and_activate)
+        self.pool_size = pool_size
+        self._loop = None
+        self._stopped = None
+
+    def serve_forever(self, poll_interval=0.5):
+        asyncio.run(self._serve())
+
+    def shutdown(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self.socket.setblocking(False)
+
+        pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='http-worker')
+        slots = asyncio.Semaphore(self.pool_size)
+        accept_task = asyncio.ensure_future(self._accept_loop(pool, slots))
+        try:
+            await self._stopped.wait()
+        finally:
+            accept_task.cancel()
+            pool.shutdown(wait=True)
+
+    async def _accept_loop(self, pool, slots):
+        while True:
+            await slots.acquire()
+            try:
+                conn, addr = await self._loop.sock_accept(self.socket)
+            except BaseException:
+                slots.release()
+                raise
+            # sock_accept 返回非阻塞 socket，Handler 需要阻塞读写
+            conn.setblocking(True)
+            future = self._loop.run_in_executor(pool, self._handle, conn, addr)
+            future.add_done_callback(lambda _: slots.release())
+
+    def _handle(self, conn, addr):
+        try:
+            self.finish_request(conn, addr)
+        except Exception:
+            self.handle_error(conn, addr)
+        finally:
+            self.shutdown_request(conn)
+
+
+def make_server(mode, server_address, handler_class, pool_size=DEFAULT_POOL_SIZE, reuse_port=False):
+    """按模式创建服务器实例
+
+    reuse_port=True 时在绑定前设置 SO_REUSEPORT，供 prefork 的多个 worker 各自绑定同一端口。
+    """
+    if mode == 'single':
+        server = SingleHTTPServer(server_address, handler_class, bind_and_activate=False)
+    elif mode == 'threaded':
+        server = ThreadedHTTPServer(server_address, handler_class, bind_and_activate=False)
+    elif mode == 'asyncio':
+        server = AsyncioHTTPServer(server_address, handler_class, pool_size=pool_size,
+                                   bind_and_activate=False)
+    else:
+        raise ValueError(f"未知的并发模式: {mode}")
+
+    try:
+        if reuse_port:
+            server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server.server_bind()
+        server.server_activate()
+    except BaseException:
+        server.server_close()
+        raise
+    return server
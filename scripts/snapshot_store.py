@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+改写前后的快照存储（取代各脚本在 frontend/ 里留下的 *_bak 备份）
+- 位置 .cache/snapshots（不在网站根目录下，不会被部署或被静态服务器访问到）
+- objects/<前两位>/<sha256>.z: 按内容寻址、zlib 压缩的文件内容，同样的内容只存一份
+  （同一页面的多个版本、不同页面的相同版本都共享）
+- journal.jsonl: 只追加的日志，每次改写运行一条 run 记录，每个被改写的文件一条 file 记录
+  （改写前/后的内容哈希，在写文件之前落盘），运行结束一条 end 记录；中断的运行没有 end，同样可以回滚
+- 回滚一次运行: 把它改过的所有页面恢复为改写前的内容；页面在那之后又被改动过时跳过（--force 强制），
+  回滚本身也记为一次运行，可以再回滚回去
+
+用法:
+    python3 scripts/snapshot_store.py log                  # 历次运行
+    python3 scripts/snapshot_store.py show <运行>           # 某次运行改了哪些文件
+    python3 scripts/snapshot_store.py diff <运行> [--path mirrors/08]
+    python3 scripts/snapshot_store.py rollback <运行> [--dry-run] [--force]
+    python3 scripts/snapshot_store.py migrate [--keep]     # 把 frontend/ 下现有的 *_bak 收入存储并删除
+"""
+
+import argparse
+import difflib
+import glob
+import hashlib
+import json
+import os
+import time
+import zlib
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SNAPSHOTS = os.path.join(PROJECT_ROOT, '.cache', 'snapshots')
+FRONTEND_DIR = os.path.join(PROJECT_ROOT, 'frontend')
+
+# 历史上各脚本留下的备份后缀（备份的是该脚本改写前的内容），按这些脚本当初运行的顺序排列；
+# .bak2 来历不明，内容与最早的版本相同，排在最前
+LEGACY_BACKUPS = (
+    ('.bak2', '手工备份'),
+    ('.cleaned_bak', 'clean_mirrors_scripts'),
+    ('.container_bak', 'update_gsplat_containers'),
+    ('.anim_bak', 'add_spin_animation'),
+    ('.aspect_bak', 'update_container_aspect_ratio'),
+    ('.flex_bak', 'update_flexible_height'),
+    ('.aspect_restore_bak', 'restore_aspect_ratio'),
+    ('.transform_bak', 'html_transforms'),
+)
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _bytes(content):
+    return content.encode('utf-8') if isinstance(content, str) else content
+
+
+def _relpath(path):
+    return os.path.relpath(os.path.abspath(path), PROJECT_ROOT)
+
+
+class SnapshotRun:
+    """一次改写运行；只保存路径与编号，可以传给多进程的工作进程各自记录"""
+
+    def __init__(self, root, run_id, label):
+        self.root = root
+        self.id = run_id
+        self.label = label
+
+    def record(self, path, before, after):
+        """改写 path 之前调用: 先保存前后两个版本，再追加日志"""
+        store = SnapshotStore(self.root)
+        entry = {'type': 'file', 'run': self.id, 'path': _relpath(path),
+                 'before': store.put(before), 'after': store.put(after)}
+        store.append(entry)
+
+    def end(self):
+        SnapshotStore(self.root).append({'type': 'end', 'run': self.id, 'ts': round(time.time(), 3)})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # 异常退出时不写 end，log 中显示为未完成
+        if exc[0] is None:
+            self.end()
+
+
+class SnapshotStore:
+    def __init__(self, root=DEFAULT_SNAPSHOTS):
+        self.root = root
+        self.journal = os.path.join(root, 'journal.jsonl')
+
+    def object_path(self, sha):
+        return os.path.join(self.root, 'objects', sha[:2], sha + '.z')
+
+    def put(self, content):
+        """保存内容，返回 SHA-256；已有同样内容时不重复写"""
+        data = _bytes(content)
+        sha = _sha(data)
+        path = self.object_path(sha)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.tmp{os.getpid()}'
+            with open(tmp, 'wb') as f:
+                f.write(zlib.compress(data, 9))
+            os.replace(tmp, path)
+        return sha
+
+    def get(self, sha):
+        with open(self.object_path(sha), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def append(self, record):
+        """追加一行日志（一次 write，多个进程同时追加也不会交错）"""
+        os.makedirs(self.root, exist_ok=True)
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        fd = os.open(self.journal, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def begin(self, label):
+        run_id = time.strftime('%Y%m%d-%H%M%S') + '-' + os.urandom(2).hex()
+        self.append({'type': 'run', 'run': run_id, 'label': label, 'ts': round(time.time(), 3)})
+        return SnapshotRun(self.root, run_id, label)
+
+    def runs(self):
+        """按时间顺序返回 [{id, label, ts, files: [...], ended}]"""
+        runs = {}
+        if not os.path.exists(self.journal):
+            return []
+        with open(self.journal, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record['type'] == 'run':
+                    runs[record['run']] = {'id': record['run'], 'label': record['label'],
+                                           'ts': record['ts'], 'files': [], 'ended': False}
+                elif record['run'] in runs:
+                    if record['type'] == 'file':
+                        runs[record['run']]['files'].append(record)
+                    elif record['type'] == 'end':
+                        runs[record['run']]['ended'] = True
+        return list(runs.values())
+
+    def find_run(self, prefix):
+        """按编号前缀查找；'last' 为最近一次改写过文件的运行"""
+        runs = self.runs()
+        if prefix == 'last':
+            matches = [run for run in runs if run['files']][-1:]
+        else:
+            matches = [run for run in runs if run['id'].startswith(prefix)]
+        if len(matches) != 1:
+            raise KeyError(f"{'没有' if not matches else '有多个'}匹配 {prefix!r} 的运行")
+        return matches[0]
+
+    def rollback(self, run, force=False, dry_run=False):
+        """把 run 改过的页面恢复为改写前的内容，返回 [(路径, 结果)]
+
+        同一页面在一次运行中被记录多次时（链式改写），恢复到最早的 before。
+        """
+        first = {}
+        last = {}
+        for entry in run['files']:
+            first.setdefault(entry['path'], entry['before'])
+            last[entry['path']] = entry['after']
+        results = []
+        restore = []
+        for rel, before in first.items():
+            path = os.path.join(PROJECT_ROOT, rel)
+            current = None
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    current = _sha(f.read())
+            if current == before:
+                results.append((rel, '已是改写前的内容'))
+            elif current != last[rel] and not force:
+                results.append((rel, '之后又被改动过，跳过（--force 强制恢复）'))
+            else:
+                restore.append((path, before))
+                results.append((rel, '已恢复' if not dry_run else '将恢复'))
+        if restore and not dry_run:
+            with self.begin(f"回滚 {run['id']}（{run['label']}）") as undo:
+                for path, before in restore:
+                    content = self.get(before)
+                    # --force 时页面可能已被删除: 以空内容作为回滚前的版本，照常恢复
+                    current = b''
+                    if os.path.exists(path):
+                        with open(path, 'rb') as f:
+                            current = f.read()
+                    undo.record(path, current, content)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp = f'{path}.tmp{os.getpid()}'
+                    with open(tmp, 'wb') as f:
+                        f.write(content)
+                    os.replace(tmp, path)
+        return results
+
+
+def find_legacy_backups(root):
+    """{页面路径: [(后缀, 来源脚本, 备份路径), ...]}，按 LEGACY_BACKUPS 的顺序"""
+    pages = {}
+    for suffix, source in LEGACY_BACKUPS:
+        for backup in sorted(glob.glob(os.path.join(glob.escape(root), '**', '*' + suffix), recursive=True)):
+            page = backup[:-len(suffix)]
+            pages.setdefault(page, []).append((suffix, source, backup))
+    return pages
+
+
+def migrate_legacy_backups(store, root=FRONTEND_DIR, keep=False):
+    """把 *_bak 收入存储: 每种后缀记为一次运行（按脚本顺序），before 为该备份，
+    after 为同一页面的下一个版本（下一个备份或当前文件）；返回 (运行数, 备份文件数, 字节数)
+
+    与下一个版本相同的备份（如 .bak2 与 .cleaned_bak）只存内容，不产生改写记录。
+    """
+    pages = find_legacy_backups(root)
+    runs = {}
+    count = size = 0
+    for page, backups in pages.items():
+        versions = [path for _, _, path in backups] + [page]
+        for (suffix, source, backup), after_path in zip(backups, versions[1:]):
+            with open(backup, 'rb') as f:
+                before = f.read()
+            after = b''
+            if os.path.exists(after_path):
+                with open(after_path, 'rb') as f:
+                    after = f.read()
+            count += 1
+            size += len(before)
+            if before == after:
+                store.put(before)
+                continue
+            runs.setdefault((suffix, source), []).append((page, before, after))
+
+    for suffix, source in LEGACY_BACKUPS:
+        entries = runs.get((suffix, source))
+        if not entries:
+            continue
+        with store.begin(f"迁移 {suffix}（{source}）") as run:
+            for page, before, after in entries:
+                run.record(page, before, after)
+    if not keep:
+        for backups in pages.values():
+            for _, _, backup in backups:
+                os.remove(backup)
+    return len(runs), count, size
+
+
+def print_diff(store, run, path_filter=None, context=3):
+    for entry in run['files']:
+        if path_filter and path_filter not in entry['path']:
+            continue
+        before = store.get(entry['before']).decode('utf-8', errors='replace').splitlines(keepends=True)
+        after = store.get(entry['after']).decode('utf-8', errors='replace').splitlines(keepends=True)
+        print(''.join(difflib.unified_diff(before, after, f"a/{entry['path']}", f"b/{entry['path']}",
+                                           n=context)), end='')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='改写快照: 历史、差异、回滚、迁移 *_bak')
+    parser.add_argument('--store', default=DEFAULT_SNAPSHOTS, help='存储目录（默认 .cache/snapshots）')
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('log', help='列出历次运行')
+    show = sub.add_parser('show', help='某次运行改写的文件')
+    show.add_argument('run', help='运行编号（前缀即可，last 为最近一次）')
+    diff = sub.add_parser('diff', help='某次运行的改动（unified diff）')
+    diff.add_argument('run')
+    diff.add_argument('--path', help='只看路径包含此字符串的文件')
+    diff.add_argument('-U', '--context', type=int, default=3, help='上下文行数（默认 3）')
+    rollback = sub.add_parser('rollback', help='把某次运行改写的所有页面恢复为改写前的内容')
+    rollback.add_argument('run')
+    rollback.add_argument('--dry-run', action='store_true', help='只显示将恢复哪些文件')
+    rollback.add_argument('--force', action='store_true', help='页面之后又被改动过也恢复')
+    migrate = sub.add_parser('migrate', help='把 frontend/ 下现有的 *_bak 备份收入存储')
+    migrate.add_argument('--root', default=FRONTEND_DIR, help='扫描的目录（默认 frontend/）')
+    migrate.add_argument('--keep', action='store_true', help='收入后保留原备份文件')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store)
+    command = args.command or 'log'
+
+    if command == 'migrate':
+        runs, count, size = migrate_legacy_backups(store, args.root, keep=args.keep)
+        print(f"✓ 收入 {count} 个备份文件（{size / 1024:.0f}KB），生成 {runs} 次运行记录"
+              f"{'，原文件保留' if args.keep else '，原文件已删除'}")
+        return
+
+    if command == 'log':
+        runs = store.runs()
+        if not runs:
+            print(f"没有快照: {store.root}")
+            return
+        for run in runs:
+            if run['ended'] and not run['files']:
+                continue
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['ts']))
+            pages = len({entry['path'] for entry in run['files']})
+            state = '' if run['ended'] else '  ⚠️ 未完成'
+            print(f"{run['id']}  {when}  {pages:>4} 个文件  {run['label']}{state}")
+        return
+
+    try:
+        run = store.find_run(args.run)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    if command == 'show':
+        print(f"{run['id']}  {run['label']}{'' if run['ended'] else '  ⚠️ 未完成'}")
+        for entry in run['files']:
+            before = len(store.get(entry['before']))
+            after = len(store.get(entry['after']))
+            print(f"  {entry['path']}  {before} → {after} 字节（{after - before:+d}）")
+    elif command == 'diff':
+        print_diff(store, run, args.path, args.context)
+    elif command == 'rollback':
+        results = store.rollback(run, force=args.force, dry_run=args.dry_run)
+        for rel, outcome in results:
+            print(f"  {rel}: {outcome}")
+        restored = sum(1 for _, outcome in results if outcome in ('已恢复', '将恢复'))
+        print(f"\n{'将' if args.dry_run else '已'}回滚 {restored}/{len(results)} 个文件（{run['label']}）")
+
+
+if __name__ == '__main__':
+    main()
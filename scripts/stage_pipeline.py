@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+流式分阶段处理（供 crawl_pipeline.py 使用）
+- 每个阶段一个有界队列 + 若干工作线程，条目处理完立刻进入下一阶段的队列；
+  下游处理不过来时上游在 put 上阻塞（背压），内存占用与条目总数无关
+- 每个条目完成一个阶段就向检查点文件（JSON Lines）追加一行 {key, stage, data}；
+  中断后重新运行时，从每个条目最后完成的阶段之后继续，全部完成的条目直接跳过
+- 运行中定期打印各阶段的完成数、吞吐量与队列深度，结束时打印汇总
+
+阶段函数签名为 func(item)，就地修改 item.data（必须可 JSON 序列化，写入检查点）；
+不可序列化的中间结果（如解析后的文档）放在 item.cache，恢复时由阶段函数自行重建。
+抛出异常的条目记为失败，不再进入后续阶段。
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_PROGRESS_INTERVAL = 2.0
+
+_STOP = object()
+
+
+class Item:
+    """流经各阶段的一个条目；key 在检查点中唯一标识它"""
+
+    def __init__(self, key, data=None):
+        self.key = key
+        self.data = data or {}
+        self.cache = {}
+        self.error = None
+
+
+class Stage:
+    """一个处理阶段：名称、处理函数、工作线程数、输入队列容量"""
+
+    def __init__(self, name, func, workers=1, maxsize=DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize)
+        self.done = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self._running = self.workers
+        self._lock = threading.Lock()
+
+    def depth(self):
+        depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        return depth
+
+
+class Checkpoint:
+    """检查点文件: 每行记录某个条目完成了哪个阶段及当时的 data"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self):
+        """返回 {key: (最后完成的阶段名, data)}；末尾不完整的行（写到一半中断）忽略"""
+        state = {}
+        if not os.path.exists(self.path):
+            return state
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                state[record['key']] = (record['stage'], record['data'])
+        return state
+
+    def record(self, key, stage, data):
+        line = json.dumps({'key': key, 'stage': stage, 'data': data, 'ts': round(time.time(), 3)},
+                          ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Pipeline:
+    """把条目依次送过各阶段；run() 返回 (完成的条目, 失败的条目, 从检查点跳过的条目)"""
+
+    def __init__(self, stages, checkpoint=None, progress=DEFAULT_PROGRESS_INTERVAL):
+        self.stages = stages
+        self.checkpoint = checkpoint
+        self.progress = progress
+        self.completed = []
+        self.failed = []
+        self.skipped = []
+        self._results_lock = threading.Lock()
+        self._finished = threading.Event()
+        self.started = None
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                break
+            started = time.perf_counter()
+            try:
+                stage.func(item)
+            except Exception as e:
+                item.error = f'{stage.name}: {e}'
+            elapsed = time.perf_counter() - started
+            with stage._lock:
+                stage.busy += elapsed
+                if item.error:
+                    stage.failed += 1
+                else:
+                    stage.done += 1
+            if item.error:
+                with self._results_lock:
+                    self.failed.append(item)
+                continue
+            if self.checkpoint is not None:
+                self.checkpoint.record(item.key, stage.name, item.data)
+            if downstream is not None:
+                downstream.queue.put(item)
+            else:
+                item.cache.clear()
+                with self._results_lock:
+                    self.completed.append(item)
+        # 本阶段最后一个退出的线程通知下游结束
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last:
+            if downstream is not None:
+                for _ in range(downstream.workers):
+                    downstream.queue.put(_STOP)
+            else:
+                self._finished.set()
+
+    def status_line(self):
+        elapsed = time.perf_counter() - self.started
+        cells = []
+        for stage in self.stages:
+            rate = stage.done / elapsed if elapsed else 0.0
+            cells.append(f"{stage.name} {stage.done}（{rate:.1f}/s，队列 {stage.depth()}）")
+        return f"[{elapsed:6.1f}s] " + ' → '.join(cells)
+
+    def _reporter(self):
+        while not self._finished.wait(self.progress):
+            print(self.status_line(), flush=True)
+
+    def run(self, items):
+        """items 为 Item 可迭代对象；按检查点决定每个条目从哪个阶段开始"""
+        names = [stage.name for stage in self.stages]
+        state = self.checkpoint.load() if self.checkpoint is not None else {}
+        self.started = time.perf_counter()
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for i in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(index,), name=f'{stage.name}-{i}',
+                                     daemon=True)
+                t.start()
+                threads.append(t)
+        if self.progress:
+            threading.Thread(target=self._reporter, name='pipeline-progress', daemon=True).start()
+
+        for item in items:
+            start = 0
+            if item.key in state:
+                stage_name, data = state[item.key]
+                if stage_name in names:
+                    start = names.index(stage_name) + 1
+                    item.data.update(data)
+            if start == len(self.stages):
+                self.skipped.append(item)
+                continue
+            # 第一个阶段的队列满时在这里阻塞，条目按需生成
+            self.stages[start].queue.put(item)
+
+        for _ in range(self.stages[0].workers):
+            self.stages[0].queue.put(_STOP)
+        for t in threads:
+            t.join()
+        self._finished.set()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        return self.completed, self.failed, self.skipped
+
+    def print_summary(self):
+        elapsed = time.perf_counter() - self.started
+        print(f"\n{'阶段':<10} {'完成':>6} {'失败':>6} {'工作线程':>8} {'忙碌(s)':>9} {'吞吐(条/s)':>11} {'最大队列':>8}")
+        for stage in self.stages:
+            # 吞吐按阶段的忙碌时间折算到单个线程，看出瓶颈阶段
+            rate = stage.done / (stage.busy / stage.workers) if stage.busy else 0.0
+            print(f"{stage.name:<10} {stage.done:>6} {stage.failed:>6} {stage.workers:>8} "
+                  f"{stage.busy:>9.2f} {rate:>11.1f} {stage.max_depth:>8}")
+        print(f"总耗时 {elapsed:.1f}s，完成 {len(self.completed)}，失败 {len(self.failed)}，"
+              f"从检查点跳过 {len(self.skipped)}")
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+server.py 与 https_server.py 共用的静态文件 Handler
+在 SimpleHTTPRequestHandler 的基础上增加:
+- HTTP Range / 206 Partial Content（单区间、多区间 multipart/byteranges、If-Range、HEAD）
+- 内容哈希强 ETag、If-None-Match / If-Modified-Since 304、按路径模式的 Cache-Control
+- 按 Accept-Encoding 发送 build_compressed.py 生成的 .br/.gz 旁路文件
+- 发送路径: 小文件走内存 LRU 缓存，明文 HTTP 大文件走 sendfile 零拷贝，
+  TLS 连接走基于 memoryview 的分块写（缓冲区大小可调）
+- HTTP/1.1 keep-alive: 空闲超时（timeout）与单连接最大请求数
+- 请求指标（/__metrics、/__metrics.json）与可选的 JSON 结构化访问日志
+- 可选的弱网模拟（throttle.py）：按路径模式限速、加延迟
+"""
+
+import email.utils
+import http.server
+import io
+import json
+import os
+import ssl
+import time
+import urllib.parse
+import uuid
+from http import HTTPStatus
+
+from build_compressed import ENCODINGS, is_compressible, is_up_to_date, sidecar_path
+from http_cache import CachePolicy, NO_STORE_HEADERS, REVALIDATE, etag_matches
+from throttle import ThrottledWriter
+
+METRICS_PATH = '/__metrics'
+METRICS_JSON_PATH = '/__metrics.json'
+
+# 多区间请求的上限，超过则直接返回完整内容，避免被大量小区间拖垮
+MAX_RANGES = 32
+# 小于该大小的未缓存文件直接 read/write，不值得走 sendfile
+SENDFILE_MIN_SIZE = 64 * 1024
+DEFAULT_WRITE_BUFFER = 256 * 1024
+
+
+def parse_range_header(value, size):
+    """解析 Range 头，返回 [(start, end), ...]（end 含）
+
+    返回 None 表示头无效或不支持，应忽略 Range 返回完整内容；
+    返回 [] 表示所有区间都无法满足（416）。
+    """
+    if not value:
+        return None
+    unit, _, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition('-')
+        if not sep:
+            return None
+        first, last = first.strip(), last.strip()
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else None
+                if start < 0 or (end is not None and end < start):
+                    return None
+                if start >= size:
+                    continue
+                ranges.append((start, size - 1 if end is None else min(end, size - 1)))
+            else:
+                # 后缀区间: bytes=-500 表示最后 500 字节
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                if suffix == 0 or size == 0:
+                    continue
+                ranges.append((max(0, size - suffix), size - 1))
+        except ValueError:
+            return None
+
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+def parse_accept_encoding(value):
+    """解析 Accept-Encoding，返回 {编码: q 值}"""
+    accepted = {}
+    for item in value.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+class _CountingWriter:
+    """包装 wfile，统计写出的字节数（sendfile 发送的部分由 Handler 另行累加）"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data):
+        n = self.raw.write(data)
+        self.count += len(data) if n is None else n
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class StaticHandler(http.server.SimpleHTTPRequestHandler):
+    """支持 Range 与条件请求的静态文件 Handler"""
+
+    # 由服务器入口配置: ETagIndex 实例、缓存策略、开发者 --no-cache 开关
+    etag_index = None
+    cache_policy = CachePolicy()
+    no_cache = False
+    # 发送路径配置: HotFileCache 实例、是否启用 sendfile、TLS 分块写的缓冲区大小
+    hot_cache = None
+    use_sendfile = True
+    write_buffer_size = DEFAULT_WRITE_BUFFER
+    # keep-alive（子类设置 protocol_version = 'HTTP/1.1' 时生效）:
+    # timeout 为空闲连接超时（秒），每个连接最多处理 max_keepalive_requests 个请求
+    max_keepalive_requests = 100
+    # 观测: metrics.Metrics 实例、metrics.JSONAccessLog 实例（设置后不再打印默认访问日志）
+    metrics = None
+    access_log = None
+    # 弱网模拟: throttle.Throttle 实例（按路径选择网络配置）
+    throttle = None
+
+    _requests_on_connection = 0
+    _range_plan = None
+    _cache_control = None
+    _body_size = None
+    _write_buffer = None
+    _started = None
+    _ttfb = None
+    _status = None
+    _encoding = None
+    _cache_result = None
+    _sendfile_bytes = 0
+    _profile = None
+
+    def setup(self):
+        super().setup()
+        if self.throttle is not None:
+            self.wfile = ThrottledWriter(self.wfile)
+        if self.metrics is not None or self.access_log is not None:
+            self.wfile = _CountingWriter(self.wfile)
+
+    def handle_one_request(self):
+        self._started = None
+        super().handle_one_request()
+        if self._started is not None and (self.metrics is not None or self.access_log is not None):
+            self.record_request()
+
+    def parse_request(self):
+        # 每个请求重置状态（keep-alive 下同一个 Handler 会处理多个请求）
+        self._range_plan = None
+        self._cache_control = None
+        self._body_size = None
+        self._requests_on_connection += 1
+        self._started = time.perf_counter()
+        self._ttfb = None
+        self._status = None
+        self._encoding = None
+        self._cache_result = None
+        self._sendfile_bytes = 0
+        self._profile = None
+        if isinstance(self.wfile, _CountingWriter):
+            self.wfile.count = 0
+        if not super().parse_request():
+            return False
+        if self.throttle is not None:
+            self.set_network_profile()
+        return True
+
+    def set_network_profile(self):
+        """按请求路径选择网络配置（指标端点不限速）"""
+        path = urllib.parse.urlsplit(self.path).path
+        if path not in (METRICS_PATH, METRICS_JSON_PATH):
+            self._profile = self.throttle.profile_for(path)
+        writer = self.wfile.raw if isinstance(self.wfile, _CountingWriter) else self.wfile
+        writer.profile = self._profile
+
+    def do_GET(self):
+        if self.metrics is not None and urllib.parse.urlsplit(self.path).path in (METRICS_PATH, METRICS_JSON_PATH):
+            self.send_metrics()
+            return
+        super().do_GET()
+
+    def send_metrics(self):
+        """/__metrics 输出 Prometheus 文本格式，/__metrics.json 输出 JSON 快照"""
+        if urllib.parse.urlsplit(self.path).path == METRICS_JSON_PATH:
+            body = json.dumps(self.metrics.snapshot(), ensure_ascii=False, indent=2).encode('utf-8')
+            ctype = 'application/json; charset=utf-8'
+        else:
+            body = self.metrics.prometheus().encode('utf-8')
+            ctype = 'text/plain; version=0.0.4; charset=utf-8'
+        # 指标请求本身不计入统计
+        self._started = None
+        self._cache_control = 'no-store'
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_request(self, code='-', size='-'):
+        if isinstance(code, HTTPStatus):
+            code = code.value
+        self._status = code
+        if self.access_log is None:
+            super().log_request(code, size)
+
+    def flush_headers(self):
+        if self._profile is not None and self._ttfb is None:
+            # 模拟往返延迟与服务器首字节延迟（各自带抖动）
+            time.sleep(self._profile.delay(self._profile.latency_ms) + self._profile.delay(self._profile.ttfb_ms))
+        super().flush_headers()
+        if self._ttfb is None and self._started is not None:
+            self._ttfb = time.perf_counter() - self._started
+
+    def record_request(self):
+        """请求结束后记录指标和访问日志"""
+        duration = time.perf_counter() - self._started
+        # 请求行解析失败时 path/headers 可能不存在
+        raw_path = getattr(self, 'path', '')
+        headers = getattr(self, 'headers', None)
+        path = urllib.parse.urlsplit(raw_path).path
+        status = self._status if isinstance(self._status, int) else 0
+        nbytes = self._sendfile_bytes
+        if isinstance(self.wfile, _CountingWriter):
+            nbytes += self.wfile.count
+        if self.metrics is not None:
+            self.metrics.observe(path, status, nbytes, self._ttfb, duration, self._cache_result)
+        if self.access_log is not None:
+            self.access_log.log({
+                'ts': round(time.time(), 3),
+                'client': self.client_address[0],
+                'method': self.command,
+                'path': raw_path,
+                'status': status,
+                'bytes': nbytes,
+                'ttfb_ms': round(self._ttfb * 1000, 2) if self._ttfb is not None else None,
+                'duration_ms': round(duration * 1000, 2),
+                'encoding': self._encoding,
+                'cache': self._cache_result,
+                'ua': headers.get('User-Agent') if headers else None,
+            })
+
+    def end_headers(self):
+        if self.protocol_version == 'HTTP/1.1' and not self.close_connection:
+            remaining = self.max_keepalive_requests - self._requests_on_connection
+            if remaining <= 0:
+                self.send_header('Connection', 'close')
+            elif self.timeout:
+                self.send_header('Keep-Alive', f'timeout={int(self.timeout)}, max={remaining}')
+        if self.no_cache:
+            for keyword, value in NO_STORE_HEADERS:
+                self.send_header(keyword, value)
+        else:
+            self.send_header('Cache-Control', self._cache_control or REVALIDATE)
+        super().end_headers()
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            parts = urllib.parse.urlsplit(self.path)
+            if not parts.path.endswith('/'):
+                # 目录重定向沿用父类逻辑
+                return super().send_head()
+            for index in ('index.html', 'index.htm'):
+                candidate = os.path.join(path, index)
+                if os.path.isfile(candidate):
+                    path = candidate
+                    break
+            else:
+                return self.list_directory(path)
+
+        if path.endswith('/'):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        encoding, body_path = self.select_encoding(path)
+        try:
+            f = open(body_path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        try:
+            # fs/etag 描述实际发送的字节（旁路文件有自己的 ETag）
+            fs = os.fstat(f.fileno())
+            etag = self.entity_tag(body_path, fs)
+            self._cache_control = self.cache_policy.cache_control(urllib.parse.urlsplit(self.path).path)
+
+            if self._not_modified(fs, etag):
+                self._cache_result = 'not_modified'
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                f.close()
+                return None
+
+            ctype = self.guess_type(path)
+            ranges = None
+            if self.headers.get('Range') and self._if_range_matches(path, fs):
+                ranges = parse_range_header(self.headers['Range'], fs.st_size)
+
+            if ranges == []:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header('Content-Range', f'bytes */{fs.st_size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                f.close()
+                return None
+
+            if not ranges:
+                self.send_response(HTTPStatus.OK)
+                self.send_header('Content-type', ctype)
+                self.send_header('Content-Length', str(fs.st_size))
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-type', ctype)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{fs.st_size}')
+                self.send_header('Content-Length', str(end - start + 1))
+                self._range_plan = [(b'', start, end)]
+            else:
+                boundary = uuid.uuid4().hex
+                plan = []
+                length = 0
+                for start, end in ranges:
+                    head = (f'\r\n--{boundary}\r\n'
+                            f'Content-Type: {ctype}\r\n'
+                            f'Content-Range: bytes {start}-{end}/{fs.st_size}\r\n\r\n').encode('latin-1')
+                    plan.append((head, start, end))
+                    length += len(head) + end - start + 1
+                tail = f'\r\n--{boundary}--\r\n'.encode('latin-1')
+                plan.append((tail, None, None))
+                length += len(tail)
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header('Content-type', f'multipart/byteranges; boundary={boundary}')
+                self.send_header('Content-Length', str(length))
+                self._range_plan = plan
+
+            self.send_header('Accept-Ranges', 'bytes')
+            if encoding:
+                self._encoding = encoding
+                self.send_header('Content-Encoding', encoding)
+            if is_compressible(path):
+                self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Last-Modified', self.date_time_string(fs.st_mtime))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self._body_size = fs.st_size
+            return self.body_source(body_path, fs, f)
+        except Exception:
+            f.close()
+            raise
+
+    def body_source(self, path, fs, f):
+        """GET 请求的小文件从内存缓存返回，其余返回已打开的文件"""
+        if self.command != 'GET' or self.hot_cache is None or not self.hot_cache.accepts(fs):
+            return f
+        try:
+            data, hit = self.hot_cache.get(path, fs, f)
+        finally:
+            f.close()
+        self._cache_result = 'hot_hit' if hit else 'hot_miss'
+        return io.BytesIO(data)
+
+    def copyfile(self, source, outputfile):
+        if self._body_size is None:
+            # 目录列表等非 send_head 文件响应
+            return super().copyfile(source, outputfile)
+        plan = self._range_plan or [(b'', 0, self._body_size - 1)]
+        for head, start, end in plan:
+            if head:
+                outputfile.write(head)
+            if start is not None and end >= start:
+                self.copy_range(source, outputfile, start, end - start + 1)
+
+    def copy_range(self, source, outputfile, start, length):
+        """从 source 的 start 处发送 length 字节"""
+        if isinstance(source, io.BytesIO):
+            # 缓存命中: getvalue() 对未修改的 BytesIO 不复制
+            outputfile.write(memoryview(source.getvalue())[start:start + length])
+        elif (self.use_sendfile and length >= SENDFILE_MIN_SIZE and self._profile is None
+                and not isinstance(self.connection, ssl.SSLSocket)):
+            # 明文连接: 内核直接从页缓存发送（头部已在 end_headers 中写出）
+            self._sendfile_bytes += self.connection.sendfile(source, start, length)
+        else:
+            self.copy_chunked(source, outputfile, start, length)
+
+    def copy_chunked(self, source, outputfile, start, length):
+        """readinto 复用同一块缓冲区，通过 memoryview 切片写出，避免每块分配新 bytes"""
+        if self._write_buffer is None or len(self._write_buffer) != self.write_buffer_size:
+            self._write_buffer = memoryview(bytearray(self.write_buffer_size))
+        view = self._write_buffer
+        source.seek(start)
+        while length > 0:
+            n = source.readinto(view[:min(len(view), length)])
+            if not n:
+                break
+            outputfile.write(view[:n])
+            length -= n
+
+    def select_encoding(self, path):
+        """按 Accept-Encoding 选择已是最新的预压缩旁路文件
+
+        返回 (编码, 要发送的文件路径)；不压缩时返回 (None, path)。
+        Range 请求总是按原始字节处理。
+        """
+        if 'Range' in self.headers or not is_compressible(path):
+            return None, path
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding', ''))
+        for encoding in ENCODINGS:
+            if accepted.get(encoding, accepted.get('*', 0)) > 0:
+                sidecar = sidecar_path(path, encoding)
+                if is_up_to_date(path, sidecar):
+                    return encoding, sidecar
+        return None, path
+
+    def entity_tag(self, path, fs):
+        """当前文件的强 ETag，未启用索引或 --no-cache 时返回 None"""
+        if self.no_cache or self.etag_index is None:
+            return None
+        return self.etag_index.get(path, fs)
+
+    def _not_modified(self, fs, etag):
+        """条件请求判断：If-None-Match 优先，其次 If-Modified-Since"""
+        if self.no_cache:
+            return False
+        if 'If-None-Match' in self.headers:
+            return etag_matches(self.headers['If-None-Match'], etag)
+        if 'If-Modified-Since' not in self.headers:
+            return False
+        try:
+            ims = email.utils.parsedate_to_datetime(self.headers['If-Modified-Since'])
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if ims is None or ims.tzinfo is None:
+            return False
+        return int(fs.st_mtime) <= ims.timestamp()
+
+    def _if_range_matches(self, path, fs):
+        """If-Range 校验：不匹配时忽略 Range，返回完整内容"""
+        value = self.headers.get('If-Range')
+        if not value:
+            return True
+        value = value.strip()
+        if value.startswith('"') or value.startswith('W/'):
+            # If-Range 要求强比较
+            etag = self.entity_tag(path, fs)
+            return etag is not None and not value.startswith('W/') and value == etag
+        try:
+            since = email.utils.parsedate_to_datetime(value)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if since is None or since.tzinfo is None:
+            return False
+        return int(fs.st_mtime) == int(since.timestamp())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+网络条件模拟（弱网测试）
+- 每个连接一个令牌桶限制下行带宽
+- 每个请求增加往返延迟，首字节前再增加服务器处理延迟，两者都可带随机抖动
+- 以一定概率暂停发送，模拟丢包后的重传等待
+- 预置 3G / 4G / 慢速 Wi-Fi 配置，可按路径模式分别指定
+
+用法（server.py）:
+    --throttle 4g                      # 所有路径
+    --throttle '\\.ply$=3g' --throttle '/covers/=4g'   # 按路径正则，先匹配先生效
+    --throttle 'down=800,latency=200,jitter=50'       # 自定义参数
+"""
+
+import random
+import re
+import threading
+import time
+
+# 每次写出的最大块大小，块越小限速曲线越平滑
+CHUNK_SIZE = 16 * 1024
+# 令牌桶容量：允许的突发字节数（约等于 TCP 初始拥塞窗口 10 × MSS）
+BURST_BYTES = 14 * 1024
+
+
+class NetworkProfile:
+    """一种网络条件
+
+    down_kbps: 下行带宽（kbit/s，0 表示不限速）
+    latency_ms: 每个请求增加的往返延迟
+    ttfb_ms: 首字节前额外增加的延迟
+    jitter_ms: 延迟的随机抖动幅度（±）
+    pause_prob / pause_ms: 每个数据块以 pause_prob 概率暂停 pause_ms
+    """
+
+    FIELDS = ('down_kbps', 'latency_ms', 'ttfb_ms', 'jitter_ms', 'pause_prob', 'pause_ms')
+
+    def __init__(self, name, down_kbps=0, latency_ms=0, ttfb_ms=0, jitter_ms=0,
+                 pause_prob=0.0, pause_ms=0):
+        self.name = name
+        self.down_kbps = down_kbps
+        self.latency_ms = latency_ms
+        self.ttfb_ms = ttfb_ms
+        self.jitter_ms = jitter_ms
+        self.pause_prob = pause_prob
+        self.pause_ms = pause_ms
+
+    @property
+    def rate(self):
+        """带宽（字节/秒），0 表示不限速"""
+        return self.down_kbps * 1000 / 8
+
+    def delay(self, base_ms):
+        """带抖动的延迟（秒）"""
+        if not base_ms:
+            return 0.0
+        return max(0.0, base_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def describe(self):
+        parts = [f"{self.down_kbps / 1000:g} Mbps" if self.down_kbps else "不限速",
+                 f"RTT {self.latency_ms}ms"]
+        if self.ttfb_ms:
+            parts.append(f"TTFB +{self.ttfb_ms}ms")
+        if self.jitter_ms:
+            parts.append(f"抖动 ±{self.jitter_ms}ms")
+        if self.pause_prob:
+            parts.append(f"暂停 {self.pause_prob * 100:g}%×{self.pause_ms}ms")
+        return f"{self.name} ({', '.join(parts)})"
+
+
+# 参考 Chrome DevTools 与 WebPageTest 的常用配置
+PROFILES = {
+    '3g': NetworkProfile('3g', down_kbps=1600, latency_ms=300, ttfb_ms=50, jitter_ms=80,
+                         pause_prob=0.02, pause_ms=400),
+    '4g': NetworkProfile('4g', down_kbps=9000, latency_ms=85, ttfb_ms=20, jitter_ms=25,
+                         pause_prob=0.005, pause_ms=200),
+    'slow-wifi': NetworkProfile('slow-wifi', down_kbps=2000, latency_ms=40, ttfb_ms=10, jitter_ms=60,
+                                pause_prob=0.03, pause_ms=250),
+}
+
+
+def _field_name(key):
+    """'down' → 'down_kbps'、'latency' → 'latency_ms'，未知参数返回 None"""
+    key = key.strip()
+    for field in (key, f'{key}_kbps', f'{key}_ms'):
+        if field in NetworkProfile.FIELDS:
+            return field
+    return None
+
+
+def parse_profile(spec):
+    """解析配置名（3g/4g/slow-wifi）或 'down=800,latency=200,...' 形式的自定义配置"""
+    spec = spec.strip()
+    if spec.lower() in PROFILES:
+        return PROFILES[spec.lower()]
+    if '=' not in spec:
+        raise ValueError(f"未知的网络配置: {spec}（可选: {', '.join(PROFILES)}）")
+    values = {}
+    for item in spec.split(','):
+        key, _, value = item.partition('=')
+        field = _field_name(key)
+        if field is None:
+            raise ValueError(f"未知的网络参数: {key}（可选: {', '.join(NetworkProfile.FIELDS)}）")
+        values[field] = float(value) if field == 'pause_prob' else int(value)
+    return NetworkProfile('custom', **values)
+
+
+def parse_rule(spec):
+    """解析 '[路径正则=]配置'，返回 (compiled_regex, NetworkProfile)
+
+    路径正则与配置以第一个 '=' 分隔；'=' 前是网络参数名时整串视为自定义配置（所有路径）。
+    """
+    head, sep, rest = spec.partition('=')
+    if not sep or _field_name(head) is not None:
+        return re.compile(''), parse_profile(spec)
+    return re.compile(head), parse_profile(rest)
+
+
+class Throttle:
+    """按路径模式选择网络配置，第一条匹配的规则生效"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    @classmethod
+    def from_specs(cls, specs):
+        return cls(parse_rule(spec) for spec in specs)
+
+    def profile_for(self, path):
+        for pattern, profile in self.rules:
+            if pattern.search(path):
+                return profile
+        return None
+
+    def describe(self):
+        return [f"{pattern.pattern or '*'} → {profile.describe()}" for pattern, profile in self.rules]
+
+
+class TokenBucket:
+    """令牌桶：rate 字节/秒，容量 burst 字节"""
+
+    def __init__(self, rate, burst=BURST_BYTES):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n):
+        """取走 n 个令牌，不足时睡眠到令牌足够"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ThrottledWriter:
+    """包装 wfile：按当前网络配置分块限速写出
+
+    profile 为 None 时直接透传。令牌桶按配置缓存在 writer 上，
+    即同一连接上的多个请求共享带宽（与真实 TCP 连接一致）。
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.profile = None
+        self._buckets = {}
+
+    def write(self, data):
+        profile = self.profile
+        if profile is None or (not profile.rate and not profile.pause_prob):
+            return self.raw.write(data)
+        bucket = None
+        if profile.rate:
+            bucket = self._buckets.get(profile.name)
+            if bucket is None or bucket.rate != profile.rate:
+                bucket = self._buckets[profile.name] = TokenBucket(profile.rate)
+        view = memoryview(data).cast('B')
+        for offset in range(0, len(view), CHUNK_SIZE):
+            chunk = view[offset:offset + CHUNK_SIZE]
+            if profile.pause_prob and random.random() < profile.pause_prob:
+                time.sleep(profile.delay(profile.pause_ms))
+            if bucket is not None:
+                bucket.consume(len(chunk))
+            self.raw.write(chunk)
+        return len(view)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
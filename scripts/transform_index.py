@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+改写变换的指纹索引（SQLite，供 html_transforms.py 使用）
+- files: 路径 → (大小, mtime_ns, SHA-256)；文件未动过时不用读就知道内容哈希
+- results: (输入哈希, 变换名, 变换版本) → 输出哈希；已知对某个内容不起作用的变换不再执行
+- chains: 变换链写出的内容 → 产生它的变换链；同一条链不会在自己的输出上再执行一次
+  （对非幂等的变换尤其重要，例如 flexible_height 每执行一次就多插入一份高度样式）
+- flags: 自动检测到的非幂等变换（对自己的输出再执行一次仍有改动）
+
+变换版本由注册时给出的 version 与所在脚本源码的哈希组成，修改脚本后旧记录自动失效。
+默认位置 .cache/transform-index.sqlite，删除即可全部重新计算。
+
+用法:
+    python3 scripts/transform_index.py            # 索引统计与非幂等变换
+    python3 scripts/transform_index.py --clear
+"""
+
+import argparse
+import hashlib
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX = os.path.join(PROJECT_ROOT, '.cache', 'transform-index.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    input_sha TEXT NOT NULL,
+    transform TEXT NOT NULL,
+    version TEXT NOT NULL,
+    output_sha TEXT NOT NULL,
+    PRIMARY KEY (input_sha, transform, version)
+);
+CREATE TABLE IF NOT EXISTS chains (
+    output_sha TEXT NOT NULL,
+    chain TEXT NOT NULL,
+    input_sha TEXT NOT NULL,
+    applied_at REAL,
+    PRIMARY KEY (output_sha, chain)
+);
+CREATE TABLE IF NOT EXISTS flags (
+    transform TEXT NOT NULL,
+    version TEXT NOT NULL,
+    input_sha TEXT NOT NULL,
+    output_sha TEXT NOT NULL,
+    again_sha TEXT NOT NULL,
+    detected_at REAL,
+    PRIMARY KEY (transform, version)
+);
+"""
+
+
+def content_sha(content):
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class TransformIndex:
+    """线程安全；多个进程可同时打开同一个索引（WAL，写入冲突时等待）"""
+
+    def __init__(self, path=DEFAULT_INDEX, readonly=False):
+        """readonly: 只读打开已有的索引（dry-run 用），不建表、不写入"""
+        self.path = path
+        if readonly:
+            uri = pathlib.Path(path).absolute().as_uri() + '?mode=ro'
+            self._conn = sqlite3.connect(uri, uri=True, timeout=30, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()
+
+    def _write(self, sql, args):
+        with self._lock:
+            self._conn.execute(sql, args)
+            self._conn.commit()
+
+    def file_sha(self, path):
+        """大小与 mtime 与记录一致时返回记录的哈希，否则返回 None（需要读文件）"""
+        st = os.stat(path)
+        row = self._query('SELECT size, mtime_ns, sha256 FROM files WHERE path = ?', (os.path.abspath(path),))
+        if row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        return None
+
+    def record_file(self, path, sha):
+        st = os.stat(path)
+        self._write('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                    (os.path.abspath(path), st.st_size, st.st_mtime_ns, sha))
+
+    def result(self, input_sha, transform, version):
+        row = self._query('SELECT output_sha FROM results WHERE input_sha = ? AND transform = ? AND version = ?',
+                          (input_sha, transform, version))
+        return row[0] if row else None
+
+    def record_result(self, input_sha, transform, version, output_sha):
+        self._write('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                    (input_sha, transform, version, output_sha))
+
+    def produced_by(self, sha, chain):
+        """sha 是否为 chain 写出的内容"""
+        return self._query('SELECT 1 FROM chains WHERE output_sha = ? AND chain = ?', (sha, chain)) is not None
+
+    def record_chain(self, input_sha, chain, output_sha):
+        self._write('INSERT OR REPLACE INTO chains VALUES (?, ?, ?, ?)',
+                    (output_sha, chain, input_sha, time.time()))
+
+    def flag(self, transform, version, input_sha, output_sha, again_sha):
+        self._write('INSERT OR IGNORE INTO flags VALUES (?, ?, ?, ?, ?, ?)',
+                    (transform, version, input_sha, output_sha, again_sha, time.time()))
+
+    def flagged(self):
+        """{变换名: 版本}：检测到非幂等的变换（只保留每个变换最近检测到的版本）"""
+        with self._lock:
+            rows = self._conn.execute('SELECT transform, version FROM flags ORDER BY detected_at').fetchall()
+        return dict(rows)
+
+    def summary(self):
+        with self._lock:
+            return {table: self._conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                    for table in ('files', 'results', 'chains', 'flags')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='改写变换指纹索引')
+    parser.add_argument('--index', default=DEFAULT_INDEX, help='索引路径（默认 .cache/transform-index.sqlite）')
+    parser.add_argument('--clear', action='store_true', help='删除索引')
+    args = parser.parse_args()
+
+    if args.clear:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.index + suffix):
+                os.remove(args.index + suffix)
+        print(f"🧹 已删除索引: {args.index}")
+        return
+    if not os.path.exists(args.index):
+        print(f"没有索引: {args.index}")
+        return
+
+    index = TransformIndex(args.index)
+    stats = index.summary()
+    print(f"文件 {stats['files']} 个，变换结果 {stats['results']} 条，变换链输出 {stats['chains']} 条")
+    flagged = index.flagged()
+    if flagged:
+        print("\n⚠️ 非幂等变换（对自己的输出再执行仍有改动）:")
+        for name, version in flagged.items():
+            print(f"  {name}  版本 {version}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
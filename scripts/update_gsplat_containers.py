@@ -7,8 +7,8 @@ import re
 import os
 from pathlib import Path
 
-# 项目根目录
-PROJECT_ROOT = Path(__file__).parent.parent
+from html_transforms import discover_pages, register
+from snapshot_store import SnapshotStore
 
 # 新的gsplat容器模板（gsplat-viewer2.html风格）
 NEW_CONTAINER_TEMPLATE = '''<div class="splat-container" data-ply="{ply_id}" style="position:relative;width:100%;min-height:400px;background:#0d0d1a;border-radius:16px;overflow:hidden;margin:16px 0;box-shadow:0 8px 32px rgba(0,0,0,0.3);">
@@ -19,30 +19,33 @@ NEW_CONTAINER_TEMPLATE = '''<div class="splat-container" data-ply="{ply_id}" sty
     </div>
 </div>'''
 
-def update_gsplat_containers(file_path):
+@register('gsplat_containers')
+def replace_containers(content):
+    """把 splat-container 整块替换为 gsplat-viewer2.html 风格的模板"""
+    # 匹配现有的splat-container并提取data-ply值
+    # 更宽松的正则表达式，匹配整个div块
+    pattern = r'<div\s+class="splat-container"[^>]*data-ply="([^"]+)"[^>]*>.*?</div>\s*</div>'
+    
+    def replace_container(match):
+        ply_id = match.group(1)
+        return NEW_CONTAINER_TEMPLATE.format(ply_id=ply_id)
+    
+    # 使用DOTALL标志让.匹配换行符
+    return re.sub(pattern, replace_container, content, flags=re.DOTALL)
+
+def update_gsplat_containers(file_path, snapshot=None):
     """更新单个HTML文件中的gsplat容器"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
         original_content = content
-        
-        # 匹配现有的splat-container并提取data-ply值
-        # 更宽松的正则表达式，匹配整个div块
-        pattern = r'<div\s+class="splat-container"[^>]*data-ply="([^"]+)"[^>]*>.*?</div>\s*</div>'
-        
-        def replace_container(match):
-            ply_id = match.group(1)
-            return NEW_CONTAINER_TEMPLATE.format(ply_id=ply_id)
-        
-        # 使用DOTALL标志让.匹配换行符
-        content = re.sub(pattern, replace_container, content, flags=re.DOTALL)
+        content = replace_containers(content)
         
         if content != original_content:
-            # 创建备份
-            backup_path = str(file_path) + '.container_bak'
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                f.write(original_content)
+            # 记录快照（可用 snapshot_store.py 回滚）
+            if snapshot is not None:
+                snapshot.record(file_path, original_content, content)
             
             # 写入更新后的内容
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -59,26 +62,19 @@ def update_gsplat_containers(file_path):
         return False
 
 def main():
-    mirrors_dir = PROJECT_ROOT / 'mirrors'
-    
-    # 需要处理的文件映射
-    files_to_update = [
-        mirrors_dir / '01' / 'index.html',  # 1个模型
-        mirrors_dir / '02' / 'index.html',  # 1个模型
-        mirrors_dir / '04' / 'index.html',  # 1个模型
-        mirrors_dir / '07' / 'index.html',  # 1个模型
-        mirrors_dir / '08' / 'index.html',  # 6个模型
-    ]
+    # frontend/mirrors 下含 3D 模型容器的页面
+    files_to_update = [Path(p) for p in discover_pages()]
     
     print('🔧 开始更新gsplat容器样式...\n')
     
-    updated_count = 0
-    for file_path in files_to_update:
-        if file_path.exists():
-            if update_gsplat_containers(file_path):
-                updated_count += 1
-        else:
-            print(f'⚠️ 文件不存在: {file_path}')
+    with SnapshotStore().begin('update_gsplat_containers') as run:
+        updated_count = 0
+        for file_path in files_to_update:
+            if file_path.exists():
+                if update_gsplat_containers(file_path, run):
+                    updated_count += 1
+            else:
+                print(f'⚠️ 文件不存在: {file_path}')
     
     print(f'\n✨ 完成! 已更新 {updated_count} 个文件')
 
@@ -2,43 +2,135 @@
 """
 简单的HTTP服务器
 用于本地预览Spatial News Demo
+
+用法:
+    python3 server.py                      # 默认 threaded 模式
+    python3 server.py --mode asyncio --pool-size 64
+    python3 server.py --mode single        # 原始的单连接模式
+    python3 server.py --no-cache           # 开发调试：禁用缓存（no-store）
+    python3 server.py --hot-cache-mb 0     # 关闭小文件内存缓存
+    python3 server.py --workers 4          # prefork 多进程（可加 --reuseport）
+    python3 server.py --json-log access.log   # JSON 结构化访问日志（省略文件名则输出到 stderr）
+    python3 server.py --throttle 4g        # 弱网模拟（3g / 4g / slow-wifi）
+    python3 server.py --throttle '\.ply$=3g' --throttle '/covers/=slow-wifi'   # 按路径模式
+指标: http://localhost:8080/__metrics（Prometheus）、/__metrics.json
 """
 
-import http.server
-import socketserver
+import argparse
 import os
+import re
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
+from http_cache import ETagIndex, HotFileCache
+from metrics import JSONAccessLog, Metrics
+from prefork import serve_prefork, supports_prefork
+from serve_modes import MODES, DEFAULT_MODE, DEFAULT_POOL_SIZE, make_server
+from static_handler import StaticHandler
+from throttle import PROFILES, Throttle
+
 PORT = 8080
 # 服务 frontend 目录（包含所有静态资源）
 DIRECTORY = "frontend"
 
-class Handler(http.server.SimpleHTTPRequestHandler):
+class Handler(StaticHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
-    
+
     def end_headers(self):
-        # 添加CORS头
+        # 添加CORS头（Cache-Control 由 StaticHandler 按缓存策略添加）
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
         super().end_headers()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Spatial News Demo 本地服务器')
+    parser.add_argument('--port', type=int, default=PORT, help=f'监听端口（默认 {PORT}）')
+    parser.add_argument('--mode', choices=MODES, default=DEFAULT_MODE,
+                        help=f'并发模式（默认 {DEFAULT_MODE}）')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                        help=f'asyncio 模式的工作线程数（默认 {DEFAULT_POOL_SIZE}）')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='禁用缓存：所有响应发送 no-store，不做 ETag/304')
+    parser.add_argument('--hot-cache-mb', type=int, default=64,
+                        help='小文件内存 LRU 缓存大小（MB，0 表示关闭，默认 64）')
+    parser.add_argument('--no-sendfile', action='store_true',
+                        help='禁用 sendfile，大文件改为用户态分块复制')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='prefork worker 进程数（默认 1，即单进程）')
+    parser.add_argument('--reuseport', action='store_true',
+                        help='prefork 时每个 worker 以 SO_REUSEPORT 各自绑定（默认共享继承的监听 fd）')
+    parser.add_argument('--no-metrics', action='store_true', help='关闭 /__metrics 指标统计')
+    parser.add_argument('--json-log', nargs='?', const='-', metavar='PATH',
+                        help='JSON 结构化访问日志（缓冲、后台写出），不带 PATH 时写到 stderr')
+    parser.add_argument('--throttle', action='append', default=[], metavar='[PATTERN=]PROFILE',
+                        help=f'弱网模拟，可重复，按路径正则先匹配先生效；PROFILE 为 {"/".join(PROFILES)} '
+                             '或 down=KBPS,latency=MS,ttfb=MS,jitter=MS,pause_prob=P,pause=MS')
+    return parser.parse_args()
+
+def on_shutdown():
+    if Handler.access_log:
+        Handler.access_log.close()
+    Handler.etag_index.save()
+    if Handler.hot_cache:
+        print(f"[{os.getpid()}] 内存缓存: {Handler.hot_cache.stats()}")
+
+def print_banner(args):
+    print(f"🚀 Spatial News Demo 服务器已启动 (模式: {args.mode}, worker: {args.workers})")
+    print(f"📱 本地访问: http://localhost:{args.port}")
+    print(f"🌐 局域网访问: http://[你的IP]:{args.port}")
+    if Handler.throttle:
+        print(f"🐢 弱网模拟:")
+        for line in Handler.throttle.describe():
+            print(f"   {line}")
+    print(f"")
+    print(f"按 Ctrl+C 停止服务器")
+    print("-" * 50)
+
 if __name__ == "__main__":
+    args = parse_args()
     os.chdir(os.path.dirname(os.path.abspath(__file__)) or '.')
-    
+
     if not os.path.exists(DIRECTORY):
         print(f"错误: 目录 '{DIRECTORY}' 不存在")
         sys.exit(1)
-    
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"🚀 Spatial News Demo 服务器已启动")
-        print(f"📱 本地访问: http://localhost:{PORT}")
-        print(f"🌐 局域网访问: http://[你的IP]:{PORT}")
-        print(f"")
-        print(f"按 Ctrl+C 停止服务器")
-        print("-" * 50)
-        
+
+    Handler.no_cache = args.no_cache
+    Handler.etag_index = ETagIndex()
+    Handler.use_sendfile = not args.no_sendfile
+    if args.hot_cache_mb > 0:
+        Handler.hot_cache = HotFileCache(max_bytes=args.hot_cache_mb * 1024 * 1024)
+    if not args.no_metrics:
+        Handler.metrics = Metrics(hot_cache=Handler.hot_cache)
+    if args.json_log:
+        Handler.access_log = JSONAccessLog(args.json_log)
+    if args.throttle:
+        try:
+            Handler.throttle = Throttle.from_specs(args.throttle)
+        except (ValueError, re.error) as e:
+            print(f"错误: --throttle 参数无效: {e}")
+            sys.exit(1)
+
+    def server_factory(reuse_port=False):
+        return make_server(args.mode, ("", args.port), Handler,
+                           pool_size=args.pool_size, reuse_port=reuse_port)
+
+    if args.workers > 1:
+        if not supports_prefork():
+            print("错误: 当前平台不支持 fork，无法使用 --workers")
+            sys.exit(1)
+        print_banner(args)
+        serve_prefork(server_factory, args.workers, reuse_port=args.reuseport,
+                      on_worker_exit=on_shutdown)
+        print("\n服务器已停止")
+        sys.exit(0)
+
+    with server_factory() as httpd:
+        print_banner(args)
+
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n服务器已停止")
+        finally:
+            on_shutdown()
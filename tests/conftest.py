@@ -0,0 +1,8 @@
+"""scripts/ 下的脚本按平铺模块互相导入（from downloader import ...），测试同样从这里导入"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
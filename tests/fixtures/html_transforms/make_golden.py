@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+生成 html_transforms 的黄金样本: 用重构之前的原始脚本（基线提交中的 scripts/*.py，经 git show 取出）
+处理 inputs/ 下的样本页面，把结果的 SHA-256 写入 golden.json
+- 每个变换单独执行一次的结果（键为变换名），以及按 CHAIN 顺序逐个运行全部脚本的结果（键为 chain）
+- 原始脚本各自读写一次文件、顺带写 *_bak 备份，这里在临时目录里照原样运行，不经过 @register 的纯函数
+- remove_container_aspect_ratio.py 没有单文件函数（导入即处理写死的 mirrors 目录），
+  clean_mirrors_scripts.py 只有 clean_html(content)；前者改写目录常量后执行，后者直接调用
+
+样本页面是 mirrors 01/04/08 的 index.html 及其各阶段的 *_bak，外加一个带外部脚本的原始页面（去重后 gzip 保存），
+*_bak 迁入快照存储（snapshot_store.py migrate）后 --collect 就无法再收集，已提交的样本不受影响。
+
+用法:
+    python3 tests/fixtures/html_transforms/make_golden.py             # 按 inputs/ 重新生成 golden.json
+    python3 tests/fixtures/html_transforms/make_golden.py --collect   # 先从 frontend/mirrors 重新收集样本
+"""
+
+import argparse
+import contextlib
+import glob
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import tempfile
+
+FIXTURE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(FIXTURE_DIR)))
+INPUTS_DIR = os.path.join(FIXTURE_DIR, 'inputs')
+GOLDEN_FILE = os.path.join(FIXTURE_DIR, 'golden.json')
+
+# 重构（user-021）之前的提交
+BASELINE = 'cdc3b67'
+SAMPLE_PAGES = ('01', '04', '08')
+# 清理外部脚本之前的原始页面（mirrors 下各阶段的版本里已经没有 <script src>）
+EXTRA_SAMPLES = ('01/80611955.shtml.orig',)
+
+# 变换名 → (基线脚本, 处理单个文件的函数名)；函数名为 None 的按模块说明中的方式执行
+CHAIN = (
+    ('gsplat_containers', 'update_gsplat_containers', 'update_gsplat_containers'),
+    ('container_aspect_ratio', 'update_container_aspect_ratio', 'update_aspect_ratio'),
+    ('flexible_height', 'update_flexible_height', 'update_to_flexible_height'),
+    ('restore_aspect_ratio', 'restore_aspect_ratio', 'restore_aspect_ratio'),
+    ('remove_aspect_ratio', 'remove_container_aspect_ratio', None),
+    ('spin_animation', 'add_spin_animation', 'add_spin_animation'),
+    ('clean_scripts', 'clean_mirrors_scripts', None),
+)
+
+
+def sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def read_input(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def input_files():
+    return sorted(glob.glob(os.path.join(INPUTS_DIR, '*.html.gz')))
+
+
+def baseline_source(script):
+    return subprocess.run(['git', 'show', f'{BASELINE}:scripts/{script}.py'], cwd=PROJECT_ROOT,
+                          check=True, capture_output=True, text=True).stdout
+
+
+class BaselineScripts:
+    """基线脚本，每个都以 run(path) 的形式原地处理一个文件"""
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.sources = {script: baseline_source(script) for _, script, _ in CHAIN}
+        self.modules = {}
+
+    def _module(self, script):
+        if script not in self.modules:
+            path = os.path.join(self.workdir, f'baseline_{script}.py')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.sources[script])
+            spec = importlib.util.spec_from_file_location(f'baseline_{script}', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.modules[script] = module
+        return self.modules[script]
+
+    def run(self, script, func_name, path):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if func_name is not None:
+                getattr(self._module(script), func_name)(path)
+            elif script == 'remove_container_aspect_ratio':
+                # 处理 mirrors_base/<01..08>/index.html，把 path 所在的 01 目录的上级作为 mirrors_base
+                source = self.sources[script]
+                literal = "'/Volumes/Prism/sharp2/mirrors'"
+                assert literal in source
+                mirrors_base = os.path.dirname(os.path.dirname(path))
+                exec(compile(source.replace(literal, repr(mirrors_base)), script, 'exec'), {})
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(self._module(script).clean_html(content))
+
+
+def run_baseline(scripts, content, steps):
+    """在临时的 mirrors/01/index.html 上依次运行 steps，返回最终内容"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'mirrors', '01', 'index.html')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        for _, script, func_name in steps:
+            scripts.run(script, func_name, path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+
+def collect():
+    """把样本页面各阶段的版本（去重）收集到 inputs/"""
+    os.makedirs(INPUTS_DIR, exist_ok=True)
+    for path in input_files():
+        os.remove(path)
+    mirrors_dir = os.path.join(PROJECT_ROOT, 'frontend', 'mirrors')
+    samples = []
+    for page in SAMPLE_PAGES:
+        page_dir = os.path.join(mirrors_dir, page)
+        for path in sorted(glob.glob(os.path.join(page_dir, 'index.html*'))):
+            suffix = path[len(os.path.join(page_dir, 'index.html')):]
+            if not suffix or suffix.endswith('bak') or suffix == '.bak2':
+                samples.append((f"{page}{suffix.replace('.', '-') or '-current'}", path))
+    for sample in EXTRA_SAMPLES:
+        samples.append((sample.replace('/', '-').replace('.', '-'), os.path.join(mirrors_dir, sample)))
+
+    seen = set()
+    for name, path in samples:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            content = f.read()
+        if sha256(content) in seen:
+            continue
+        seen.add(sha256(content))
+        # mtime=0: 重新收集同样的内容时 gzip 字节不变
+        with open(os.path.join(INPUTS_DIR, f'{name}.html.gz'), 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                f.write(content.encode('utf-8'))
+        print(f"  + {name}.html.gz")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用基线脚本生成 html_transforms 的黄金样本')
+    parser.add_argument('--collect', action='store_true', help='先从 frontend/mirrors 重新收集样本页面')
+    args = parser.parse_args()
+
+    if args.collect:
+        collect()
+    golden = {'baseline': BASELINE, 'chain': [name for name, _, _ in CHAIN], 'cases': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        scripts = BaselineScripts(workdir)
+        for path in input_files():
+            content = read_input(path)
+            expected = {step[0]: sha256(run_baseline(scripts, content, [step])) for step in CHAIN}
+            expected['chain'] = sha256(run_baseline(scripts, content, CHAIN))
+            golden['cases'][os.path.basename(path)] = expected
+            changed = sum(1 for name, _, _ in CHAIN if expected[name] != sha256(content))
+            print(f"  ✓ {os.path.basename(path)}: {changed} 个变换有改动")
+    with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+        json.dump(golden, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"\n✨ {len(golden['cases'])} 个样本 → {os.path.relpath(GOLDEN_FILE, PROJECT_ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""blob_store.py: 只硬链接不会被原地改写的媒体资源，使用 blob 前校验内容"""
+
+import os
+
+from blob_store import BlobStore, detach, migrate, scan, sha256_file
+
+
+def mirrors(tmp_path, name, data):
+    paths = []
+    for mirror in ('01', '02'):
+        path = tmp_path / 'mirrors' / mirror / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        paths.append(path)
+    return paths
+
+
+def test_migrate_links_media_but_not_stylesheets(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    a_jpg, b_jpg = mirrors(tmp_path, 'cover.jpg', b'jpeg')
+    a_css, b_css = mirrors(tmp_path, 'style_custom.css', b'br{display:none}')
+    migrate(scan(str(tmp_path / 'mirrors')), store)
+
+    assert os.path.samefile(a_jpg, b_jpg)
+    assert not os.path.samefile(a_css, b_css)
+    # 原地编辑一个镜像的 CSS 不影响另一个
+    with open(a_css, 'r+b') as f:
+        f.write(b'p ')
+    assert b_css.read_bytes() == b'br{display:none}'
+
+
+def test_migrate_detaches_stylesheets_linked_by_earlier_migration(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    a_css, b_css = mirrors(tmp_path, 'style_custom.css', b'br{display:none}')
+    blob = tmp_path / 'blobs' / 'ab' / ('ab' * 32)
+    blob.parent.mkdir(parents=True)
+    os.link(a_css, blob)
+    b_css.unlink()
+    os.link(a_css, b_css)
+
+    assert detach(str(tmp_path / 'mirrors'), store) == 2
+    assert not os.path.samefile(a_css, blob) and not os.path.samefile(b_css, blob) and not os.path.samefile(a_css, b_css)
+    assert b_css.read_bytes() == b'br{display:none}'
+
+
+def test_adopt_replaces_blob_edited_through_a_link(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    a_jpg, b_jpg = mirrors(tmp_path, 'cover.jpg', b'jpeg')
+    digest = sha256_file(a_jpg)
+    assert store.adopt(a_jpg) == 'stored'
+    # 同样大小的原地改写: 只比较大小发现不了
+    with open(a_jpg, 'r+b') as f:
+        f.write(b'JPEG')
+
+    assert store.adopt(b_jpg) == 'stored'
+    assert os.path.samefile(b_jpg, store.blob_path(digest))
+    assert b_jpg.read_bytes() == b'jpeg' and a_jpg.read_bytes() == b'JPEG'
+
+
+def test_materialise_refuses_corrupted_blob(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    a_jpg, _ = mirrors(tmp_path, 'cover.jpg', b'jpeg')
+    digest = sha256_file(a_jpg)
+    store.adopt(a_jpg)
+    with open(a_jpg, 'r+b') as f:
+        f.write(b'JPEG')
+
+    assert not store.materialise(digest, tmp_path / 'mirrors' / '03' / 'cover.jpg')
+    assert not (tmp_path / 'mirrors' / '03' / 'cover.jpg').exists()
+    assert not store.has(digest)
+
+
+def test_gc_removes_unreferenced_and_corrupted_blobs(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    a_jpg, b_jpg = mirrors(tmp_path, 'cover.jpg', b'jpeg')
+    icons = mirrors(tmp_path, 'icon.png', b'png')
+    migrate(scan(str(tmp_path / 'mirrors')), store)
+    with open(a_jpg, 'r+b') as f:
+        f.write(b'JPEG')
+    for path in icons:
+        path.unlink()
+
+    assert store.gc() == (2, 7, 1)
+    assert list(store.iter_blobs()) == []
+    assert a_jpg.read_bytes() == b_jpg.read_bytes() == b'JPEG'
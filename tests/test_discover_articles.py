@@ -0,0 +1,83 @@
+"""discover_articles.py: URL 规范化，以及在本地 fixture 站点上的去重、--since 截止与抓取次数"""
+
+import datetime
+import threading
+
+import pytest
+
+from bench_discovery import START_DATE, FixtureHandler, FixtureSite
+from discover_articles import CHANNEL_ROOT, CHANNELS, ArticleDiscovery, normalize_url
+from downloader import Downloader
+from serve_modes import ThreadedHTTPServer
+
+PAGES = 12
+PER_PAGE = 4
+
+
+@pytest.mark.parametrize('url, base, expected', [
+    ('HTTPS://WWW.SZTV.com.cn:443/ysz/zx/zw/', None, 'https://www.sztv.com.cn/ysz/zx/zw/'),
+    ('http://www.sztv.com.cn:80/a.shtml', None, 'http://www.sztv.com.cn/a.shtml'),
+    ('http://127.0.0.1:8080/a.shtml', None, 'http://127.0.0.1:8080/a.shtml'),
+    ('/ysz/zx/zw/index.shtml', 'https://www.sztv.com.cn/', 'https://www.sztv.com.cn/ysz/zx/zw/'),
+    ('../rd/index_2.shtml', 'https://www.sztv.com.cn/ysz/zx/zw/', 'https://www.sztv.com.cn/ysz/zx/rd/index_2.shtml'),
+    ('80611058.shtml#comment', 'https://www.sztv.com.cn/ysz/zx/zw/', 'https://www.sztv.com.cn/ysz/zx/zw/80611058.shtml'),
+    ('/a.shtml?utm_source=wx&spm=1&b=2&a=1', 'https://www.sztv.com.cn', 'https://www.sztv.com.cn/a.shtml?a=1&b=2'),
+    ('https://www.sztv.com.cn', None, 'https://www.sztv.com.cn/'),
+])
+def test_normalize_url(url, base, expected):
+    assert normalize_url(url, base) == expected
+
+
+@pytest.fixture(scope='module')
+def site():
+    fixture = FixtureSite(PAGES, PER_PAGE)
+    FixtureHandler.site = fixture
+    FixtureHandler.latency = 0.0
+    server = ThreadedHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fixture.base = f'http://127.0.0.1:{server.server_address[1]}'
+    yield fixture
+    server.shutdown()
+    server.server_close()
+
+
+def discover(site, workers, since=None):
+    FixtureHandler.hits = {}
+    with Downloader(workers=workers, per_host=workers, rate=0, retry_file=None) as dl:
+        discovery = ArticleDiscovery(dl, base=site.base, since=since and since.isoformat(),
+                                     inflight=workers)
+        articles = discovery.run()
+    return articles, discovery.stats, dict(FixtureHandler.hits)
+
+
+@pytest.mark.parametrize('workers', [1, 8])
+def test_every_article_found_once(site, workers):
+    articles, stats, _ = discover(site, workers)
+    ids = [a['article_id'] for a in articles]
+    expected = {site.article_id(c, p, i)
+                for c in CHANNELS for p in range(1, PAGES + 1) for i in range(PER_PAGE)}
+    assert len(ids) == len(set(ids))
+    assert {int(i) for i in ids} == expected
+    # #片段、utm 参数和跨频道转载都指向已收录的文章
+    assert stats['duplicates'] >= 3 * len(CHANNELS) * PAGES
+    assert stats['pages'] == len(CHANNELS) * PAGES
+    assert stats['failed'] == 0
+
+
+@pytest.mark.parametrize('workers', [1, 8])
+def test_no_url_fetched_twice(site, workers):
+    _, _, hits = discover(site, workers)
+    assert hits and max(hits.values()) == 1
+    # 频道首页的 index.shtml 与目录形式是同一个 URL
+    for channel in CHANNELS:
+        assert CHANNEL_ROOT.format(channel) + 'index.shtml' not in hits
+
+
+def test_since_cutoff(site):
+    since = START_DATE - datetime.timedelta(days=2)
+    articles, stats, hits = discover(site, 8, since)
+    assert len(articles) == site.expected(since)
+    assert all(a['publish_date'] >= since.isoformat() for a in articles)
+    # 整页早于截止日期的列表页不再展开分页
+    assert stats['cutoff_pages'] > 0
+    assert len(hits) < len(CHANNELS) * PAGES
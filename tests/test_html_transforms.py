@@ -0,0 +1,66 @@
+"""html_transforms.py: 单次执行变换链的结果与原始脚本逐个运行的结果逐字节一致
+
+期望结果来自重构之前的脚本（tests/fixtures/html_transforms/make_golden.py 生成的 golden.json），
+不经过 @register 的纯函数。
+"""
+
+import os
+
+import pytest
+
+from html_transforms import apply_chain, load_golden, resolve_chain, rewrite_file
+from transform_index import TransformIndex, content_sha
+
+BASELINE_CHAIN, CASES = load_golden()
+CASE_IDS = [name for name, _, _ in CASES]
+
+
+@pytest.mark.parametrize('name, content, expected', CASES, ids=CASE_IDS)
+@pytest.mark.parametrize('transform', BASELINE_CHAIN)
+def test_single_transform_matches_baseline_script(transform, name, content, expected):
+    actual, _ = apply_chain(content, resolve_chain([transform]))
+    assert content_sha(actual) == expected[transform]
+
+
+@pytest.mark.parametrize('name, content, expected', CASES, ids=CASE_IDS)
+def test_chain_matches_scripts_run_in_sequence(name, content, expected):
+    actual, changes = apply_chain(content, resolve_chain(BASELINE_CHAIN))
+    assert content_sha(actual) == expected['chain']
+    assert (actual == content) == (not changes)
+
+
+def test_golden_covers_every_baseline_transform():
+    # 每个基线变换至少在一个样本上有改动，否则对应的比较形同虚设
+    for transform in BASELINE_CHAIN:
+        assert any(expected[transform] != content_sha(content) for _, content, expected in CASES), transform
+
+
+def test_dry_run_writes_neither_file_nor_index(tmp_path):
+    name, content, expected = CASES[0]
+    page = tmp_path / 'index.html'
+    page.write_text(content, encoding='utf-8')
+    index = TransformIndex(str(tmp_path / 'index.sqlite'))
+    chain = resolve_chain(BASELINE_CHAIN)
+
+    status, changes = rewrite_file(str(page), chain, dry_run=True, index=index)
+    assert status == 'updated' and changes
+    assert page.read_text(encoding='utf-8') == content
+    assert set(index.summary().values()) == {0}
+
+    status, _ = rewrite_file(str(page), chain, index=index)
+    assert status == 'updated'
+    assert content_sha(page.read_text(encoding='utf-8')) == expected['chain']
+    recorded = index.summary()
+    index.close()
+
+    # 只读打开已有索引: 命中记录照常跳过，什么也不写
+    readonly = TransformIndex(str(tmp_path / 'index.sqlite'), readonly=True)
+    assert rewrite_file(str(page), chain, dry_run=True, index=readonly) == ('applied', [])
+    assert readonly.summary() == recorded
+    readonly.close()
+
+
+def test_readonly_index_is_not_created(tmp_path):
+    with pytest.raises(Exception):
+        TransformIndex(str(tmp_path / 'missing.sqlite'), readonly=True)
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,171 @@
+"""minify_mirrors.py: 手写的输入 → 期望输出
+
+期望输出按浏览器的渲染规则逐个手写（空白合并、块级边界、display: none 不生成盒子、
+样式层叠），不借用 minify_mirrors 自己的样式解析或渲染检查。
+"""
+
+import os
+
+import pytest
+
+from html_transforms import PROJECT_ROOT
+from minify_mirrors import compare_rendering, hoist_styles, load_stylesheets, minify_html, minify_page
+
+MINIFY_CASES = [
+    # 块级元素边界两侧的空白不渲染
+    ('<div>\n  a\n  <p>x</p>\n  b\n</div>', '<div>a<p>x</p>b</div>'),
+    # 行内元素两侧的空白合并为一个空格，不能删
+    ('<p>a   <b>x</b>\n\tb</p>', '<p>a <b>x</b> b</p>'),
+    # 页面样式表没有改变 <br> 的 display 时，<br> 两侧是行首/行尾
+    ('<p>a<br>\n   b</p>', '<p>a<br>b</p>'),
+    # 注释删除，条件注释保留
+    ('<p>a<!-- note -->b</p><!--[if IE]><p>ie</p><![endif]-->', '<p>ab</p><!--[if IE]><p>ie</p><![endif]-->'),
+    # 空的包装元素删除（两侧文本之间仍是一个空格）；只包着 <br> 的行内包装元素换成 <br>
+    ('<div>a <div></div> b</div>', '<div>a b</div>'),
+    ('<p>a<span style="color:red"></span>b</p>', '<p>ab</p>'),
+    ('<p>a<span><br></span>b</p>', '<p>a<br>b</p>'),
+    # 带尺寸样式或其他属性的空元素可能占位，保留
+    ('<p>a<span style="padding:4px"></span>b</p>', '<p>a<span style="padding:4px"></span>b</p>'),
+    ('<p>a<span class="icon"></span>b</p>', '<p>a<span class="icon"></span>b</p>'),
+    # 保留空白的元素内不动
+    ('<pre>  a\n\n  b  </pre>', '<pre>  a\n\n  b  </pre>'),
+    ('<p style="white-space:pre-wrap">  a  </p>', '<p style="white-space:pre-wrap">  a  </p>'),
+    ('<div>\n<script>\n  var a  =  1;\n</script>\n</div>', '<div><script>\n  var a  =  1;\n</script></div>'),
+    # display: none 的元素不生成盒子: "a" 与 "b" 之间渲染为一个空格，不能因为它是 div 就删掉两侧空白
+    ('<div>a <div style="display:none"></div> b</div>', '<div>a <div style="display:none"></div> b</div>'),
+    ('<div>a <div hidden>x</div> b</div>', '<div>a <div hidden>x</div> b</div>'),
+    ('<div>a <br style="display: none"> b</div>', '<div>a <br style="display: none"> b</div>'),
+    ('<div>a <section style="display:contents"><span>x</span></section> b</div>',
+     '<div>a <section style="display:contents"><span>x</span></section> b</div>'),
+    # <body> 中的 <script>/<style> 同样不生成盒子；<head> 中的元素两侧空白不渲染
+    ('<p>a <script>go()</script> b</p>', '<p>a <script>go()</script> b</p>'),
+    ('<p>a <style>b{color:red}</style> <b>b</b></p>', '<p>a <style>b{color:red}</style> <b>b</b></p>'),
+    ('<html><head>\n<title>t</title>\n<meta charset="utf-8">\n</head>\n<body>\n<p>x</p>\n</body></html>',
+     '<html><head><title>t</title><meta charset="utf-8"></head><body><p>x</p></body></html>'),
+    # 显式 display: block 覆盖 hidden，仍是块级边界
+    ('<div>a <div hidden style="display:block">x</div> b</div>', '<div>a<div hidden style="display:block">x</div>b</div>'),
+    # 页面 <style> 中的 br{display:none}: <br> 不生成盒子，"a" 与 "b" 之间是一个空格
+    ('<style>br{display:none}</style><p>a<br>\n   b</p>', '<style>br{display:none}</style><p>a<br> b</p>'),
+    # white-space: pre-line 的元素中的换行占一行，不能删，只有空白的 div 也不能删
+    ('<style>.box .info{white-space:pre-line}</style><div class="box"><div class="info">\n</div> <div>\n</div></div>',
+     '<style>.box .info{white-space:pre-line}</style><div class="box"><div class="info">\n</div></div>'),
+    ('<style>div.x{white-space:pre}</style><div class="x">a<div> </div></div>',
+     '<style>div.x{white-space:pre}</style><div class="x">a<div> </div></div>'),
+    # 样式表给空元素加了尺寸，保留
+    ('<style>.box span{padding:4px}</style><div class="box">a<span></span>b</div>',
+     '<style>.box span{padding:4px}</style><div class="box">a<span></span>b</div>'),
+    # ::before 生成的行内盒子紧挨着元素开头的空白
+    ('<style>p.top:before{content:"置顶"}</style><p class="top"> x </p>',
+     '<style>p.top:before{content:"置顶"}</style><p class="top"> x</p>'),
+    # 链接的样式表内容未知: 只删注释
+    ('<link rel="stylesheet" href="a.css"><p>a <!-- c --> <br>\n</p>', '<link rel="stylesheet" href="a.css"><p>a  <br>\n</p>'),
+]
+
+
+@pytest.mark.parametrize('source, expected', MINIFY_CASES)
+def test_minify_html(source, expected):
+    assert minify_html(source) == expected
+    assert minify_html(expected) == expected
+
+
+FONT = 'font-family:-apple-system,BlinkMacSystemFont,Helvetica Neue,PingFang SC,sans-serif'
+
+
+def page(body, head='<style>p{color:blue}</style>'):
+    return f'<html><head><title>t</title>{head}</head><body>{body}</body></html>'
+
+
+def test_hoist_repeated_style():
+    source = page(f'<p style="{FONT};color:red">x</p>' * 3)
+    expected = page(
+        '<p class="hs0">x</p>' * 3,
+        head=f'<style data-hoisted>:where(.hs0){{{FONT}!important;color:red!important}}</style>'
+             '<style>p{color:blue}</style>')
+    assert hoist_styles(source) == expected
+    assert hoist_styles(expected) == expected
+
+
+def test_hoist_keeps_important_and_existing_class():
+    source = page(f'<p class="lead" style="{FONT};color:red !important">x</p>' * 3)
+    expected = page(
+        '<p class="lead hs0" style="color:red!important">x</p>' * 3,
+        head=f'<style data-hoisted>:where(.hs0){{{FONT}!important}}</style><style>p{{color:blue}}</style>')
+    assert hoist_styles(source) == expected
+
+
+def test_hoist_leaves_script_managed_properties_inline():
+    # 页面脚本 el.style.display = 'none'（jQuery hide()）、el.style.width = ... 写入的是普通内联声明:
+    # 原样式里的 display/width 若提取成 :where(.hsN){display:block!important}，脚本写入的值就会输给它。
+    # 这些属性必须留在 style 属性里，脚本覆盖它们时与改写前的层叠结果相同。
+    source = page(f'<section style="display:block;{FONT};width:100%;margin:0 auto;padding-left:8px">x</section>' * 3)
+    expected = page(
+        '<section class="hs0" style="display:block;width:100%;margin:0 auto;padding-left:8px">x</section>' * 3,
+        head=f'<style data-hoisted>:where(.hs0){{{FONT}!important}}</style><style>p{{color:blue}}</style>')
+    assert hoist_styles(source) == expected
+
+
+def test_hoist_skips_style_made_only_of_script_managed_properties():
+    source = page('<div style="display:none;width:100%;height:240px;transform:translateX(0)">x</div>' * 5)
+    assert hoist_styles(source) == source
+
+
+def test_hoist_skips_when_not_worth_it():
+    source = page('<p style="color:red">x</p><p style="color:red">y</p>')
+    assert hoist_styles(source) == source
+
+
+def test_compare_rendering_catches_collapsed_space_around_hidden_block():
+    before = '<div>a <div style="display:none"></div> b</div>'
+    after = '<div>a<div style="display:none"></div>b</div>'
+    assert compare_rendering(before, after)
+    assert compare_rendering(before, before) == []
+
+
+def test_compare_rendering_inline_style_beats_stylesheet():
+    # 内联的 white-space: normal 压过样式表中的 pre-line，换行渲染为空格
+    head = '<style>.x{white-space:pre-line}</style>'
+    before = page('<div class="x" style="white-space:normal">a\nb</div>', head=head)
+    assert compare_rendering(before, page('<div class="x" style="white-space:normal">a b</div>', head=head)) == []
+    assert compare_rendering(page('<div class="x">a\nb</div>', head=head), page('<div class="x">a b</div>', head=head))
+
+
+def test_compare_rendering_catches_hoisted_script_managed_property():
+    before = page('<section style="display:block;color:red">x</section>' * 3)
+    after = page('<section class="hs0">x</section>' * 3,
+                 head='<style data-hoisted>:where(.hs0){display:block!important;color:red!important}</style>'
+                      '<style>p{color:blue}</style>')
+    assert compare_rendering(before, after)
+
+
+MIRROR_01 = os.path.join(PROJECT_ROOT, 'frontend', 'mirrors', '01')
+
+
+def mirror_page():
+    with open(os.path.join(MIRROR_01, 'index.html'), 'r', encoding='utf-8') as f:
+        content = f.read()
+    return content, load_stylesheets(content, MIRROR_01)
+
+
+def test_mirror_page_keeps_pre_line_block():
+    # style_custom.css: .article-content .bottomInfo{white-space:pre-line;line-height:17px}，
+    # 其中的换行渲染成一行 17px 的空行
+    content, stylesheets = mirror_page()
+    assert stylesheets is not None
+    assert '<div class="bottomInfo">\n</div>' in content
+    result = minify_page(content, stylesheets)
+    assert '<div class="bottomInfo">\n</div>' in result
+    assert len(result) < len(content)
+    assert compare_rendering(content, result, stylesheets) == []
+
+    broken = result.replace('<div class="bottomInfo">\n</div>', '<div class="bottomInfo"></div>')
+    assert compare_rendering(content, broken, stylesheets)
+
+
+def test_mirror_stylesheet_hides_br():
+    # style_custom.css: br{display:none}
+    content, stylesheets = mirror_page()
+    source = content.replace('<div class="bottomInfo">', '<p>a <br/>\n b</p><div class="bottomInfo">')
+    result = minify_html(source, stylesheets)
+    assert '<p>a <br/> b</p>' in result
+    assert compare_rendering(source, result, stylesheets) == []
+    assert compare_rendering(source, result.replace('<p>a <br/> b</p>', '<p>a<br/>b</p>'), stylesheets)
@@ -0,0 +1,55 @@
+"""snapshot_store.py: 记录改写前后内容并按运行回滚"""
+
+from snapshot_store import SnapshotStore, _sha
+
+
+def rewrite(store, path, after, label='test'):
+    with store.begin(label) as run:
+        before = path.read_bytes()
+        run.record(str(path), before, after)
+        path.write_bytes(after)
+    return store.find_run(run.id)
+
+
+def test_rollback_restores_before(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    page = tmp_path / 'index.html'
+    page.write_bytes(b'<p>before</p>')
+    run = rewrite(store, page, b'<p>after</p>')
+
+    assert store.rollback(run) == [(store.runs()[0]['files'][0]['path'], '已恢复')]
+    assert page.read_bytes() == b'<p>before</p>'
+
+
+def test_rollback_skips_page_changed_afterwards(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    page = tmp_path / 'index.html'
+    page.write_bytes(b'<p>before</p>')
+    run = rewrite(store, page, b'<p>after</p>')
+    page.write_bytes(b'<p>edited by hand</p>')
+
+    [(_, status)] = store.rollback(run)
+    assert '跳过' in status
+    assert page.read_bytes() == b'<p>edited by hand</p>'
+
+
+def test_forced_rollback_of_deleted_page(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    page = tmp_path / 'mirror' / 'index.html'
+    page.parent.mkdir()
+    page.write_bytes(b'<p>before</p>')
+    run = rewrite(store, page, b'<p>after</p>')
+    page.unlink()
+    page.parent.rmdir()
+
+    [(_, status)] = store.rollback(run)
+    assert '跳过' in status and not page.exists()
+
+    [(_, status)] = store.rollback(run, force=True)
+    assert status == '已恢复'
+    assert page.read_bytes() == b'<p>before</p>'
+    # 回滚本身也是一次运行，删除状态记为空内容
+    undo = store.find_run('last')
+    assert undo['id'] != run['id']
+    [entry] = undo['files']
+    assert entry['before'] == _sha(b'') and entry['after'] == _sha(b'<p>before</p>')